@@ -1,14 +1,14 @@
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 
-from .models import UserProfile
+from .utils import get_request_user_profile
 
 
 def get_user_profile(request):
-    try:
-        user_profile = UserProfile.objects.get(user=request.user)
-    except:  # noqa: E722
-        user_profile = None
-    return dict(user_profile=user_profile)
+    # Only queried if a template actually uses it, and at most once per request
+    return dict(
+        user_profile=SimpleLazyObject(lambda: get_request_user_profile(request))
+    )
 
 
 def get_google_api(request):
@@ -0,0 +1,37 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase
+
+from efood_main.apps.accounts.context_processors import get_user_profile
+from efood_main.apps.accounts.models import User, UserProfile
+from efood_main.apps.accounts.utils import get_request_user_profile
+
+
+class GetUserProfileTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name="Test",
+            last_name="User",
+            username="testuser",
+            email="testuser@example.com",
+            password="testpass123",
+        )
+        self.request = RequestFactory().get("/")
+        self.request.user = self.user
+
+    def test_anonymous_user_never_queries(self):
+        self.request.user = AnonymousUser()
+        with self.assertNumQueries(0):
+            user_profile = get_user_profile(self.request)["user_profile"]
+            self.assertFalse(user_profile)
+
+    def test_profile_is_not_loaded_until_used(self):
+        with self.assertNumQueries(0):
+            get_user_profile(self.request)
+
+    def test_profile_is_loaded_once_per_request(self):
+        user_profile = get_user_profile(self.request)["user_profile"]
+        with self.assertNumQueries(1):
+            self.assertEqual(user_profile.user, self.user)
+            self.assertIsNone(user_profile.address)
+            profile = get_request_user_profile(self.request)
+        self.assertEqual(profile, UserProfile.objects.get(user=self.user))
@@ -1,9 +1,19 @@
+import shutil
+import tempfile
+
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from efood_main.apps.accounts.forms import UserForm, UserProfileForm
 
 
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
 class UserFormTestCase(TestCase):
     def test_password_confirmation_failure(self):
         form_data = {
@@ -45,6 +55,7 @@ class UserFormTestCase(TestCase):
             self.assertEqual(user.role, user.CUSTOMER)
 
 
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class UserProfileFormTest(TestCase):
     def test_invalid_file_types(self):
         """Test the form with invalid file types
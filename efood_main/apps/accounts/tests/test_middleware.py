@@ -0,0 +1,79 @@
+import re
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import path, reverse
+
+from efood_main.apps.accounts.models import User
+from efood_main.middleware import request_metrics, reset_request_metrics
+
+SERVER_TIMING = re.compile(
+    r'db;dur=\d+\.\d;desc="(\d+) queries", tpl;dur=\d+\.\d, total;dur=\d+\.\d'
+)
+
+
+async def run_queries(request, count):
+    for _ in range(count):
+        await User.objects.aexists()
+    return HttpResponse()
+
+
+urlpatterns = [
+    path("unnamed/<int:pk>/", lambda request, pk: HttpResponse()),
+    path("queries/<int:count>/", run_queries),
+]
+
+
+class RequestMetricsMiddlewareTest(TestCase):
+    def setUp(self):
+        reset_request_metrics()
+        cache.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("home"))
+        timing = dict(
+            part.strip().split(";", 1)[0:2]
+            for part in response["Server-Timing"].split(",")
+        )
+        self.assertEqual(set(timing), {"db", "tpl", "total"})
+        self.assertIn("queries", timing["db"])
+
+    async def test_async_views_are_measured_under_asgi(self):
+        response = await self.async_client.get(reverse("recipe_search"), {"q": "soup"})
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], SERVER_TIMING)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    async def test_queries_of_async_views_are_counted(self):
+        counts = []
+        for queries in [0, 3]:
+            response = await self.async_client.get(f"/queries/{queries}/")
+            counts.append(int(SERVER_TIMING.match(response["Server-Timing"])[1]))
+        # Whatever the session and auth middleware run comes on top
+        self.assertEqual(counts[1] - counts[0], 3)
+
+    def test_histogram_is_kept_per_url_name(self):
+        self.client.get(reverse("home"))
+        self.client.get(reverse("home"))
+        self.client.get(reverse("login"))
+        metrics = request_metrics()
+        self.assertEqual(metrics["home"]["count"], 2)
+        self.assertEqual(sum(metrics["home"]["buckets"].values()), 2)
+        self.assertEqual(metrics["login"]["count"], 1)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_histogram_of_an_unnamed_url_is_kept_per_route(self):
+        self.client.get("/unnamed/1/")
+        self.client.get("/unnamed/2/")
+        self.assertEqual(request_metrics()["unnamed/<int:pk>/"]["count"], 2)
+
+    @override_settings(REQUEST_METRICS_MAX_QUERIES=1)
+    def test_request_over_query_threshold_is_logged_with_sql(self):
+        with self.assertLogs("efood_main.middleware", "WARNING") as logs:
+            self.client.get(reverse("home"))
+        self.assertIn("SELECT", logs.output[0])
+
+    def test_fast_request_is_not_logged(self):
+        with self.assertNoLogs("efood_main.middleware", "WARNING"):
+            self.client.get(reverse("login"))
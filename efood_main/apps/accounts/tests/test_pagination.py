@@ -0,0 +1,91 @@
+from datetime import date, time, timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+
+from efood_main.apps.accounts.models import User, UserProfile
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.workshop.models import Workshop
+from efood_main.pagination import paginate_by_cursor
+
+ORDERING = ("-date", "-id")
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        chef_user = User.objects.create(
+            first_name="Chef",
+            last_name="Test",
+            username="cheftest",
+            email="cheftest@example.com",
+        )
+        chef = Chef.objects.create(
+            user=chef_user,
+            user_profile=UserProfile.objects.get(user=chef_user),
+            chef_name="TestChef",
+        )
+        # Several workshops share a date so the id tiebreak matters
+        for i in range(7):
+            Workshop.objects.create(
+                chef=chef,
+                title=f"Workshop {i}",
+                description="Cooking",
+                date=date(2024, 1, 1) + timedelta(days=i // 3),
+                time=time(10, 0),
+                max_capacity=10,
+                price=20.00,
+            )
+        self.expected = list(Workshop.objects.order_by(*ORDERING))
+        self.queryset = Workshop.objects.all()
+
+    def test_walk_forward_then_back(self):
+        pages = [paginate_by_cursor(self.queryset, ORDERING, 3)]
+        while pages[-1].has_next():
+            pages.append(
+                paginate_by_cursor(
+                    self.queryset, ORDERING, 3, cursor=pages[-1].next_cursor
+                )
+            )
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([w for page in pages for w in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+        previous = paginate_by_cursor(
+            self.queryset, ORDERING, 3, cursor=pages[-1].previous_cursor
+        )
+        self.assertEqual(list(previous), self.expected[3:6])
+        self.assertTrue(previous.has_next())
+
+    def test_last_page_cursor(self):
+        first = paginate_by_cursor(self.queryset, ORDERING, 3)
+        last = paginate_by_cursor(self.queryset, ORDERING, 3, cursor=first.last_cursor)
+        self.assertEqual(list(last), self.expected[-3:])
+        self.assertFalse(last.has_next())
+        self.assertTrue(last.has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        page = paginate_by_cursor(self.queryset, ORDERING, 3, cursor="not-a-cursor")
+        self.assertEqual(list(page), self.expected[:3])
+
+    def test_total_count_is_optional(self):
+        with self.assertNumQueries(1):
+            page = paginate_by_cursor(self.queryset, ORDERING, 3)
+        self.assertIsNone(page.total_count)
+        page = paginate_by_cursor(self.queryset, ORDERING, 3, count=True)
+        self.assertEqual(page.total_count, 7)
+
+    def test_customer_dashboard_follows_cursor(self):
+        customer = User.objects.create(
+            username="testuser",
+            email="testuser@example.com",
+            is_active=True,
+            role=User.CUSTOMER,
+        )
+        self.client.force_login(customer)
+        response = self.client.get(reverse("customerDashboard"))
+        page = response.context["page_obj"]
+        self.assertEqual(list(response.context["workshops"]), self.expected[:2])
+        response = self.client.get(
+            reverse("customerDashboard"), {"cursor": page.next_cursor}
+        )
+        self.assertEqual(list(response.context["workshops"]), self.expected[2:4])
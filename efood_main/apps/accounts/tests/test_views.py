@@ -1,3 +1,4 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.messages import get_messages
 from django.test import Client, TestCase
@@ -6,6 +7,8 @@ from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode
 
 from efood_main.apps.accounts.models import User, UserProfile
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.recipe.models import Category
 
 
 class LoginViewTests(TestCase):
@@ -275,3 +278,45 @@ class CustDashboardViewTestCase(TestCase):
     def tearDown(self):
         UserProfile.objects.all().delete()
         User.objects.all().delete()
+
+
+class ChefDashboardViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="chefuser",
+            first_name="jane",
+            last_name="doe",
+            email="chef@example.com",
+            is_active=True,
+            role=1,
+        )
+        self.chef = Chef.objects.create(
+            user=self.user,
+            user_profile=UserProfile.objects.get(user=self.user),
+            chef_name="Jane",
+        )
+        for name in ("Soups", "Salads"):
+            Category.objects.create(chef=self.chef, category_name=name, slug=name)
+        self.client.force_login(self.user)
+
+    def test_counters_come_from_the_chef_row(self):
+        Chef.objects.filter(pk=self.chef.pk).update(workshop_count=3)
+        # session, user, chef, recipe page, profile (sidebar)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("chefDashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["total_category_count"], 2)
+        self.assertEqual(response.context["total_recipe_items_count"], 0)
+        self.assertContains(response, '<h5 class="card-title">3</h5>', html=True)
+
+    async def test_served_under_asgi(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(reverse("chefDashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["total_category_count"], 2)
+
+    def test_customer_is_redirected_to_their_dashboard(self):
+        self.user.role = User.CUSTOMER
+        self.user.save()
+        response = self.client.get(reverse("chefDashboard"))
+        self.assertRedirects(response, reverse("customerDashboard"))
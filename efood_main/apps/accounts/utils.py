@@ -1,11 +1,16 @@
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.sites.shortcuts import get_current_site
-from django.core.mail import EmailMessage
+from django.http import Http404
 from django.template.loader import render_to_string
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
+from efood_main.apps.mailer.utils import enqueue_email
+
+from .models import UserProfile
+
 
 def send_verification_email(request, user, mail_subject, email_template):
     from_email = settings.DEFAULT_FROM_EMAIL
@@ -20,6 +25,40 @@ def send_verification_email(request, user, mail_subject, email_template):
         },
     )
     to_email = user.email
-    mail = EmailMessage(mail_subject, message, from_email, to=[to_email])
-    mail.content_subtype = "html"
-    mail.send()
+    # Queued for the outbox dispatcher so the request never waits on SMTP
+    enqueue_email(mail_subject, message, from_email, [to_email], content_subtype="html")
+
+
+async def aget_request_user(request):
+    """Load ``request.user`` off the event loop and return it.
+
+    AuthenticationMiddleware sets a lazy user that queries the database on
+    first access, which async code may not do (Django 4.2 has no
+    ``request.auser``). Once loaded here, later accesses are free.
+    """
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+def get_request_user_profile(request):
+    """Return the current user's profile, loading it at most once per request."""
+    if not hasattr(request, "_cached_user_profile"):
+        user = request.user
+        profile = None
+        if user.is_authenticated:
+            try:
+                profile = UserProfile.objects.get(user=user)
+            except UserProfile.DoesNotExist:
+                pass
+            else:
+                # Reuse the already loaded user instead of fetching it again
+                profile.user = user
+        request._cached_user_profile = profile
+    return request._cached_user_profile
+
+
+def get_request_user_profile_or_404(request):
+    profile = get_request_user_profile(request)
+    if profile is None:
+        raise Http404("No UserProfile matches the given query.")
+    return profile
@@ -1,9 +1,10 @@
+import asyncio
+
 from django.contrib import auth, messages
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.tokens import default_token_generator
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import Count
+from django.db import transaction
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.utils.encoding import force_str
@@ -11,12 +12,14 @@ from django.utils.http import urlsafe_base64_decode
 from django.views.generic import CreateView, ListView, TemplateView
 
 from efood_main.apps.chef.forms import ChefForm
-from efood_main.apps.recipe.models import Category, RecipeItem
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.recipe.models import RecipeItem
 from efood_main.apps.workshop.models import Workshop
+from efood_main.pagination import AsyncCursorPaginationMixin, apaginate_by_cursor
 
 from .forms import UserForm
 from .models import User, UserProfile
-from .utils import send_verification_email
+from .utils import aget_request_user, send_verification_email
 
 
 class RegisterActivationView(TemplateView):
@@ -27,6 +30,7 @@ class RegisterUserView(CreateView):
     form_class = UserForm
     template_name = "accounts/registerUser.html"
 
+    @transaction.atomic
     def form_valid(self, form):
         messages.success(
             self.request,
@@ -47,6 +51,7 @@ class RegisterChefView(CreateView):
     template_name = "accounts/registerChef.html"
     success_url = "registerChef"
 
+    @transaction.atomic
     def form_valid(self, form):
         user = form.save(commit=False)
         user.role = User.CHEF
@@ -209,6 +214,22 @@ class ResetPasswordView(TemplateView):
             return redirect("reset_password")
 
 
+class AsyncViewMixin:
+    """Lets the sync access mixins guard a view whose handlers are async.
+
+    Put it first in the bases: it loads ``request.user`` off the event loop
+    before LoginRequiredMixin and test_func() read it, then awaits the
+    handler (or returns their redirect) from an async ``dispatch``.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        await aget_request_user(request)
+        response = super().dispatch(request, *args, **kwargs)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+
 class ChefView(LoginRequiredMixin, UserPassesTestMixin):
     def test_func(self):
         return self.request.user.is_chef
@@ -229,49 +250,44 @@ class CustomerView(LoginRequiredMixin, UserPassesTestMixin):
         return super().handle_no_permission()
 
 
-class CustDashboardView(CustomerView, ListView):
+class CustDashboardView(
+    AsyncViewMixin, CustomerView, AsyncCursorPaginationMixin, ListView
+):
     model = Workshop
     template_name = "accounts/Customerdashboard.html"
     context_object_name = "workshops"
     paginate_by = 2
-
-    def get_queryset(self):
-        return super().get_queryset().order_by("-date")
+    cursor_ordering = ("-date", "-id")
 
 
-class ChefDashboardView(ChefView, TemplateView):
+class ChefDashboardView(AsyncViewMixin, ChefView, TemplateView):
     # model = Category
     template_name = "accounts/Chefdashboard.html"
 
     paginate_by = 2
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        chef = self.request.user.chef
-
-        # Add category counts to the context
-        category_counts = (
-            Category.objects.filter(chef=chef)
-            .values("category_name")
-            .annotate(count=Count("id"))
+    async def get(self, request, *args, **kwargs):
+        self.chef = await Chef.objects.aget(user=request.user)
+        # Cached so that the template's user.chef does not query it again
+        request.user.chef = self.chef
+        self.recipe_items_page = await apaginate_by_cursor(
+            RecipeItem.objects.filter(chef=self.chef),
+            ("created_at", "id"),
+            self.paginate_by,
+            cursor=request.GET.get("cursor"),
         )
-        total_category_count = sum(item["count"] for item in category_counts)
-        total_recipe_items_count = RecipeItem.objects.filter(chef=chef).count()
-
-        page = self.request.GET.get("page")
-        recipe_items = RecipeItem.objects.filter(chef=chef).order_by("created_at")
-        paginator = Paginator(recipe_items, self.paginate_by)
+        return self.render_to_response(self.get_context_data(**kwargs))
 
-        try:
-            recipe_items_page = paginator.page(page)
-        except PageNotAnInteger:
-            recipe_items_page = paginator.page(1)
-        except EmptyPage:
-            recipe_items_page = paginator.page(paginator.num_pages)
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        chef = self.chef
 
-        context["recipe_items_page"] = recipe_items_page
+        context["recipe_items_page"] = self.recipe_items_page
 
-        context["total_category_count"] = total_category_count
-        context["total_recipe_items_count"] = total_recipe_items_count
+        # Denormalized counters, maintained by chef.signals
+        context["total_category_count"] = chef.category_count
+        context["total_recipe_items_count"] = chef.recipe_count
+        context["workshop_count"] = chef.workshop_count
+        context["upcoming_booking_count"] = chef.upcoming_booking_count
 
         return context
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ChefConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "efood_main.apps.chef"
+
+    def ready(self):
+        import efood_main.apps.chef.signals  # noqa
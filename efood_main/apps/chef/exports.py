@@ -0,0 +1,184 @@
+"""Streaming CSV and JSON Lines exports of one chef's data, or everyone's.
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)``, which
+PostgreSQL serves from a server-side cursor, and encoded a batch of lines at
+a time, so memory stays flat however many rows a dataset has. ``aexport``
+is the same for ASGI, which would otherwise buffer a sync iterator whole.
+"""
+
+import csv
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.duration import duration_string
+
+from efood_main.apps.recipe.models import Category, RecipeItem
+from efood_main.apps.workshop.models import Workshop, WorkshopRegistration
+
+CHUNK_SIZE = 2000
+LINES_PER_WRITE = 500
+
+
+class Dataset:
+    def __init__(self, model, columns, chef_lookup):
+        self.model = model
+        # (column name, values_list lookup) pairs
+        self.columns = columns
+        self.chef_lookup = chef_lookup
+
+    @property
+    def names(self):
+        return [name for name, _ in self.columns]
+
+    def queryset(self, chef=None):
+        queryset = self.model._default_manager.all()
+        if chef is not None:
+            queryset = queryset.filter(**{self.chef_lookup: chef})
+        return queryset.order_by("pk").values_list(
+            *(lookup for _, lookup in self.columns)
+        )
+
+
+DATASETS = {
+    "categories": Dataset(
+        Category,
+        [
+            ("id", "id"),
+            ("chef", "chef_id"),
+            ("category_name", "category_name"),
+            ("slug", "slug"),
+            ("description", "description"),
+            ("created_at", "created_at"),
+            ("updated_at", "updated_at"),
+        ],
+        chef_lookup="chef",
+    ),
+    # The column names are the ones the recipe import reads back
+    "recipes": Dataset(
+        RecipeItem,
+        [
+            ("id", "id"),
+            ("chef", "chef_id"),
+            ("category", "category__category_name"),
+            ("recipe_title", "recipe_title"),
+            ("slug", "slug"),
+            ("recipe_ingredients", "recipe_ingredients"),
+            ("recipe_instructions", "recipe_instructions"),
+            ("preparation_time", "preparation_time"),
+            ("image", "image"),
+            ("external_link", "external_link"),
+            ("created_at", "created_at"),
+            ("updated_at", "updated_at"),
+        ],
+        chef_lookup="chef",
+    ),
+    "workshops": Dataset(
+        Workshop,
+        [
+            ("id", "id"),
+            ("chef", "chef_id"),
+            ("title", "title"),
+            ("description", "description"),
+            ("date", "date"),
+            ("time", "time"),
+            ("capacity", "max_capacity"),
+            ("seats_taken", "seats_taken"),
+            ("address", "address"),
+            ("latitude", "latitude"),
+            ("longitude", "longitude"),
+            ("price", "price"),
+            ("price_currency", "price_currency"),
+            ("contact_phone", "contact_phone"),
+            ("recipe", "recipe_id"),
+            ("created_at", "created_at"),
+            ("updated_at", "updated_at"),
+        ],
+        chef_lookup="chef",
+    ),
+    "registrations": Dataset(
+        WorkshopRegistration,
+        [
+            ("id", "id"),
+            ("workshop", "workshop_id"),
+            ("workshop_title", "workshop__title"),
+            ("workshop_date", "workshop__date"),
+            ("customer", "customer_id"),
+            ("customer_email", "customer__email"),
+            ("customer_first_name", "customer__first_name"),
+            ("customer_last_name", "customer__last_name"),
+            ("is_canceled", "is_canceled"),
+        ],
+        chef_lookup="workshop__chef",
+    ),
+}
+
+
+def _plain(value):
+    # The "hh:mm:ss" form that DurationFormField parses back
+    if isinstance(value, timedelta):
+        return duration_string(value)
+    return value
+
+
+class _Echo:
+    """A file-like object for csv.writer that hands back what is written."""
+
+    def write(self, value):
+        return value
+
+
+class CSVFormat:
+    content_type = "text/csv"
+
+    def __init__(self):
+        self.writer = csv.writer(_Echo())
+
+    def header(self, names):
+        return self.writer.writerow(names)
+
+    def line(self, names, row):
+        return self.writer.writerow(
+            ["" if value is None else _plain(value) for value in row]
+        )
+
+
+class JSONLinesFormat:
+    content_type = "application/x-ndjson"
+
+    def header(self, names):
+        return ""
+
+    def line(self, names, row):
+        record = dict(zip(names, map(_plain, row)))
+        return json.dumps(record, cls=DjangoJSONEncoder) + "\n"
+
+
+FORMATS = {"csv": CSVFormat, "jsonl": JSONLinesFormat}
+
+
+def export(name, fmt, chef=None, chunk_size=CHUNK_SIZE):
+    """Yield dataset ``name`` in format ``fmt``, a batch of lines at a time."""
+    dataset, formatter = DATASETS[name], FORMATS[fmt]()
+    names = dataset.names
+    header = formatter.header(names)
+    batch = [header] if header else []
+    for row in dataset.queryset(chef).iterator(chunk_size=chunk_size):
+        batch.append(formatter.line(names, row))
+        if len(batch) >= LINES_PER_WRITE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+async def aexport(name, fmt, chef=None, chunk_size=CHUNK_SIZE):
+    """Async ``export``, fetching each batch in the request's sync thread.
+
+    Django 4.2's ``values_list().aiterator()`` runs its query on the event
+    loop, so the sync generator is advanced through sync_to_async instead.
+    """
+    batches = export(name, fmt, chef, chunk_size)
+    while (batch := await sync_to_async(next)(batches, None)) is not None:
+        yield batch
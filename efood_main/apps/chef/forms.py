@@ -1,4 +1,5 @@
 from django import forms
+from django.core.validators import FileExtensionValidator
 from .models import Chef
 
 
@@ -10,3 +11,17 @@ class ChefForm(forms.ModelForm):
     class Meta:
         model = Chef
         fields = ["chef_name", "chef_license"]
+
+
+class RecipeImportUploadForm(forms.Form):
+    recipes = forms.FileField(
+        help_text="CSV or JSON Lines (.jsonl), with the columns of the recipe export.",
+        validators=[FileExtensionValidator(["csv", "jsonl", "ndjson"])],
+        widget=forms.FileInput(attrs={"class": "btn btn-info w-100"}),
+    )
+    images = forms.FileField(
+        required=False,
+        help_text="A zip of the images named in the image column.",
+        validators=[FileExtensionValidator(["zip"])],
+        widget=forms.FileInput(attrs={"class": "btn btn-info w-100"}),
+    )
@@ -0,0 +1,265 @@
+"""Bulk import of a chef's recipes from CSV or JSON Lines, plus a zip of images.
+
+Rows are validated with RecipeImportForm (RecipeItemForm's rules) and written
+``chunk_size`` at a time: the chunk's images are checked and stored by a
+thread pool, then its new categories and its recipes (one ``bulk_create``)
+go in one transaction; if it fails, the stored images are deleted. A bad row
+is reported with its line number and skipped, never failing the batch. As
+bulk_create sends no signals, the search vectors, page cache, image
+renditions, completion index and chef counters are refreshed here instead.
+
+The columns are those of the recipes export (see ``exports.py``); unknown
+columns such as ``id`` or ``created_at`` are ignored.
+"""
+
+import csv
+import io
+import json
+import posixpath
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils.text import slugify
+from PIL import Image, UnidentifiedImageError
+
+from efood_main.apps.recipe.cache import invalidate
+from efood_main.apps.recipe.completion import CATEGORIES, TITLES, record_changes
+from efood_main.apps.recipe.forms import RecipeImportForm
+from efood_main.apps.recipe.models import Category, RecipeItem
+from efood_main.apps.renditions.utils import schedule_renditions
+
+from .models import Chef
+
+CHUNK_SIZE = 500
+IMAGE_WORKERS = 4
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.categories_created = 0
+        # (line number, {field: [messages]}) of every skipped row
+        self.errors = []
+
+    def __repr__(self):
+        return (
+            f"<ImportResult created={self.created} "
+            f"categories_created={self.categories_created} errors={len(self.errors)}>"
+        )
+
+
+def read_rows(data, filename):
+    """Yield ``(line number, {column: text})`` from a binary CSV/JSONL file."""
+    text = io.TextIOWrapper(data, encoding="utf-8-sig", newline="")
+    if filename.lower().endswith(JSON_LINES_EXTENSIONS):
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                yield number, None
+                continue
+            yield number, {
+                key: "" if value is None else str(value)
+                for key, value in record.items()
+            }
+    else:
+        reader = csv.DictReader(text)
+        for row in reader:
+            # line_num is where the row ends; quoted fields may span lines
+            yield reader.line_num, {key: value or "" for key, value in row.items()}
+
+
+class ImageArchive:
+    """Images of a zip, looked up by path or by file name."""
+
+    def __init__(self, file):
+        self.zip = zipfile.ZipFile(file)
+        self.members = {}
+        for info in self.zip.infolist():
+            if not info.is_dir():
+                self.members[info.filename] = info
+                self.members.setdefault(posixpath.basename(info.filename), info)
+
+    def read(self, name):
+        info = self.members.get(name) or self.members.get(posixpath.basename(name))
+        if info is None:
+            raise LookupError(f"{name} is not in the image archive.")
+        if info.file_size > MAX_IMAGE_BYTES:
+            raise ValueError(f"{name} is larger than {MAX_IMAGE_BYTES // 2**20} MB.")
+        # ZipFile serializes reads of its shared file, so threads may share it
+        return self.zip.read(info)
+
+    def close(self):
+        self.zip.close()
+
+
+def store_image(archive, name):
+    """Check that ``name`` is a PNG or JPEG and save it as a recipe image."""
+    data = archive.read(name)
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+            image_format = image.format
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise ValueError(f"{name} is not a valid image.")
+    if image_format not in ("PNG", "JPEG"):
+        raise ValueError(f"{name} is not a valid image format")
+    field = RecipeItem._meta.get_field("image")
+    target = field.generate_filename(None, posixpath.basename(name))
+    return field.storage.save(target, ContentFile(data))
+
+
+class RecipeImporter:
+    def __init__(self, chef, images=None, chunk_size=CHUNK_SIZE, workers=IMAGE_WORKERS):
+        self.chef = chef
+        self.archive = ImageArchive(images) if images else None
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.categories = dict(
+            Category.objects.filter(chef=chef).values_list("category_name", "id")
+        )
+
+    def run(self, rows):
+        """Import ``(line number, row)`` pairs; return an ImportResult."""
+        result = ImportResult()
+        rows = iter(rows)
+        try:
+            with ThreadPoolExecutor(self.workers, "recipe-import") as pool:
+                while chunk := list(islice(rows, self.chunk_size)):
+                    self.import_chunk(chunk, pool, result)
+        finally:
+            if self.archive:
+                self.archive.close()
+        result.errors.sort(key=lambda error: error[0])
+        if result.created:
+            invalidate()
+        Chef.objects.filter(pk=self.chef.pk).refresh_counters()
+        return result
+
+    def import_chunk(self, chunk, pool, result):
+        valid = []
+        for number, row in chunk:
+            if row is None:
+                result.errors.append((number, {"__all__": ["Not a JSON object."]}))
+                continue
+            form = RecipeImportForm(row)
+            if form.is_valid():
+                valid.append((number, form.cleaned_data))
+            else:
+                result.errors.append(
+                    (
+                        number,
+                        {field: list(errors) for field, errors in form.errors.items()},
+                    )
+                )
+        images, failed = self.store_images(valid, pool, result)
+        valid = [(number, data) for number, data in valid if number not in failed]
+        if not valid:
+            return
+        categories = dict(self.categories)
+        try:
+            with transaction.atomic():
+                created = self.resolve_categories(
+                    {data["category"] for _, data in valid}
+                )
+                transaction.on_commit(
+                    partial(record_changes, [(CATEGORIES, name) for name in created])
+                )
+                recipes = self.build_recipes(valid, images)
+                RecipeItem.objects.bulk_create(recipes)
+                RecipeItem.objects.filter(
+                    pk__in=[recipe.pk for recipe in recipes]
+                ).update_search_vector()
+                for recipe in recipes:
+                    schedule_renditions(recipe.image, ["thumb"])
+                transaction.on_commit(
+                    partial(
+                        record_changes,
+                        [(TITLES, recipe.recipe_title) for recipe in recipes],
+                    )
+                )
+        except BaseException:
+            # Nothing of the chunk was saved: forget its categories, drop its files
+            self.categories = categories
+            storage = RecipeItem._meta.get_field("image").storage
+            for name in images.values():
+                storage.delete(name)
+            raise
+        result.categories_created += len(created)
+        result.created += len(recipes)
+
+    def build_recipes(self, valid, images):
+        return [
+            RecipeItem(
+                chef=self.chef,
+                category_id=self.categories[data["category"]],
+                recipe_title=data["recipe_title"],
+                slug=slugify(data["recipe_title"]),
+                recipe_ingredients=data["recipe_ingredients"],
+                recipe_instructions=data["recipe_instructions"],
+                preparation_time=data["preparation_time"],
+                external_link=data["external_link"],
+                image=images.get(number, ""),
+            )
+            for number, data in valid
+        ]
+
+    def store_images(self, valid, pool, result):
+        """Store the chunk's images in parallel.
+
+        Return ``{line number: stored name}`` and the line numbers of rows
+        whose image could not be stored, which are reported as errors.
+        """
+        wanted = [(number, data["image"]) for number, data in valid if data["image"]]
+        if wanted and self.archive is None:
+            for number, _ in wanted:
+                result.errors.append(
+                    (number, {"image": ["No image archive was uploaded."]})
+                )
+            return {}, {number for number, _ in wanted}
+
+        def store(name):
+            try:
+                return store_image(self.archive, name), None
+            except (LookupError, ValueError, zipfile.BadZipFile) as exc:
+                return None, str(exc)
+
+        stored, failed = {}, set()
+        outcomes = pool.map(store, [name for _, name in wanted])
+        for (number, _), (name, error) in zip(wanted, outcomes):
+            if error:
+                result.errors.append((number, {"image": [error]}))
+                failed.add(number)
+            else:
+                stored[number] = name
+        return stored, failed
+
+    def resolve_categories(self, names):
+        """Create the chef's missing categories; return the created names."""
+        missing = names - set(self.categories)
+        if not missing:
+            return []
+        Category.objects.bulk_create(
+            [
+                Category(chef=self.chef, category_name=name, slug=slugify(name))
+                for name in missing
+            ],
+            # Another import may have just created one of them
+            ignore_conflicts=True,
+        )
+        self.categories.update(
+            Category.objects.filter(
+                chef=self.chef, category_name__in=missing
+            ).values_list("category_name", "id")
+        )
+        return [name for name in missing if name in self.categories]
@@ -0,0 +1,45 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from efood_main.apps.chef.exports import CHUNK_SIZE, DATASETS, FORMATS, export
+from efood_main.apps.chef.models import Chef
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream datasets to <output-dir>/<dataset>.<format> in constant memory, "
+        "e.g. for nightly dumps."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "datasets", nargs="*", help=f"Default: all of {', '.join(DATASETS)}."
+        )
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument("--output-dir", default=".")
+        parser.add_argument("--chef", type=int, help="Only this chef's rows.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        unknown = set(options["datasets"]) - set(DATASETS)
+        if unknown:
+            raise CommandError(f"Unknown datasets: {', '.join(sorted(unknown))}")
+        chef = None
+        if options["chef"] is not None:
+            try:
+                chef = Chef.objects.get(pk=options["chef"])
+            except Chef.DoesNotExist:
+                raise CommandError(f"No chef with id {options['chef']}.")
+        fmt = options["format"]
+        os.makedirs(options["output_dir"], exist_ok=True)
+
+        for name in options["datasets"] or DATASETS:
+            path = os.path.join(options["output_dir"], f"{name}.{fmt}")
+            # Written aside and renamed, so a dump is never seen half written
+            partial = f"{path}.partial"
+            with open(partial, "w", encoding="utf-8", newline="") as f:
+                for chunk in export(name, fmt, chef, options["chunk_size"]):
+                    f.write(chunk)
+            os.replace(partial, path)
+            self.stdout.write(f"Wrote {path}")
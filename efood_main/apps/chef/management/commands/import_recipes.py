@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from efood_main.apps.chef.imports import (
+    CHUNK_SIZE,
+    IMAGE_WORKERS,
+    RecipeImporter,
+    read_rows,
+)
+from efood_main.apps.chef.models import Chef
+
+
+class Command(BaseCommand):
+    help = "Bulk import a chef's recipes from CSV or JSON Lines and a zip of images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("chef_id", type=int)
+        parser.add_argument("recipes", help="A .csv or .jsonl file.")
+        parser.add_argument("--images", help="A zip of the images named in the rows.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            "--workers", type=int, default=IMAGE_WORKERS, help="Image threads."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            chef = Chef.objects.get(pk=options["chef_id"])
+        except Chef.DoesNotExist:
+            raise CommandError(f"No chef with id {options['chef_id']}.")
+
+        images = open(options["images"], "rb") if options["images"] else None
+        try:
+            with open(options["recipes"], "rb") as data:
+                result = RecipeImporter(
+                    chef,
+                    images=images,
+                    chunk_size=options["chunk_size"],
+                    workers=options["workers"],
+                ).run(read_rows(data, options["recipes"]))
+        finally:
+            if images:
+                images.close()
+
+        for line, errors in result.errors:
+            for field, messages in errors.items():
+                for message in messages:
+                    self.stderr.write(f"line {line}: {field}: {message}")
+        self.stdout.write(
+            f"Imported {result.created} recipes, created {result.categories_created} "
+            f"categories, skipped {len(result.errors)} rows."
+        )
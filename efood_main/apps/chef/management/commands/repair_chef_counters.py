@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from efood_main.apps.chef.models import Chef
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the denormalized chef counters. Run it daily so bookings of "
+        "past workshops stop counting as upcoming, and after bulk imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("chef_ids", nargs="*", type=int, help="Only these chefs.")
+
+    def handle(self, *args, **options):
+        chefs = Chef.objects.all()
+        if options["chef_ids"]:
+            chefs = chefs.filter(pk__in=options["chef_ids"])
+        updated = chefs.refresh_counters()
+        self.stdout.write(f"Refreshed the counters of {updated} chef(s).")
@@ -0,0 +1,69 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def count_per_chef(queryset, chef_lookup="chef"):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{chef_lookup: OuterRef("pk")})
+            .order_by()
+            .values(chef_lookup)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    Chef = apps.get_model("chef", "Chef")
+    Category = apps.get_model("recipe", "Category")
+    RecipeItem = apps.get_model("recipe", "RecipeItem")
+    Workshop = apps.get_model("workshop", "Workshop")
+    WorkshopRegistration = apps.get_model("workshop", "WorkshopRegistration")
+    Chef.objects.update(
+        category_count=count_per_chef(Category.objects.all()),
+        recipe_count=count_per_chef(RecipeItem.objects.all()),
+        workshop_count=count_per_chef(Workshop.objects.all()),
+        upcoming_booking_count=count_per_chef(
+            WorkshopRegistration.objects.filter(
+                is_canceled=False, workshop__date__gte=timezone.localdate()
+            ),
+            "workshop__chef",
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chef", "0002_alter_chef_user"),
+        ("recipe", "0008_recipeitem_search_vector"),
+        ("workshop", "0003_workshop_coordinates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chef",
+            name="category_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="chef",
+            name="recipe_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="chef",
+            name="workshop_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="chef",
+            name="upcoming_booking_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,51 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from efood_main.apps.accounts.models import User, UserProfile
 
 
+def count_per_chef(queryset, chef_lookup="chef"):
+    """Subquery counting the rows of ``queryset`` that belong to each chef."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{chef_lookup: OuterRef("pk")})
+            .order_by()
+            .values(chef_lookup)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def counter_values(category, recipe_item, workshop, registration):
+    """Expressions recomputing every counter, given the four model classes."""
+    return {
+        "category_count": count_per_chef(category.objects.all()),
+        "recipe_count": count_per_chef(recipe_item.objects.all()),
+        "workshop_count": count_per_chef(workshop.objects.all()),
+        "upcoming_booking_count": count_per_chef(
+            registration.objects.filter(
+                is_canceled=False, workshop__date__gte=timezone.localdate()
+            ),
+            "workshop__chef",
+        ),
+    }
+
+
+class ChefQuerySet(models.QuerySet):
+    def refresh_counters(self):
+        """Recount the denormalized counters of the selected chefs in SQL."""
+        from efood_main.apps.recipe.models import Category, RecipeItem
+        from efood_main.apps.workshop.models import Workshop, WorkshopRegistration
+
+        return self.update(
+            **counter_values(Category, RecipeItem, Workshop, WorkshopRegistration)
+        )
+
+
 class Chef(models.Model):
     user = models.OneToOneField(User, related_name="chef", on_delete=models.CASCADE)
     user_profile = models.OneToOneField(
@@ -13,6 +56,13 @@ class Chef(models.Model):
     is_approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     modified_at = models.DateTimeField(auto_now=True)
+    # Maintained by chef.signals; repair with manage.py repair_chef_counters
+    category_count = models.PositiveIntegerField(default=0, editable=False)
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+    workshop_count = models.PositiveIntegerField(default=0, editable=False)
+    upcoming_booking_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ChefQuerySet.as_manager()
 
     def __str__(self):
         return self.chef_name
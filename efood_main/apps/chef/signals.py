@@ -0,0 +1,80 @@
+"""Keep the Chef counters in step with the rows they count.
+
+Each insert or delete moves one counter by one with an ``UPDATE ... SET
+count = count +/- 1``, so concurrent requests never overwrite each other.
+Rows deleted because their chef is being deleted are skipped. A workshop
+edit can move its bookings in or out of "upcoming", so it recounts that
+chef. Bulk inserts bypass these signals; run ``repair_chef_counters``
+after them.
+"""
+
+from django.db.models import F, QuerySet
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from efood_main.apps.accounts.models import User
+from efood_main.apps.recipe.models import Category, RecipeItem
+from efood_main.apps.workshop.models import Workshop, WorkshopRegistration
+
+from .models import Chef
+
+COUNTERS = {
+    Category: "category_count",
+    RecipeItem: "recipe_count",
+    Workshop: "workshop_count",
+}
+
+
+def _adjust(chefs, counter, delta):
+    chefs.update(**{counter: Greatest(F(counter) + delta, 0)})
+
+
+def _deleting_chef(origin):
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, (Chef, User))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=RecipeItem)
+@receiver(post_save, sender=Workshop)
+def post_save_count(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        _adjust(Chef.objects.filter(pk=instance.chef_id), COUNTERS[sender], 1)
+    elif sender is Workshop:
+        Chef.objects.filter(pk=instance.chef_id).refresh_counters()
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=RecipeItem)
+@receiver(post_delete, sender=Workshop)
+def post_delete_count(sender, instance, origin=None, **kwargs):
+    if not _deleting_chef(origin):
+        _adjust(Chef.objects.filter(pk=instance.chef_id), COUNTERS[sender], -1)
+
+
+def _upcoming_workshop_chef(registration):
+    return Chef.objects.filter(
+        workshops__pk=registration.workshop_id,
+        workshops__date__gte=timezone.localdate(),
+    )
+
+
+@receiver(post_save, sender=WorkshopRegistration)
+def post_save_registration_count(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        if not instance.is_canceled:
+            _adjust(_upcoming_workshop_chef(instance), "upcoming_booking_count", 1)
+    else:
+        Chef.objects.filter(workshops__pk=instance.workshop_id).refresh_counters()
+
+
+@receiver(post_delete, sender=WorkshopRegistration)
+def post_delete_registration_count(sender, instance, **kwargs):
+    if not instance.is_canceled:
+        _adjust(_upcoming_workshop_chef(instance), "upcoming_booking_count", -1)
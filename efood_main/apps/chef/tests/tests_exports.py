@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from efood_main.apps.accounts.models import User, UserProfile
+from efood_main.apps.chef import exports
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.recipe.models import Category, RecipeItem
+from efood_main.apps.workshop.models import Workshop, WorkshopRegistration
+
+from .tests_views import BaseTest
+
+
+class ExportTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(
+            chef=self.chef, category_name="Soups", slug="soups"
+        )
+        for n in range(3):
+            RecipeItem.objects.create(
+                chef=self.chef,
+                category=self.category,
+                recipe_title=f"Soup {n}",
+                slug=f"soup-{n}",
+                recipe_ingredients="Water, salt",
+                recipe_instructions="Boil, then stir.\nServe hot.",
+                preparation_time=timedelta(minutes=40),
+            )
+        self.workshop = Workshop.objects.create(
+            chef=self.chef,
+            title="Soup workshop",
+            description="Soups",
+            date=date(2030, 1, 1),
+            time=time(10),
+            max_capacity=5,
+            price=20,
+        )
+        customer = User.objects.create(
+            username="customer", email="customer@example.com", role=User.CUSTOMER
+        )
+        WorkshopRegistration.objects.create(customer=customer, workshop=self.workshop)
+
+        other_user = User.objects.create(
+            username="other", email="other@example.com", role=User.CHEF
+        )
+        other = Chef.objects.create(
+            user=other_user,
+            user_profile=UserProfile.objects.get(user=other_user),
+            chef_name="Other",
+        )
+        other_category = Category.objects.create(
+            chef=other, category_name="Other", slug="other"
+        )
+        RecipeItem.objects.create(
+            chef=other,
+            category=other_category,
+            recipe_title="Not mine",
+            slug="not-mine",
+            recipe_ingredients="-",
+            recipe_instructions="-",
+            preparation_time=timedelta(minutes=5),
+        )
+
+    def download(self, dataset, fmt):
+        response = self.client.get(
+            reverse("chef_export", kwargs={"dataset": dataset, "fmt": fmt})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export_of_own_recipes(self):
+        rows = list(csv.DictReader(io.StringIO(self.download("recipes", "csv"))))
+        self.assertEqual(
+            [row["recipe_title"] for row in rows], [f"Soup {n}" for n in range(3)]
+        )
+        self.assertEqual(rows[0]["category"], "Soups")
+        self.assertEqual(rows[0]["preparation_time"], "00:40:00")
+        self.assertEqual(rows[0]["recipe_instructions"], "Boil, then stir.\nServe hot.")
+
+    def test_jsonl_export_of_bookings(self):
+        lines = self.download("registrations", "jsonl").splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record["customer_email"], "customer@example.com")
+        self.assertEqual(record["workshop_date"], "2030-01-01")
+        self.assertFalse(record["is_canceled"])
+
+    def test_unknown_dataset_is_404(self):
+        response = self.client.get(
+            reverse("chef_export", kwargs={"dataset": "users", "fmt": "csv"})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_lines_are_written_in_batches(self):
+        with mock.patch.object(exports, "LINES_PER_WRITE", 2):
+            chunks = list(exports.export("recipes", "jsonl", chunk_size=2))
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [2, 2])
+
+    async def test_streamed_asynchronously_under_asgi(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(
+            reverse("chef_export", kwargs={"dataset": "workshops", "fmt": "csv"})
+        )
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertIn(b"Soup workshop", content)
+
+    def test_command_dumps_every_dataset(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            call_command("export_data", output_dir=tmp, stdout=StringIO())
+            self.assertEqual(
+                sorted(os.listdir(tmp)),
+                ["categories.csv", "recipes.csv", "registrations.csv", "workshops.csv"],
+            )
+            with open(os.path.join(tmp, "recipes.csv"), newline="") as f:
+                self.assertEqual(len(list(csv.DictReader(f))), 4)
+
+            call_command(
+                "export_data",
+                "recipes",
+                chef=self.chef.pk,
+                format="jsonl",
+                output_dir=tmp,
+                stdout=StringIO(),
+            )
+            with open(os.path.join(tmp, "recipes.jsonl")) as f:
+                self.assertEqual(len(f.readlines()), 3)
+
+    def test_command_rejects_unknown_dataset(self):
+        with self.assertRaises(CommandError):
+            call_command("export_data", "users", stdout=StringIO())
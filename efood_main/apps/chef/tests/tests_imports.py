@@ -0,0 +1,168 @@
+import io
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+
+from efood_main.apps.accounts.models import User, UserProfile
+from efood_main.apps.chef.exports import export
+from efood_main.apps.chef.imports import RecipeImporter, read_rows
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.recipe.completion import CATEGORIES, TITLES, completion_index
+from efood_main.apps.recipe.models import Category, RecipeItem
+
+from .tests_views import BaseTest
+
+HEADER = (
+    "category,recipe_title,recipe_ingredients,recipe_instructions,"
+    "preparation_time,external_link,image\n"
+)
+
+
+def png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def archive(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+class RecipeImportTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.enterContext(override_settings(MEDIA_ROOT=self.media.name))
+        self.addCleanup(self.media.cleanup)
+        Category.objects.create(chef=self.chef, category_name="Soups", slug="soups")
+
+    def run_import(self, text, images=None, filename="recipes.csv", **kwargs):
+        rows = read_rows(io.BytesIO(text.encode()), filename)
+        return RecipeImporter(self.chef, images=images, **kwargs).run(rows)
+
+    def test_valid_rows_are_imported_and_bad_ones_reported(self):
+        text = HEADER + (
+            "soups,Tomato soup,Tomatoes,Simmer,00:30:00,,photos/tomato.png\n"
+            "Desserts,Tart,Apples,Bake,01:00:00,https://example.com/tart,\n"
+            "Soups,Broth,Bones,Boil,not a time,,\n"
+            'Soups,"Pea soup","Peas","Boil,\nthen blend",00:20:00,,missing.png\n'
+            "Soups,Leek soup,Leeks,Boil,00:20:00,,fake.jpg\n"
+            "Soups,Onion soup,Onions,Boil,00:20:00,,onion.gif\n"
+        )
+        images = archive({"photos/tomato.png": png(), "fake.jpg": b"not an image"})
+        result = self.run_import(text, images=images, chunk_size=2)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.categories_created, 1)
+        self.assertEqual(
+            [(line, list(errors)) for line, errors in result.errors],
+            [(4, ["preparation_time"]), (6, ["image"]), (7, ["image"]), (8, ["image"])],
+        )
+
+        soup = RecipeItem.objects.get(recipe_title="Tomato soup")
+        self.assertEqual(soup.category.category_name, "Soups")
+        self.assertEqual(soup.slug, "tomato-soup")
+        self.assertEqual(soup.preparation_time, timedelta(minutes=30))
+        self.assertTrue(soup.image.name.startswith("recipe_images/tomato"))
+        self.assertTrue(soup.image.storage.exists(soup.image.name))
+        self.assertIsNotNone(soup.search_vector)
+        self.assertTrue(RecipeItem.objects.search("tart").exists())
+
+        self.chef.refresh_from_db()
+        self.assertEqual((self.chef.category_count, self.chef.recipe_count), (2, 2))
+
+    def test_completion_index_learns_imported_titles(self):
+        cache.clear()
+        completion_index.build()
+        text = HEADER + "Salads,Tuna salad,Tuna,Toss,00:10:00,,\n"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_import(text)
+        completion_index.sync()
+        self.assertEqual(completion_index.complete(TITLES, "tuna", 5), ["Tuna salad"])
+        self.assertEqual(completion_index.complete(CATEGORIES, "sa", 5), ["Salads"])
+
+    def test_failed_chunk_leaves_no_categories_or_files(self):
+        text = HEADER + "Salads,Tuna salad,Tuna,Toss,00:10:00,,tuna.png\n"
+        importer = RecipeImporter(self.chef, images=archive({"tuna.png": png()}))
+        with mock.patch.object(
+            RecipeItem.objects, "bulk_create", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                importer.run(read_rows(io.BytesIO(text.encode()), "recipes.csv"))
+        self.assertFalse(Category.objects.filter(category_name="Salads").exists())
+        self.assertNotIn("Salads", importer.categories)
+        self.assertEqual(
+            [files for _, _, files in os.walk(self.media.name) if files], []
+        )
+
+    def test_images_need_an_archive(self):
+        result = self.run_import(HEADER + "Soups,Soup,Water,Boil,00:10:00,,a.png\n")
+        self.assertEqual(result.created, 0)
+        self.assertEqual(list(result.errors[0][1]), ["image"])
+
+    def test_json_lines(self):
+        text = (
+            '{"category": "Soups", "recipe_title": "Soup", "recipe_ingredients": "x",'
+            ' "recipe_instructions": "y", "preparation_time": "00:10:00"}\n'
+            "\n"
+            "not json\n"
+        )
+        result = self.run_import(text, filename="recipes.jsonl")
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _ in result.errors], [3])
+
+    def test_export_can_be_imported_by_another_chef(self):
+        self.run_import(HEADER + "Soups,Soup,Water,Boil,00:10:00,,\n")
+        exported = "".join(export("recipes", "csv", chef=self.chef))
+        user = User.objects.create(username="copy", email="copy@example.com", role=1)
+        other = Chef.objects.create(
+            user=user, user_profile=UserProfile.objects.get(user=user), chef_name="Copy"
+        )
+        rows = read_rows(io.BytesIO(exported.encode()), "recipes.csv")
+        result = RecipeImporter(other).run(rows)
+        self.assertEqual((result.created, result.errors), (1, []))
+        self.assertTrue(RecipeItem.objects.filter(chef=other, recipe_title="Soup"))
+
+    def test_upload_view(self):
+        response = self.client.post(
+            reverse("import_recipes"),
+            {
+                "recipes": SimpleUploadedFile(
+                    "recipes.csv",
+                    (
+                        HEADER + "Soups,Soup,Water,Boil,00:10:00,,soup.png\n,,,,,,\n"
+                    ).encode(),
+                ),
+                "images": SimpleUploadedFile(
+                    "images.zip", archive({"soup.png": png()}).read()
+                ),
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["result"].created, 1)
+        self.assertContains(response, "Skipped rows")
+        self.assertTrue(RecipeItem.objects.get(recipe_title="Soup").image)
+
+    def test_command(self):
+        path = os.path.join(self.media.name, "recipes.csv")
+        with open(path, "w") as f:
+            f.write(HEADER + "Soups,Soup,Water,Boil,00:10:00,,\n")
+        stdout = StringIO()
+        call_command("import_recipes", self.chef.pk, path, stdout=stdout)
+        self.assertIn("Imported 1 recipes", stdout.getvalue())
@@ -1,10 +1,27 @@
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+from io import StringIO
+
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 
 from efood_main.apps.accounts.models import User, UserProfile
 from efood_main.apps.chef.models import Chef
+from efood_main.apps.recipe.models import Category, RecipeItem
+from efood_main.apps.workshop.models import Workshop, WorkshopRegistration
+from efood_main.apps.workshop.services import book_workshop, cancel_booking
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
 
 
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class ChefModelTest(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -35,3 +52,94 @@ class ChefModelTest(TestCase):
     def test_chef_creation(self):
         self.assertTrue(isinstance(self.chef, Chef))
         self.assertEqual(self.chef.chef_name, "Chef John")
+
+
+class ChefCountersTest(TestCase):
+    def setUp(self):
+        user = User.objects.create(
+            first_name="Chef",
+            last_name="Test",
+            username="cheftest",
+            email="cheftest@example.com",
+            role=User.CHEF,
+        )
+        self.chef = Chef.objects.create(
+            user=user,
+            user_profile=UserProfile.objects.get(user=user),
+            chef_name="TestChef",
+        )
+        self.customer = User.objects.create(
+            first_name="Test",
+            last_name="User",
+            username="testuser",
+            email="testuser@example.com",
+            role=User.CUSTOMER,
+        )
+
+    def counters(self):
+        self.chef.refresh_from_db()
+        return (
+            self.chef.category_count,
+            self.chef.recipe_count,
+            self.chef.workshop_count,
+            self.chef.upcoming_booking_count,
+        )
+
+    def create_workshop(self, day, recipe=None):
+        return Workshop.objects.create(
+            chef=self.chef,
+            title="Workshop",
+            description="Cooking",
+            date=day,
+            time=time(10, 0),
+            max_capacity=5,
+            price=20.00,
+            recipe=recipe,
+        )
+
+    def test_counters_follow_creates_and_deletes(self):
+        category = Category.objects.create(
+            chef=self.chef, category_name="Soups", slug="soups"
+        )
+        recipe = RecipeItem.objects.create(
+            chef=self.chef,
+            category=category,
+            recipe_title="Tomato soup",
+            slug="tomato-soup",
+            recipe_ingredients="Tomatoes",
+            recipe_instructions="Cook",
+            preparation_time=timedelta(minutes=30),
+        )
+        workshop = self.create_workshop(date.today(), recipe=recipe)
+        self.create_workshop(date.today() - timedelta(days=1))
+        self.assertEqual(self.counters(), (1, 1, 2, 0))
+
+        book_workshop(self.customer, workshop)
+        self.assertEqual(self.counters(), (1, 1, 2, 1))
+        cancel_booking(self.customer, workshop)
+        self.assertEqual(self.counters(), (1, 1, 2, 0))
+
+        book_workshop(self.customer, workshop)
+        # Deleting the category cascades to the recipe, workshop and booking
+        category.delete()
+        self.assertEqual(self.counters(), (0, 0, 1, 0))
+
+    def test_bookings_of_past_workshops_are_not_upcoming(self):
+        workshop = self.create_workshop(date.today() - timedelta(days=1))
+        WorkshopRegistration.objects.create(customer=self.customer, workshop=workshop)
+        self.assertEqual(self.counters()[3], 0)
+
+        workshop.date = date.today() + timedelta(days=7)
+        workshop.save()
+        self.assertEqual(self.counters()[3], 1)
+
+    def test_repair_command_recounts(self):
+        self.create_workshop(date.today())
+        Chef.objects.update(workshop_count=42, recipe_count=7)
+        call_command("repair_chef_counters", stdout=StringIO())
+        self.assertEqual(self.counters(), (0, 0, 1, 0))
+
+    def test_deleting_the_chef(self):
+        self.create_workshop(date.today())
+        self.chef.user.delete()
+        self.assertFalse(Chef.objects.exists())
@@ -1,8 +1,10 @@
+import shutil
+import tempfile
 from datetime import timedelta
 
 from django.contrib.messages import get_messages
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils.text import slugify
 
@@ -11,6 +13,14 @@ from efood_main.apps.chef.models import Chef
 from efood_main.apps.recipe.models import Category, RecipeItem
 
 
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class BaseTest(TestCase):
     def setUp(self):
         self.user = User.objects.create(
@@ -32,6 +32,11 @@ urlpatterns = [
     path(
         "recipe-builder/recipe/add/", views.AddRecipeView.as_view(), name="add_recipe"
     ),
+    path(
+        "recipe-builder/recipe/import/",
+        views.ImportRecipesView.as_view(),
+        name="import_recipes",
+    ),
     path(
         "recipe-builder/recipe/edit/<int:pk>/",
         views.EditRecipeView.as_view(),
@@ -73,4 +78,9 @@ urlpatterns = [
         views.WorkshopDetailView.as_view(),
         name="workshop_detail",
     ),
+    path(
+        "export/<slug:dataset>.<slug:fmt>",
+        views.ChefExportView.as_view(),
+        name="chef_export",
+    ),
 ]
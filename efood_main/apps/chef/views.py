@@ -2,20 +2,27 @@ from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
 from django.utils.text import slugify
-from django.views.generic import DetailView, ListView, TemplateView
-from django.views.generic.edit import CreateView, DeleteView, UpdateView
+from django.views.generic import DetailView, ListView, TemplateView, View
+from django.views.generic.edit import CreateView, DeleteView, FormView, UpdateView
 
 from efood_main.apps.accounts.forms import UserProfileForm
-from efood_main.apps.accounts.models import UserProfile
+from efood_main.apps.accounts.utils import get_request_user_profile_or_404
 from efood_main.apps.recipe.forms import CategoryForm, RecipeItemForm
 from efood_main.apps.recipe.models import Category, RecipeItem
-from efood_main.apps.workshop.forms import WorkshopItemForm
+from efood_main.apps.workshop.forms import SEATS_TAKEN_ERROR, WorkshopItemForm
 from efood_main.apps.workshop.models import Workshop
+from efood_main.apps.workshop.services import promote_waitlist
+from efood_main.pagination import CursorPaginationMixin
 
-from .forms import ChefForm
+from .exports import DATASETS, FORMATS, aexport, export
+from .forms import ChefForm, RecipeImportUploadForm
+from .imports import RecipeImporter, read_rows
 from .models import Chef
 
 
@@ -34,7 +41,7 @@ class ChefProfileView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Fetch UserProfile and Chef objects or return a 404 response
-        profile = get_object_or_404(UserProfile, user=self.request.user)
+        profile = get_request_user_profile_or_404(self.request)
         chef = get_object_or_404(Chef, user=self.request.user)
         # Create a combined form with both UserProfileForm and ChefForm
         combined_form = self.get_combined_form(profile, chef)
@@ -61,7 +68,7 @@ class ChefProfileView(LoginRequiredMixin, TemplateView):
         return redirect("chef")
 
     def post(self, request, *args, **kwargs):
-        profile = get_object_or_404(UserProfile, user=request.user)
+        profile = get_request_user_profile_or_404(request)
         chef = get_object_or_404(Chef, user=request.user)
 
         profile_form = UserProfileForm(request.POST, request.FILES, instance=profile)
@@ -164,6 +171,24 @@ class AddRecipeView(ChefViewMixin, SuccessMessageMixin, CreateView):
         return kwargs
 
 
+class ImportRecipesView(ChefViewMixin, FormView):
+    form_class = RecipeImportUploadForm
+    template_name = "chef/import_recipes.html"
+
+    def form_valid(self, form):
+        upload = form.cleaned_data["recipes"]
+        result = RecipeImporter(self.chef, images=form.cleaned_data["images"]).run(
+            read_rows(upload, upload.name)
+        )
+        if result.created:
+            messages.success(self.request, f"{result.created} recipes imported.")
+        if result.errors:
+            messages.warning(
+                self.request, f"{len(result.errors)} rows were skipped, see below."
+            )
+        return self.render_to_response(self.get_context_data(form=form, result=result))
+
+
 class EditRecipeView(ChefViewMixin, SuccessMessageMixin, UpdateView):
     model = RecipeItem
     form_class = RecipeItemForm
@@ -213,10 +238,12 @@ class RecipeDetailView(ChefViewMixin, DetailView):
 
 
 # Workshop CRUD
-class ChefWorkshopBuilder(ChefViewMixin, ListView):
+class ChefWorkshopBuilder(ChefViewMixin, CursorPaginationMixin, ListView):
     model = Workshop
     template_name = "workshop/workshop_builder.html"
     context_object_name = "workshops"
+    paginate_by = 10
+    cursor_ordering = ("-date", "-id")
 
     def get_queryset(self):
         return Workshop.objects.filter(chef=self.chef)
@@ -252,7 +279,19 @@ class EditWorkshopView(ChefViewMixin, SuccessMessageMixin, UpdateView):
     def form_valid(self, form):
         workshop = form.save(commit=False)
         workshop.chef = self.chef
-        return super().form_valid(form)
+        try:
+            with transaction.atomic():
+                response = super().form_valid(form)
+                # Seats added by the edit go to the waitlist first
+                promote_waitlist(self.object)
+        except IntegrityError:
+            # Seats were taken since the form was validated
+            seats = Workshop.objects.values_list("seats_taken", flat=True).get(
+                pk=workshop.pk
+            )
+            form.add_error("max_capacity", SEATS_TAKEN_ERROR % {"seats": seats})
+            return self.form_invalid(form)
+        return response
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -275,3 +314,19 @@ class WorkshopDetailView(ChefViewMixin, DetailView):
 
     def get_object(self, queryset=None):
         return get_object_or_404(Workshop, id=self.kwargs["id"], chef=self.chef)
+
+
+class ChefExportView(ChefViewMixin, View):
+    """Download one of the chef's datasets as CSV or JSON Lines."""
+
+    def get(self, request, dataset, fmt):
+        if dataset not in DATASETS or fmt not in FORMATS:
+            raise Http404("No such export.")
+        # ASGI buffers sync iterators whole, so give it an async one
+        stream = export if isinstance(request, WSGIRequest) else aexport
+        response = StreamingHttpResponse(
+            stream(dataset, fmt, chef=self.chef),
+            content_type=f"{FORMATS[fmt].content_type}; charset=utf-8",
+        )
+        response["Content-Disposition"] = f'attachment; filename="{dataset}.{fmt}"'
+        return response
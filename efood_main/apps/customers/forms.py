@@ -0,0 +1,18 @@
+from django import forms
+
+
+class NearbyWorkshopsForm(forms.Form):
+    """Query string of NearbyWorkshopsView."""
+
+    lat = forms.FloatField(min_value=-90, max_value=90)
+    lng = forms.FloatField(min_value=-180, max_value=180)
+    radius = forms.FloatField(required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    limit = forms.IntegerField(required=False)
+
+    def clean_radius(self):
+        radius = self.cleaned_data["radius"]
+        if radius is not None and radius <= 0:
+            raise forms.ValidationError("Ensure this value is greater than 0.")
+        return radius
@@ -0,0 +1,95 @@
+"""Idempotency keys for the customers' booking POSTs.
+
+Forms carry a key generated when they are rendered (``{% idempotency_key %}``)
+and API clients can send an ``Idempotency-Key`` header instead. The first
+request with a key runs the view and stores its redirect and flash messages
+in the cache; retries of it, like a double click, get the stored response
+back without running the view again. A retry that arrives while the first
+request is still running is not run either: it is sent back to the page it
+came from with a "still processing" message, or answered 409 Conflict.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils.http import url_has_allowed_host_and_scheme
+
+FIELD_NAME = "idempotency_key"
+LOCK_TIMEOUT = 30
+IN_PROGRESS_MESSAGE = "Your request is still being processed."
+
+
+def get_idempotency_key(request):
+    return request.headers.get("Idempotency-Key") or request.POST.get(FIELD_NAME)
+
+
+def make_key(request, key):
+    """Scope ``key`` to the user and the URL, so keys cannot collide."""
+    digest = hashlib.md5(
+        f"{request.user.pk}:{request.path}:{key}".encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"idempotency:{digest}"
+
+
+def _replay(request, stored):
+    location, flashes = stored
+    for level, message, extra_tags in flashes:
+        messages.add_message(request, level, message, extra_tags=extra_tags)
+    return HttpResponseRedirect(location)
+
+
+def _in_progress(request):
+    referer = request.headers.get("Referer")
+    if referer and url_has_allowed_host_and_scheme(
+        referer, {request.get_host()}, request.is_secure()
+    ):
+        messages.add_message(request, messages.INFO, IN_PROGRESS_MESSAGE)
+        return HttpResponseRedirect(referer)
+    return HttpResponse(IN_PROGRESS_MESSAGE, status=409, headers={"Retry-After": "1"})
+
+
+class IdempotentPostMixin:
+    """Answer retried POSTs from the response stored under their key.
+
+    Only redirects are stored, which is how every POST of these views
+    answers; POSTs without a key run as usual.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        key = request.method == "POST" and get_idempotency_key(request)
+        if not key or not settings.IDEMPOTENCY_KEY_TIMEOUT:
+            return super().dispatch(request, *args, **kwargs)
+
+        cache_key = make_key(request, key)
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return _replay(request, stored)
+
+        lock_key = f"{cache_key}:lock"
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            # The first request with this key is still running
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return _replay(request, stored)
+            return _in_progress(request)
+
+        try:
+            storage = messages.get_messages(request)
+            seen = len(storage)
+            response = super().dispatch(request, *args, **kwargs)
+            if isinstance(response, HttpResponseRedirect):
+                added = list(storage)[seen:]
+                # Reading them marked every message as shown; they are not yet
+                storage.used = False
+                flashes = [(m.level, m.message, m.extra_tags) for m in added]
+                cache.set(
+                    cache_key,
+                    (response.url, flashes),
+                    settings.IDEMPOTENCY_KEY_TIMEOUT,
+                )
+        finally:
+            cache.delete(lock_key)
+        return response
@@ -0,0 +1,16 @@
+import uuid
+
+from django import template
+from django.utils.html import format_html
+
+from efood_main.apps.customers.idempotency import FIELD_NAME
+
+register = template.Library()
+
+
+@register.simple_tag
+def idempotency_key():
+    """``{% idempotency_key %}``: a fresh key for the form it is rendered in."""
+    return format_html(
+        '<input type="hidden" name="{}" value="{}">', FIELD_NAME, uuid.uuid4().hex
+    )
@@ -1,17 +1,42 @@
-from datetime import date, time
+import re
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+from io import StringIO
 
+from asgiref.sync import sync_to_async
 from django.contrib.messages import get_messages
 from django.core import mail
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.http import HttpRequest
-from django.test import TestCase
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from efood_main.apps.accounts.forms import UserInfoForm, UserProfileForm
 from efood_main.apps.accounts.models import User, UserProfile
 from efood_main.apps.chef.models import Chef
+from efood_main.apps.customers.idempotency import make_key
 from efood_main.apps.customers.views import CustomerViewMixin
-from efood_main.apps.workshop.models import Workshop, WorkshopRegistration
+from efood_main.apps.mailer.models import OutboxEmail
+from efood_main.apps.recipe.models import Category, RecipeItem
+from efood_main.apps.workshop.models import (
+    SeatHold,
+    WaitlistEntry,
+    Workshop,
+    WorkshopRegistration,
+)
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
 
 
 class CustomerViewMixinTest(TestCase):
@@ -49,6 +74,7 @@ class CustomerViewMixinTest(TestCase):
         )
 
 
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class CustomerProfileViewTest(TestCase):
     def setUp(self):
         self.user = User.objects.create(
@@ -141,7 +167,7 @@ class CustomerWorkshopDetailViewTest(TestCase):
             description="This is a test workshop.",
             date=date.today(),
             time=time(14, 30),
-            capacity=10,
+            max_capacity=10,
             price=100.00,
         )
 
@@ -156,6 +182,22 @@ class CustomerWorkshopDetailViewTest(TestCase):
         self.assertContains(response, "Test Workshop")
         self.assertContains(response, "This is a test workshop.")
 
+    def test_unknown_workshop_is_404(self):
+        url = reverse("cust-workshop-detail", kwargs={"id": self.workshop.id + 1})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_anonymous_user_is_redirected_to_login(self):
+        self.client.logout()
+        url = reverse("cust-workshop-detail", kwargs={"id": self.workshop.id})
+        response = self.client.get(url)
+        self.assertRedirects(response, f"{reverse('login')}?next={url}")
+
+    async def test_served_under_asgi(self):
+        await sync_to_async(self.async_client.force_login)(self.customer)
+        url = reverse("cust-workshop-detail", kwargs={"id": self.workshop.id})
+        response = await self.async_client.get(url)
+        self.assertContains(response, "Test Workshop")
+
     def tearDown(self):
         UserProfile.objects.all().delete()
         User.objects.all().delete()
@@ -193,7 +235,7 @@ class CustomerWorkshopBookTest(TestCase):
             description="This is a test workshop.",
             date=date.today(),
             time=time(14, 30),
-            capacity=1,
+            max_capacity=1,
             price=10.00,
         )
 
@@ -211,14 +253,57 @@ class CustomerWorkshopBookTest(TestCase):
 
     def test_successful_booking(self):
         url = reverse("book-workshop", kwargs={"workshop_id": self.workshop.id})
+        checkout_url = reverse("workshop-checkout", args=[self.workshop.id])
         response = self.client.post(url)
+        # The seat is held while the customer checks out
+        self.assertRedirects(response, checkout_url)
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 0)
+        self.assertFalse(WorkshopRegistration.objects.exists())
+        self.assertContains(self.client.get(checkout_url), "Confirm Booking")
+
+        response = self.client.post(checkout_url)
         self.assertRedirects(response, reverse("workshop-confirmation"))
         self.assertEqual(WorkshopRegistration.objects.count(), 1)
-        self.workshop.refresh_from_db()
-        self.assertEqual(self.workshop.capacity, 0)
+        self.assertFalse(SeatHold.objects.exists())
+        # The confirmation is queued, not sent during the request
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+        call_command("send_queued_mail", stdout=StringIO())
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].subject, "Workshop Booking Confirmation")
 
+    def test_free_workshop_is_booked_at_once(self):
+        Workshop.objects.filter(pk=self.workshop.pk).update(price=None)
+        url = reverse("book-workshop", kwargs={"workshop_id": self.workshop.id})
+        response = self.client.post(url)
+        self.assertRedirects(response, reverse("workshop-confirmation"))
+        self.assertEqual(WorkshopRegistration.objects.count(), 1)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+    def test_expired_hold_cannot_be_checked_out(self):
+        self.client.post(
+            reverse("book-workshop", kwargs={"workshop_id": self.workshop.id})
+        )
+        SeatHold.objects.update(expires_at=timezone.now())
+        response = self.client.post(
+            reverse("workshop-checkout", args=[self.workshop.id]), follow=True
+        )
+        self.assertRedirects(
+            response, reverse("cust-workshop-detail", args=[self.workshop.id])
+        )
+        self.assertContains(response, "Your seat is no longer held.")
+        self.assertFalse(WorkshopRegistration.objects.exists())
+
+    def test_checkout_checks_the_user_before_the_workshop(self):
+        url = reverse("workshop-checkout", args=[self.workshop.id + 1])
+        self.client.logout()
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertRedirects(
+            response, f"{reverse('login')}?next={url}", fetch_redirect_response=False
+        )
+
     def test_double_booking_prevention(self):
         WorkshopRegistration.objects.create(
             customer=self.customer, workshop=self.workshop
@@ -234,7 +319,7 @@ class CustomerWorkshopBookTest(TestCase):
         )
 
     def test_booking_when_full(self):
-        self.workshop.capacity = 0
+        self.workshop.max_capacity = 0
         self.workshop.save()
         url = reverse("book-workshop", kwargs={"workshop_id": self.workshop.id})
         response = self.client.post(url)
@@ -242,6 +327,117 @@ class CustomerWorkshopBookTest(TestCase):
         self.assertEqual(WorkshopRegistration.objects.count(), 0)
 
 
+class IdempotentBookingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        chef_user = User.objects.create_user(
+            first_name="Test",
+            last_name="Chef",
+            username="chefuser",
+            email="chef@example.com",
+            password="chefpassword",
+        )
+        self.customer = User.objects.create(
+            username="testuser", email="testuser@example.com", is_active=True, role=2
+        )
+        chef = Chef.objects.create(
+            user=chef_user,
+            user_profile=UserProfile.objects.get(user=chef_user),
+            chef_name="Test Chef",
+        )
+        self.workshop = Workshop.objects.create(
+            chef=chef,
+            title="Efood Workshop",
+            description="This is a test workshop.",
+            date=date.today(),
+            time=time(14, 30),
+            max_capacity=2,
+            price=None,
+        )
+        self.client.force_login(self.customer)
+        self.book_url = reverse("book-workshop", args=[self.workshop.id])
+        self.cancel_url = reverse("cancel_workshop", args=[self.workshop.id])
+
+    def test_retried_booking_is_answered_from_the_store(self):
+        response = self.client.post(self.book_url, {"idempotency_key": "first"})
+        self.assertRedirects(response, reverse("workshop-confirmation"))
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.client.post(self.book_url, {"idempotency_key": "first"})
+        self.assertRedirects(retry, reverse("workshop-confirmation"))
+        self.assertFalse(
+            [q for q in queries if "workshop_workshopregistration" in q["sql"]]
+        )
+        self.assertEqual(WorkshopRegistration.objects.count(), 1)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 1)
+
+    def test_retried_cancellation_repeats_its_message(self):
+        self.client.post(self.book_url)
+        for _ in range(2):
+            response = self.client.post(
+                self.cancel_url, HTTP_IDEMPOTENCY_KEY="cancel", follow=True
+            )
+            self.assertContains(
+                response, "Your registration has been cancelled successfully."
+            )
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 2)
+
+    def test_retry_of_a_running_request_does_not_run_again(self):
+        self.client.post(self.book_url, {"idempotency_key": "first"})
+        # As if the cancellation with this key were still running
+        request = RequestFactory().post(self.cancel_url)
+        request.user = self.customer
+        cache.add(f"{make_key(request, 'cancel')}:lock", 1)
+        response = self.client.post(self.cancel_url, HTTP_IDEMPOTENCY_KEY="cancel")
+        self.assertEqual(response.status_code, 409)
+        detail_url = "http://testserver" + reverse(
+            "cust-workshop-detail", args=[self.workshop.id]
+        )
+        response = self.client.post(
+            self.cancel_url,
+            {"idempotency_key": "cancel"},
+            HTTP_REFERER=detail_url,
+            follow=True,
+        )
+        self.assertRedirects(response, detail_url)
+        self.assertContains(response, "Your request is still being processed.")
+        self.assertEqual(WorkshopRegistration.objects.count(), 1)
+
+    def test_keys_are_scoped_to_the_url(self):
+        self.client.post(self.book_url, {"idempotency_key": "same"})
+        self.client.post(self.cancel_url, {"idempotency_key": "same"})
+        self.assertFalse(WorkshopRegistration.objects.exists())
+
+    def test_new_key_books_again(self):
+        self.client.post(self.book_url, {"idempotency_key": "first"})
+        self.client.post(self.cancel_url, {"idempotency_key": "second"})
+        self.client.post(self.book_url, {"idempotency_key": "third"})
+        self.assertEqual(WorkshopRegistration.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_KEY_TIMEOUT=0)
+    def test_keys_can_be_turned_off(self):
+        self.client.post(self.book_url, {"idempotency_key": "first"})
+        self.client.post(self.cancel_url, {"idempotency_key": "first"})
+        self.client.post(self.cancel_url, {"idempotency_key": "first"})
+        response = self.client.post(
+            self.cancel_url, {"idempotency_key": "first"}, follow=True
+        )
+        self.assertContains(response, "You do not have a registration")
+
+    def test_forms_carry_a_fresh_key(self):
+        detail_url = reverse("cust-workshop-detail", args=[self.workshop.id])
+        keys = {
+            re.search(
+                r'name="idempotency_key" value="(\w+)"',
+                self.client.get(detail_url).content.decode(),
+            ).group(1)
+            for _ in range(2)
+        }
+        self.assertEqual(len(keys), 2)
+
+
 class CustomerWorkshopCancelViewTest(TestCase):
     def setUp(self):
         self.chef = User.objects.create_user(
@@ -272,7 +468,8 @@ class CustomerWorkshopCancelViewTest(TestCase):
             description="This is a test workshop.",
             date=date.today(),
             time=time(14, 30),
-            capacity=5,
+            max_capacity=6,
+            seats_taken=1,
             price=100.00,
         )
         # Create a WorkshopRegistration instance for the user
@@ -297,7 +494,7 @@ class CustomerWorkshopCancelViewTest(TestCase):
             ).exists()
         )
         self.workshop.refresh_from_db()
-        self.assertEqual(self.workshop.capacity, 6)
+        self.assertEqual(self.workshop.available_seats, 6)
 
     def test_cancel_workshop_registration_not_registered(self):
         # Delete the existing registration to simulate the user not being registered
@@ -311,10 +508,270 @@ class CustomerWorkshopCancelViewTest(TestCase):
         warning_message = "You do not have a registration for this workshop to cancel."
         self.assertIn(warning_message, [message.message for message in messages])
         self.workshop.refresh_from_db()
-        self.assertEqual(self.workshop.capacity, 5)
+        self.assertEqual(self.workshop.available_seats, 5)
 
     def tearDown(self):
         WorkshopRegistration.objects.all().delete()
         Workshop.objects.all().delete()
         UserProfile.objects.all().delete()
         User.objects.all().delete()
+
+
+class CustomerWaitlistViewTest(TestCase):
+    def setUp(self):
+        chef_user = User.objects.create_user(
+            username="chefuser",
+            email="chef@example.com",
+            password="chefpassword",
+            first_name="Test",
+            last_name="Chef",
+        )
+        self.customer = User.objects.create(
+            username="testuser",
+            first_name="henry",
+            last_name="doe",
+            email="testuser@example.com",
+            is_active=True,
+            role=2,
+        )
+        self.other = User.objects.create(
+            username="otheruser", email="other@example.com", is_active=True, role=2
+        )
+        chef = Chef.objects.create(
+            user=chef_user,
+            user_profile=UserProfile.objects.get(user=chef_user),
+            chef_name="Test Chef",
+        )
+        self.workshop = Workshop.objects.create(
+            chef=chef,
+            title="Efood Workshop",
+            description="This is a test workshop.",
+            date=date.today(),
+            time=time(14, 30),
+            max_capacity=1,
+            seats_taken=1,
+            price=100.00,
+        )
+        WorkshopRegistration.objects.create(customer=self.other, workshop=self.workshop)
+        self.client.force_login(self.customer)
+        self.detail_url = reverse("cust-workshop-detail", args=[self.workshop.id])
+
+    def test_join_and_leave_from_the_detail_page(self):
+        response = self.client.get(self.detail_url)
+        self.assertContains(response, "Join Waitlist")
+        url = reverse("join-waitlist", kwargs={"workshop_id": self.workshop.id})
+        response = self.client.post(url, follow=True)
+        self.assertRedirects(response, self.detail_url)
+        self.assertContains(response, "You are number 1 on the waitlist")
+        self.assertContains(response, "the next free seat is held for whoever")
+        url = reverse("leave-waitlist", kwargs={"workshop_id": self.workshop.id})
+        response = self.client.post(url, follow=True)
+        self.assertContains(response, "You have left the waitlist.")
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_joining_a_paid_workshop_explains_the_hold(self):
+        url = reverse("join-waitlist", kwargs={"workshop_id": self.workshop.id})
+        with override_settings(SEAT_HOLD_MINUTES={"checkout": 10, "waitlist": 90}):
+            response = self.client.post(url, follow=True)
+        self.assertContains(
+            response,
+            "We will hold the next free seat for you for 1\xa0hour, 30\xa0minutes "
+            "and email you: check out before the hold expires to book it.",
+        )
+        Workshop.objects.filter(pk=self.workshop.pk).update(price=None)
+        WaitlistEntry.objects.all().delete()
+        response = self.client.post(url, follow=True)
+        self.assertContains(response, "We will book the next free seat for you")
+
+    def test_cancellation_holds_the_seat_for_the_waiting_customer(self):
+        self.client.post(
+            reverse("join-waitlist", kwargs={"workshop_id": self.workshop.id})
+        )
+        self.client.force_login(self.other)
+        self.client.post(
+            reverse("cancel_workshop", kwargs={"workshop_id": self.workshop.id})
+        )
+        self.assertEqual(SeatHold.objects.get().customer, self.customer)
+        call_command("send_queued_mail", stdout=StringIO())
+        self.assertEqual(mail.outbox[0].to, [self.customer.email])
+        self.assertEqual(mail.outbox[0].subject, "A seat opened up for you")
+
+        self.client.force_login(self.customer)
+        checkout_url = reverse("workshop-checkout", args=[self.workshop.id])
+        response = self.client.get(self.detail_url)
+        self.assertContains(response, "A seat is held for you until")
+        self.assertContains(response, f'href="{checkout_url}"')
+        self.assertNotContains(response, "Join Waitlist")
+        response = self.client.post(
+            reverse("book-workshop", kwargs={"workshop_id": self.workshop.id})
+        )
+        self.assertRedirects(response, checkout_url)
+        self.client.post(checkout_url)
+        self.assertEqual(
+            WorkshopRegistration.objects.get(workshop=self.workshop).customer,
+            self.customer,
+        )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class CustomerBookedWorkshopsViewTest(TestCase):
+    def setUp(self):
+        chef_user = User.objects.create_user(
+            first_name="Test",
+            last_name="Chef",
+            username="chefuser",
+            email="chef@example.com",
+            password="chefpassword",
+        )
+        self.chef = Chef.objects.create(
+            user=chef_user,
+            user_profile=UserProfile.objects.get(user=chef_user),
+            chef_name="Test Chef",
+        )
+        self.customer = User.objects.create(
+            username="testuser", email="testuser@example.com", is_active=True, role=2
+        )
+        self.other = User.objects.create(
+            username="otheruser", email="other@example.com", is_active=True, role=2
+        )
+        self.client.force_login(self.customer)
+        self.url = reverse("customer_workshop")
+
+    def book(self, days, customer=None, **registration):
+        workshop = Workshop.objects.create(
+            chef=self.chef,
+            title=f"Workshop {days}",
+            description="This is a test workshop.",
+            date=date.today() + timedelta(days=days),
+            time=time(14, 30),
+            max_capacity=5,
+            price=10.00,
+            recipe=getattr(self, "recipe", None),
+        )
+        WorkshopRegistration.objects.create(
+            customer=customer or self.customer, workshop=workshop, **registration
+        )
+        return workshop
+
+    def titles(self, response):
+        return [workshop.title for workshop in response.context["booked_workshops"]]
+
+    def test_upcoming_and_past_bookings_are_listed_apart(self):
+        self.book(0)
+        self.book(3)
+        self.book(-1)
+        self.book(-5)
+        self.book(1, customer=self.other)
+        self.book(2, is_canceled=True)
+
+        response = self.client.get(self.url)
+        self.assertEqual(self.titles(response), ["Workshop 0", "Workshop 3"])
+        self.assertContains(response, "Test Chef")
+        response = self.client.get(self.url, {"when": "past"})
+        self.assertEqual(self.titles(response), ["Workshop -1", "Workshop -5"])
+        self.assertNotContains(response, "Cancel</button>")
+
+    def test_bookings_are_paginated(self):
+        for days in range(12):
+            self.book(days)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context["booked_workshops"]), 10)
+        page = response.context["page_obj"]
+        response = self.client.get(self.url, {"cursor": page.next_cursor})
+        self.assertEqual(self.titles(response), ["Workshop 10", "Workshop 11"])
+
+    def test_query_count_does_not_grow_with_the_bookings(self):
+        category = Category.objects.create(
+            chef=self.chef, category_name="Soup", slug="soup"
+        )
+        self.recipe = RecipeItem.objects.create(
+            chef=self.chef,
+            category=category,
+            recipe_title="Tomato Soup",
+            slug="tomato-soup",
+            recipe_ingredients="Tomatoes",
+            recipe_instructions="Cook.",
+            preparation_time=timedelta(minutes=20),
+            image=SimpleUploadedFile("soup.jpg", b"image", content_type="image/jpeg"),
+        )
+        self.book(1)
+        # Session, user and the page of bookings with their chefs and recipes
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        for days in range(2, 30):
+            self.book(days)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context["booked_workshops"]), 10)
+        self.assertContains(response, self.recipe.image.url)
+
+
+class NearbyWorkshopsViewTest(TestCase):
+    def setUp(self):
+        self.chef = User.objects.create_user(
+            username="chefuser",
+            email="chef@example.com",
+            password="chefpassword",
+            first_name="Test",
+            last_name="Chef",
+        )
+        self.customer = User.objects.create(
+            username="testuser",
+            first_name="henry",
+            last_name="doe",
+            email="testuser@example.com",
+            is_active=True,
+            role=2,
+        )
+        chef = Chef.objects.create(
+            user=self.chef,
+            user_profile=UserProfile.objects.get(user=self.chef),
+            chef_name="Test Chef",
+        )
+        self.workshop = Workshop.objects.create(
+            chef=chef,
+            title="Efood Workshop",
+            description="This is a test workshop.",
+            date=date.today(),
+            time=time(14, 30),
+            max_capacity=5,
+            price=100.00,
+            latitude=40.7128,
+            longitude=-74.0060,
+        )
+        self.client.force_login(self.customer)
+        self.url = reverse("nearby_workshops")
+
+    def test_returns_workshops_within_radius(self):
+        response = self.client.get(self.url, {"lat": 40.73, "lng": -73.99})
+        self.assertEqual(response.status_code, 200)
+        workshops = response.json()["workshops"]
+        self.assertEqual(len(workshops), 1)
+        self.assertEqual(workshops[0]["id"], self.workshop.id)
+        self.assertLess(workshops[0]["distance_km"], 10)
+
+    def test_respects_radius_and_dates(self):
+        response = self.client.get(
+            self.url, {"lat": 40.73, "lng": -73.99, "radius": "0.5"}
+        )
+        self.assertEqual(response.json()["workshops"], [])
+        tomorrow = date.today() + timedelta(days=1)
+        response = self.client.get(
+            self.url, {"lat": 40.73, "lng": -73.99, "date_from": tomorrow}
+        )
+        self.assertEqual(response.json()["workshops"], [])
+
+    def test_invalid_coordinates(self):
+        response = self.client.get(self.url, {"lat": "north"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url, {"lat": 91, "lng": 0})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url, {"lat": 0, "lng": 0, "radius": 0})
+        self.assertEqual(response.status_code, 400)
+
+    def test_impossible_dates_are_rejected(self):
+        response = self.client.get(
+            self.url, {"lat": 40.73, "lng": -73.99, "date_from": "2024-02-30"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()["errors"]), ["date_from"])
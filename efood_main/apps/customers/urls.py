@@ -17,6 +17,11 @@ urlpatterns = [
         views.CustomerBookedWorkshopsView.as_view(),
         name="customer_workshop",
     ),
+    path(
+        "workshop/nearby/",
+        views.NearbyWorkshopsView.as_view(),
+        name="nearby_workshops",
+    ),
     path(
         "workshop-detail/<int:id>",
         views.CustomerWorkshopDetail.as_view(),
@@ -27,9 +32,24 @@ urlpatterns = [
         views.CustomerWorkshopBook.as_view(),
         name="book-workshop",
     ),
+    path(
+        "workshop/<int:workshop_id>/checkout/",
+        views.WorkshopCheckoutView.as_view(),
+        name="workshop-checkout",
+    ),
     path(
         "workshop/<int:workshop_id>/cancel",
         views.CustomerWorkshopCancel.as_view(),
         name="cancel_workshop",
     ),
+    path(
+        "workshop/<int:workshop_id>/waitlist/",
+        views.CustomerWaitlistJoin.as_view(),
+        name="join-waitlist",
+    ),
+    path(
+        "workshop/<int:workshop_id>/waitlist/leave/",
+        views.CustomerWaitlistLeave.as_view(),
+        name="leave-waitlist",
+    ),
 ]
@@ -1,14 +1,41 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.mail import send_mail
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
-from django.views.generic import DetailView, ListView, TemplateView
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.timesince import timeuntil
+from django.views.generic import DetailView, ListView, TemplateView, View
 
 from efood_main.apps.accounts.forms import UserInfoForm, UserProfileForm
-from efood_main.apps.accounts.models import UserProfile
-from efood_main.apps.workshop.models import Workshop, WorkshopRegistration
+from efood_main.apps.accounts.utils import get_request_user_profile_or_404
+from efood_main.apps.accounts.views import AsyncViewMixin
+from efood_main.apps.mailer.utils import enqueue_email
+from efood_main.apps.workshop.models import Workshop
+from efood_main.apps.workshop.services import (
+    BookingResult,
+    WaitlistResult,
+    active_hold,
+    book_workshop,
+    cancel_booking,
+    confirm_hold,
+    hold_minutes,
+    hold_seat,
+    join_waitlist,
+    leave_waitlist,
+    release_hold,
+    waitlist_position,
+)
+from efood_main.pagination import CursorPaginationMixin
+
+from .forms import NearbyWorkshopsForm
+from .idempotency import IdempotentPostMixin
 
 
 class CustomerViewMixin(LoginRequiredMixin, UserPassesTestMixin):
@@ -27,7 +54,7 @@ class CustomerProfileView(CustomerViewMixin, TemplateView):
         context = super().get_context_data(**kwargs)
 
         # Fetch UserProfile and Chef objects or return a 404 response
-        profile = get_object_or_404(UserProfile, user=self.request.user)
+        profile = get_request_user_profile_or_404(self.request)
 
         # Create a combined form with both UserProfileForm and ChefForm
         combined_form = self.get_combined_form(profile)
@@ -54,7 +81,7 @@ class CustomerProfileView(CustomerViewMixin, TemplateView):
         return redirect("customer")
 
     def post(self, request, *args, **kwargs):
-        profile = get_object_or_404(UserProfile, user=request.user)
+        profile = get_request_user_profile_or_404(request)
 
         profile_form = UserProfileForm(request.POST, request.FILES, instance=profile)
         user_form = UserInfoForm(
@@ -70,75 +97,138 @@ class CustomerProfileView(CustomerViewMixin, TemplateView):
             return self.form_valid(combined_form)
 
 
-class CustomerWorkshopDetail(CustomerViewMixin, DetailView):
+class CustomerWorkshopDetail(AsyncViewMixin, CustomerViewMixin, DetailView):
     model = Workshop
     template_name = "customers/customer_workshop_detail.html"
 
-    def get_object(self, queryset=None):
-        return get_object_or_404(Workshop, id=self.kwargs["id"])
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        hold, position = None, 0
+        # Only paid workshops hold seats, e.g. for the head of the waitlist
+        if hold_minutes(self.object):
+            hold = await sync_to_async(active_hold)(request.user, self.object)
+        if hold is None and not self.object.available_seats:
+            position = await sync_to_async(waitlist_position)(request.user, self.object)
+        return self.render_to_response(
+            self.get_context_data(
+                object=self.object,
+                hold=hold,
+                waitlist_position=position,
+                waitlist_holds=bool(hold_minutes(self.object, "waitlist")),
+            )
+        )
+
+    async def aget_object(self):
+        # The template shows the chef and the workshop's recipe
+        queryset = Workshop.objects.select_related("chef", "recipe")
+        try:
+            return await queryset.aget(id=self.kwargs["id"])
+        except Workshop.DoesNotExist:
+            raise Http404("No Workshop matches the given query.")
 
 
 class WorkshopBookConfirmation(CustomerViewMixin, TemplateView):
     template_name = "customers/booking-confirmation.html"
 
 
-class CustomerWorkshopBook(CustomerViewMixin, TemplateView):
+def enqueue_booking_confirmation(customer, workshop):
+    enqueue_email(
+        "Workshop Booking Confirmation",
+        f"You have successfully booked {workshop.title} \
+            . On {workshop.date}{workshop.time}",
+        settings.EMAIL_HOST_USER,
+        [
+            customer.email,
+            workshop.chef.user.email,
+        ],
+    )
+
+
+class CustomerWorkshopBook(CustomerViewMixin, IdempotentPostMixin, TemplateView):
     def post(self, request, *args, **kwargs):
         workshop_id = self.kwargs.get("workshop_id")
-        workshop = get_object_or_404(Workshop, id=workshop_id)
+        workshop = get_object_or_404(
+            Workshop.objects.select_related("chef__user"), id=workshop_id
+        )
+
+        if hold_minutes(workshop):
+            # Paid workshops hold the seat while the customer checks out
+            result = hold_seat(request.user, workshop)
+            if result is BookingResult.HELD:
+                return redirect("workshop-checkout", workshop_id=workshop.id)
+        else:
+            # The confirmation email is queued in the booking transaction
+            with transaction.atomic():
+                result = book_workshop(request.user, workshop)
+                if result is BookingResult.BOOKED:
+                    enqueue_booking_confirmation(request.user, workshop)
 
-        if WorkshopRegistration.objects.filter(
-            customer=request.user, workshop=workshop
-        ).exists():
+        if result is BookingResult.ALREADY_BOOKED:
             # Optionally, add a message to be displayed to the user
             messages.add_message(
                 request, messages.INFO, "You have already booked a workshop."
             )
             return redirect("customer_workshop")  # Redirect to a suitable page
 
-        if workshop.capacity > 0:
-            # Decrease the capacity
-            workshop.capacity -= 1
-            workshop.save()
-
-            # Register the user for the workshop
-            WorkshopRegistration.objects.create(
-                customer=request.user, workshop=workshop
-            )
-            # Send confirmation emails
-            send_mail(
-                "Workshop Booking Confirmation",
-                f"You have successfully booked {workshop.title} \
-                    . On {workshop.date}{workshop.time}",
-                settings.EMAIL_HOST_USER,
-                [
-                    request.user.email,
-                    workshop.chef.user.email,
-                ],
-                fail_silently=False,
+        if result is BookingResult.SOLD_OUT:
+            messages.add_message(
+                request,
+                messages.WARNING,
+                "Sorry, this workshop is sold out. Join its waitlist to get the "
+                "next seat that frees up.",
             )
-            return redirect("workshop-confirmation")
-        else:
             return redirect("customer_workshop")
 
+        return redirect("workshop-confirmation")
+
+
+class WorkshopCheckoutView(CustomerViewMixin, IdempotentPostMixin, TemplateView):
+    """Confirm the booking of a held seat before the hold expires."""
+
+    template_name = "customers/workshop_checkout.html"
+
+    def get_workshop(self):
+        return get_object_or_404(
+            Workshop.objects.select_related("chef__user"),
+            id=self.kwargs["workshop_id"],
+        )
+
+    def get(self, request, *args, **kwargs):
+        workshop = self.get_workshop()
+        hold = active_hold(request.user, workshop)
+        if hold is None:
+            return self.expired(workshop)
+        return self.render_to_response(
+            self.get_context_data(workshop=workshop, hold=hold)
+        )
 
-class CustomerWorkshopCancel(CustomerViewMixin, TemplateView):
     def post(self, request, *args, **kwargs):
-        workshop_id = self.kwargs.get("workshop_id")
-        workshop = get_object_or_404(Workshop, id=workshop_id)
+        workshop = self.get_workshop()
+        with transaction.atomic():
+            if not confirm_hold(request.user, workshop):
+                return self.expired(workshop)
+            enqueue_booking_confirmation(request.user, workshop)
+        return redirect("workshop-confirmation")
+
+    def expired(self, workshop):
+        messages.add_message(
+            self.request,
+            messages.WARNING,
+            "Your seat is no longer held. Book again to check out.",
+        )
+        return redirect("cust-workshop-detail", id=workshop.id)
 
-        # Check if the user has a registration for this specific workshop
-        registration = WorkshopRegistration.objects.filter(
-            customer=request.user, workshop=workshop
-        ).first()
-        if registration:
-            # Delete the registration
-            registration.delete()
 
-            # Increase the workshop capacity
-            workshop.capacity += 1
-            workshop.save()
+class CustomerWorkshopCancel(CustomerViewMixin, IdempotentPostMixin, TemplateView):
+    def post(self, request, *args, **kwargs):
+        workshop_id = self.kwargs.get("workshop_id")
+        workshop = get_object_or_404(Workshop, id=workshop_id)
 
+        # Delete the registration (or the checkout hold) and release its seat
+        # in one transaction
+        if cancel_booking(request.user, workshop) or release_hold(
+            request.user, workshop
+        ):
             # Optionally, add a message to be displayed to the user
             messages.add_message(
                 request,
@@ -156,20 +246,152 @@ class CustomerWorkshopCancel(CustomerViewMixin, TemplateView):
         return redirect("customer_workshop")
 
 
-class CustomerBookedWorkshopsView(CustomerViewMixin, ListView):
-    model = WorkshopRegistration
+class CustomerWaitlistJoin(CustomerViewMixin, View):
+    """Queue for a sold-out workshop rather than retrying the booking.
+
+    The seat of the next cancellation is booked for the head of the queue,
+    or held for them to check out if the workshop is paid, and they are
+    emailed (see ``promote_waitlist``).
+    """
+
+    result_messages = {
+        WaitlistResult.JOINED: (
+            messages.SUCCESS,
+            "You are on the waitlist. We will book the next free seat for you "
+            "and email you.",
+        ),
+        WaitlistResult.ALREADY_WAITING: (
+            messages.INFO,
+            "You are already on the waitlist.",
+        ),
+        WaitlistResult.ALREADY_BOOKED: (
+            messages.INFO,
+            "You already have a seat at this workshop.",
+        ),
+        WaitlistResult.SEATS_AVAILABLE: (
+            messages.INFO,
+            "Seats are available, you can book this workshop now.",
+        ),
+    }
+
+    def post(self, request, *args, **kwargs):
+        workshop = get_object_or_404(Workshop, id=self.kwargs["workshop_id"])
+        result = join_waitlist(request.user, workshop)
+        level, message = self.result_messages[result]
+        minutes = hold_minutes(workshop, "waitlist")
+        if result is WaitlistResult.JOINED and minutes:
+            now = timezone.now()
+            held_for = timeuntil(now + timedelta(minutes=minutes), now)
+            message = (
+                "You are on the waitlist. We will hold the next free seat for "
+                f"you for {held_for} and email you: check out before the hold "
+                "expires to book it."
+            )
+        messages.add_message(request, level, message)
+        return redirect("cust-workshop-detail", id=workshop.id)
+
+
+class CustomerWaitlistLeave(CustomerViewMixin, View):
+    def post(self, request, *args, **kwargs):
+        workshop = get_object_or_404(Workshop, id=self.kwargs["workshop_id"])
+        if leave_waitlist(request.user, workshop):
+            messages.add_message(request, messages.INFO, "You have left the waitlist.")
+        else:
+            messages.add_message(
+                request, messages.WARNING, "You are not on the waitlist."
+            )
+        return redirect("cust-workshop-detail", id=workshop.id)
+
+
+class CustomerBookedWorkshopsView(CustomerViewMixin, CursorPaginationMixin, ListView):
+    """The customer's bookings, upcoming (soonest first) or ``?when=past``.
+
+    One query joins the registrations to their workshops, chefs and recipes;
+    the unique (customer, workshop) constraint rules out duplicates.
+    """
+
+    model = Workshop
     template_name = "customers/customer_workshop.html"
     context_object_name = "booked_workshops"
+    paginate_by = 10
+
+    @property
+    def upcoming(self):
+        return self.request.GET.get("when") != "past"
+
+    @property
+    def cursor_ordering(self):
+        return ("date", "id") if self.upcoming else ("-date", "-id")
 
     def get_queryset(self):
-        # Get unique workshop IDs for the current user's non-canceled workshop
-        workshop_ids = (
-            WorkshopRegistration.objects.filter(
-                customer=self.request.user, is_canceled=False
+        today = timezone.localdate()
+        dates = {"date__gte": today} if self.upcoming else {"date__lt": today}
+        return Workshop.objects.filter(
+            workshopregistration__customer=self.request.user,
+            workshopregistration__is_canceled=False,
+            **dates,
+        ).select_related("chef", "recipe")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["upcoming"] = self.upcoming
+        return context
+
+
+class NearbyWorkshopsView(CustomerViewMixin, View):
+    """JSON list of upcoming workshops around ``lat``/``lng``, nearest first.
+
+    Query string: ``lat``, ``lng``, ``radius`` (km, default 10, max 100),
+    ``date_from`` (default today), ``date_to`` and ``limit`` (max 100).
+    """
+
+    default_radius = 10
+    max_radius = 100
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        form = NearbyWorkshopsForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse(
+                {
+                    "errors": {
+                        field: list(errors) for field, errors in form.errors.items()
+                    }
+                },
+                status=400,
             )
-            .values_list("workshop_id", flat=True)
-            .distinct()
+        latitude, longitude = form.cleaned_data["lat"], form.cleaned_data["lng"]
+        radius = form.cleaned_data["radius"] or self.default_radius
+        limit = form.cleaned_data["limit"]
+        if limit is None:
+            limit = self.max_limit
+        date_from = form.cleaned_data["date_from"] or timezone.localdate()
+        date_to = form.cleaned_data["date_to"]
+
+        workshops = Workshop.objects.nearby(
+            latitude, longitude, min(radius, self.max_radius)
+        ).filter(date__gte=date_from)
+        if date_to:
+            workshops = workshops.filter(date__lte=date_to)
+        workshops = workshops.only(
+            "id", "title", "date", "time", "address", "latitude", "longitude"
+        )[: max(1, min(limit, self.max_limit))]
+
+        return JsonResponse(
+            {
+                "workshops": [
+                    {
+                        "id": workshop.id,
+                        "title": workshop.title,
+                        "date": workshop.date,
+                        "time": workshop.time,
+                        "address": workshop.address,
+                        "latitude": workshop.latitude,
+                        "longitude": workshop.longitude,
+                        "distance_km": round(workshop.distance, 3),
+                        "url": reverse("cust-workshop-detail", args=[workshop.id]),
+                    }
+                    for workshop in workshops
+                ]
+            }
         )
-
-        # Query Workshop model for those unique IDs
-        return Workshop.objects.filter(id__in=workshop_ids).distinct()
@@ -0,0 +1,334 @@
+"""Latency benchmark of every named route, driven through the test client.
+
+Each route is requested ``iterations`` times as an anonymous visitor or as a
+seeded chef or customer (see ``manage.py seed``), recording the wall-clock
+latency and SQL query count of every request, then once more under
+tracemalloc to measure the memory it allocates. Results can be saved as a
+JSON baseline and later runs compared against it.
+"""
+
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connections
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from efood_main.apps.accounts.models import User
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.mailer.models import OutboxEmail
+from efood_main.apps.recipe.models import Category, RecipeItem
+from efood_main.apps.workshop.models import Workshop, WorkshopRegistration
+from efood_main.middleware import RequestMetrics, instrument
+
+from .utils import SEED_PASSWORD
+
+ANONYMOUS, CHEF, CUSTOMER = "anonymous", "chef", "customer"
+
+
+class Route:
+    """How to request one URL name.
+
+    ``kwargs`` and ``data`` are callables taking the BenchmarkContext. A
+    route with ``undo`` is followed, untimed, by that other route so that
+    state-changing requests (booking a seat) can be repeated.
+    """
+
+    def __init__(
+        self,
+        role=ANONYMOUS,
+        kwargs=None,
+        data=None,
+        method="get",
+        relogin=False,
+        undo=None,
+    ):
+        self.role = role
+        self.kwargs = kwargs
+        self.data = data
+        self.method = method
+        self.relogin = relogin
+        self.undo = undo
+
+
+def _token_kwargs(ctx):
+    user = ctx.customer
+    return {
+        "uidb64": urlsafe_base64_encode(force_bytes(user.pk)),
+        "token": default_token_generator.make_token(user),
+    }
+
+
+ROUTES = {
+    # efood_main/urls.py
+    "home": Route(),
+    "recipe_search": Route(data=lambda ctx: {"q": "chicken"}),
+    "recipe_autocomplete": Route(data=lambda ctx: {"q": "chick"}),
+    # accounts/urls.py
+    "register-activation": Route(),
+    "registerUser": Route(),
+    "registerChef": Route(),
+    "login": Route(),
+    "logout": Route(role=CUSTOMER, relogin=True),
+    "customerDashboard": Route(role=CUSTOMER),
+    "chefDashboard": Route(role=CHEF),
+    "activate": Route(kwargs=_token_kwargs),
+    "forgot_password": Route(),
+    "reset_password_validate": Route(kwargs=_token_kwargs),
+    "reset_password": Route(),
+    # chef/urls.py
+    "chef": Route(role=CHEF),
+    "chef_profile": Route(role=CHEF),
+    "recipe_builder": Route(role=CHEF),
+    "recipeitems_by_category": Route(
+        role=CHEF, kwargs=lambda ctx: {"pk": ctx.category.pk}
+    ),
+    "add_category": Route(role=CHEF),
+    "edit_category": Route(role=CHEF, kwargs=lambda ctx: {"pk": ctx.category.pk}),
+    "delete_category": Route(role=CHEF, kwargs=lambda ctx: {"pk": ctx.category.pk}),
+    "add_recipe": Route(role=CHEF),
+    "import_recipes": Route(role=CHEF),
+    "edit_recipe": Route(role=CHEF, kwargs=lambda ctx: {"pk": ctx.recipe.pk}),
+    "delete_recipe": Route(role=CHEF, kwargs=lambda ctx: {"pk": ctx.recipe.pk}),
+    "recipe_detail": Route(
+        role=CHEF, kwargs=lambda ctx: {"slug": ctx.recipe.slug, "id": ctx.recipe.pk}
+    ),
+    "workshop_builder": Route(role=CHEF),
+    "add_workshop": Route(role=CHEF),
+    "edit_workshop": Route(role=CHEF, kwargs=lambda ctx: {"pk": ctx.workshop.pk}),
+    "delete_workshop": Route(role=CHEF, kwargs=lambda ctx: {"pk": ctx.workshop.pk}),
+    "workshop_detail": Route(role=CHEF, kwargs=lambda ctx: {"id": ctx.workshop.pk}),
+    "chef_export": Route(
+        role=CHEF, kwargs=lambda ctx: {"dataset": "recipes", "fmt": "csv"}
+    ),
+    # customers/urls.py
+    "customer": Route(role=CUSTOMER),
+    "workshop-confirmation": Route(role=CUSTOMER),
+    "cust_profile": Route(role=CUSTOMER),
+    "customer_workshop": Route(role=CUSTOMER),
+    "nearby_workshops": Route(
+        role=CUSTOMER,
+        data=lambda ctx: {"lat": ctx.workshop.latitude, "lng": ctx.workshop.longitude},
+    ),
+    "cust-workshop-detail": Route(
+        role=CUSTOMER, kwargs=lambda ctx: {"id": ctx.bookable.pk}
+    ),
+    "book-workshop": Route(
+        role=CUSTOMER,
+        method="post",
+        kwargs=lambda ctx: {"workshop_id": ctx.bookable.pk},
+        undo="cancel_workshop",
+    ),
+    "workshop-checkout": Route(
+        role=CUSTOMER, kwargs=lambda ctx: {"workshop_id": ctx.bookable.pk}
+    ),
+    "cancel_workshop": Route(
+        role=CUSTOMER,
+        method="post",
+        kwargs=lambda ctx: {"workshop_id": ctx.bookable.pk},
+        undo="book-workshop",
+    ),
+    "join-waitlist": Route(
+        role=CUSTOMER,
+        method="post",
+        kwargs=lambda ctx: {"workshop_id": ctx.sold_out.pk},
+        undo="leave-waitlist",
+    ),
+    "leave-waitlist": Route(
+        role=CUSTOMER,
+        method="post",
+        kwargs=lambda ctx: {"workshop_id": ctx.sold_out.pk},
+        undo="join-waitlist",
+    ),
+}
+
+
+def route_names(patterns=None, namespace=None):
+    """Yield every URL name of the project, skipping the admin."""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == "admin":
+                continue
+            yield from route_names(pattern.url_patterns, pattern.namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f"{namespace}:{pattern.name}" if namespace else pattern.name
+
+
+def end_request():
+    """Close connections past CONN_MAX_AGE, as a WSGI server would.
+
+    The test client skips this so that tests keep their transaction; outside
+    a transaction it lets the benchmark see the cost of reconnecting.
+    """
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
+
+
+class BenchmarkContext:
+    """Seeded objects the routes are requested with."""
+
+    def __init__(self, prefix="seed"):
+        seeded = {"user__username__startswith": f"{prefix}-"}
+        chef = (
+            Chef.objects.filter(**seeded, categories__recipeitems__isnull=False)
+            .filter(workshops__isnull=False)
+            .select_related("user")
+            .first()
+        )
+        if chef is None:
+            raise LookupError(
+                f"No seeded chef with recipes and workshops; run 'manage.py seed "
+                f"--prefix {prefix}' first."
+            )
+        self.chef = chef.user
+        self.category = Category.objects.filter(chef=chef).first()
+        self.recipe = RecipeItem.objects.filter(category=self.category).first()
+        self.workshop = Workshop.objects.filter(chef=chef).first()
+
+        customers = User.objects.filter(
+            username__startswith=f"{prefix}-", role=User.CUSTOMER
+        )
+        self.customer = customers.filter(workshopregistration__isnull=False).first()
+        self.customer = self.customer or customers.first()
+        # A workshop with a free seat that the customer has not booked yet
+        self.bookable = (
+            Workshop.objects.bookable()
+            .exclude(
+                id__in=WorkshopRegistration.objects.filter(
+                    customer=self.customer
+                ).values("workshop_id")
+            )
+            .order_by("id")
+            .first()
+        )
+        if self.customer is None or self.bookable is None:
+            raise LookupError("No seeded customer with a bookable workshop.")
+        # One to wait for, if the seed sold any out
+        self.sold_out = (
+            Workshop.objects.sold_out()
+            .exclude(
+                id__in=WorkshopRegistration.objects.filter(
+                    customer=self.customer
+                ).values("workshop_id")
+            )
+            .order_by("id")
+            .first()
+        ) or self.bookable
+
+    def user(self, role):
+        return {CHEF: self.chef, CUSTOMER: self.customer}.get(role)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Benchmark:
+    def __init__(self, ctx, iterations=20, warmup=2, host="localhost"):
+        self.ctx = ctx
+        self.iterations = iterations
+        self.warmup = warmup
+        self.clients = {}
+        self.host = host
+
+    def client(self, role, fresh=False):
+        """A client logged in as ``role``; ``fresh`` ones are not reused."""
+        if fresh or role not in self.clients:
+            client = Client(HTTP_HOST=self.host)
+            user = self.ctx.user(role)
+            if user and not client.login(email=user.email, password=SEED_PASSWORD):
+                raise LookupError(f"Cannot log in as {user.email}.")
+            if fresh:
+                return client
+            self.clients[role] = client
+        return self.clients[role]
+
+    def request(self, name):
+        route = ROUTES[name]
+        client = self.client(route.role, fresh=route.relogin)
+        url = reverse(name, kwargs=route.kwargs(self.ctx) if route.kwargs else None)
+        data = route.data(self.ctx) if route.data else None
+        metrics = RequestMetrics()
+        with instrument(metrics):
+            started = time.perf_counter()
+            response = getattr(client, route.method)(url, data)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - started
+        end_request()
+        if route.undo:
+            undo = ROUTES[route.undo]
+            getattr(client, undo.method)(
+                reverse(
+                    route.undo, kwargs=undo.kwargs(self.ctx) if undo.kwargs else None
+                )
+            )
+            end_request()
+        return elapsed * 1000, metrics.query_count, response.status_code
+
+    def allocations(self, name):
+        """KiB allocated at peak while serving one request."""
+        tracemalloc.start()
+        try:
+            self.request(name)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak / 1024
+
+    def run(self, names):
+        last_outbox_id = OutboxEmail.objects.order_by("-id").values_list(
+            "id", flat=True
+        )
+        last_outbox_id = last_outbox_id.first() or 0
+        results = {}
+        try:
+            for name in names:
+                for _ in range(self.warmup):
+                    self.request(name)
+                samples = [self.request(name) for _ in range(self.iterations)]
+                latencies = [latency for latency, _, _ in samples]
+                results[name] = {
+                    "p50": percentile(latencies, 50),
+                    "p95": percentile(latencies, 95),
+                    "p99": percentile(latencies, 99),
+                    "queries": statistics.median(q for _, q, _ in samples),
+                    "alloc_kib": self.allocations(name),
+                    "status": samples[-1][2],
+                }
+        finally:
+            # Drop the confirmation emails queued by booking seeded workshops
+            OutboxEmail.objects.filter(id__gt=last_outbox_id).delete()
+        return results
+
+
+def compare(results, baseline, tolerance=0.2, noise_ms=2.0):
+    """Return ``(name, message)`` for every route slower or chattier than baseline.
+
+    A route regresses when its p95 grows by more than ``tolerance`` (and by
+    more than ``noise_ms``, to ignore jitter on very fast routes) or when it
+    runs more queries than before.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        limit = max(before["p95"] * (1 + tolerance), before["p95"] + noise_ms)
+        if result["p95"] > limit:
+            regressions.append(
+                (name, f"p95 {before['p95']:.1f} -> {result['p95']:.1f} ms")
+            )
+        if result["queries"] > before["queries"]:
+            regressions.append(
+                (name, f"queries {before['queries']:g} -> {result['queries']:g}")
+            )
+    return regressions
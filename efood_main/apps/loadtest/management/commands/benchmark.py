@@ -0,0 +1,81 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from efood_main.apps.loadtest.benchmark import (
+    ROUTES,
+    Benchmark,
+    BenchmarkContext,
+    compare,
+    route_names,
+)
+
+
+class Command(BaseCommand):
+    help = "Measure latency, queries and allocations of every named route."
+
+    def add_arguments(self, parser):
+        parser.add_argument("routes", nargs="*", help="Only these URL names.")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--prefix", default="seed", help="Seeded data prefix.")
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument(
+            "--compare", help="Fail if results regress against this JSON baseline."
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed p95 slowdown as a fraction of the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        names = list(route_names())
+        missing = [name for name in names if name not in ROUTES]
+        if missing:
+            self.stderr.write(f"No benchmark scenario for: {', '.join(missing)}")
+        names = [name for name in names if name in ROUTES]
+        if options["routes"]:
+            unknown = set(options["routes"]) - set(names)
+            if unknown:
+                raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+            names = options["routes"]
+
+        try:
+            ctx = BenchmarkContext(prefix=options["prefix"])
+        except LookupError as exc:
+            raise CommandError(exc)
+        results = Benchmark(
+            ctx,
+            iterations=options["iterations"],
+            warmup=options["warmup"],
+            host=options["host"],
+        ).run(names)
+
+        self.stdout.write(
+            f"{'route':<26}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'queries':>9}{'alloc KiB':>11}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<26}{r['status']:>7}{r['p50']:>9.1f}{r['p95']:>9.1f}"
+                f"{r['p99']:>9.1f}{r['queries']:>9g}{r['alloc_kib']:>11.0f}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({"iterations": options["iterations"], "routes": results}, f)
+
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)["routes"]
+            regressions = compare(results, baseline, tolerance=options["tolerance"])
+            for name, message in regressions:
+                self.stderr.write(f"REGRESSION {name}: {message}")
+            if regressions:
+                raise CommandError(
+                    f"{len(regressions)} regression(s) against baseline."
+                )
+            self.stdout.write("No regressions against the baseline.")
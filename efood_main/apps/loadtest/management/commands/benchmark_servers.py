@@ -0,0 +1,73 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from efood_main.apps.loadtest.benchmark import ROUTES, Benchmark, BenchmarkContext
+from efood_main.apps.loadtest.servers import ASGI, DEFAULT_ROUTES, WSGI, compare_servers
+
+
+class Command(BaseCommand):
+    help = "Compare WSGI and ASGI throughput of pages served to slow clients."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "routes",
+            nargs="*",
+            help=f"GET URL names (default: {', '.join(DEFAULT_ROUTES)}).",
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--concurrency", type=int, default=50, help="Simultaneous clients."
+        )
+        parser.add_argument(
+            "--threads", type=int, default=4, help="WSGI worker threads."
+        )
+        parser.add_argument(
+            "--client-delay",
+            type=float,
+            default=50,
+            help="Milliseconds each client takes to read a response.",
+        )
+        parser.add_argument("--prefix", default="seed", help="Seeded data prefix.")
+        parser.add_argument("--host", default="localhost")
+
+    def handle(self, *args, **options):
+        names = options["routes"] or DEFAULT_ROUTES
+        unknown = [
+            name for name in names if name not in ROUTES or ROUTES[name].method != "get"
+        ]
+        if unknown:
+            raise CommandError(f"Unknown or non-GET routes: {', '.join(unknown)}")
+        if min(options["requests"], options["concurrency"], options["threads"]) < 1:
+            raise CommandError("--requests, --concurrency and --threads must be >= 1")
+
+        try:
+            ctx = BenchmarkContext(prefix=options["prefix"])
+        except LookupError as exc:
+            raise CommandError(exc)
+        # Under this load every request is "slow"; keep the table readable
+        logging.disable(logging.WARNING)
+        try:
+            results = compare_servers(
+                Benchmark(ctx, host=options["host"]),
+                names,
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                threads=options["threads"],
+                client_delay=options["client_delay"] / 1000,
+                host=options["host"],
+            )
+        finally:
+            logging.disable(logging.NOTSET)
+
+        self.stdout.write(
+            f"{'route':<24}{'mode':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'errors':>8}"
+        )
+        for name, modes in results.items():
+            for mode in (WSGI, ASGI):
+                r = modes[mode]
+                self.stdout.write(
+                    f"{name:<24}{mode:>6}{r['rps']:>9.1f}{r['p50']:>9.1f}"
+                    f"{r['p95']:>9.1f}{r['errors']:>8}"
+                )
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from efood_main.apps.loadtest.utils import SEED_PASSWORD, Seeder
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate a reproducible synthetic data set for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, default=1000)
+        parser.add_argument("--chefs", type=int, default=100)
+        parser.add_argument("--categories-per-chef", type=int, default=5)
+        parser.add_argument("--recipes-per-chef", type=int, default=20)
+        parser.add_argument("--workshops-per-chef", type=int, default=10)
+        parser.add_argument("--registrations", type=int, default=10000)
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed; same seed, same data."
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix of the generated usernames and emails.",
+        )
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete a previous data set with the same prefix first.",
+        )
+
+    def handle(self, *args, **options):
+        verbose = options["verbosity"] > 1
+        seeder = Seeder(
+            prefix=options["prefix"],
+            seed=options["seed"],
+            chunk_size=options["chunk_size"],
+            log=self.stdout.write if verbose else None,
+        )
+        if seeder.exists():
+            if not options["flush"]:
+                raise CommandError(
+                    f"Users prefixed '{options['prefix']}-' already exist; "
+                    "use --flush to replace them or pick another --prefix."
+                )
+            seeder.flush()
+
+        started = time.monotonic()
+        try:
+            seeder.run(
+                customers=options["customers"],
+                chefs=options["chefs"],
+                categories_per_chef=options["categories_per_chef"],
+                recipes_per_chef=options["recipes_per_chef"],
+                workshops_per_chef=options["workshops_per_chef"],
+                registrations=options["registrations"],
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+        self.stdout.write(
+            f"Seeded in {time.monotonic() - started:.1f}s. "
+            f"Every seeded user's password is '{SEED_PASSWORD}'."
+        )
@@ -0,0 +1,221 @@
+"""Throughput of the WSGI and ASGI handlers side by side, in process.
+
+Each mode serves ``requests`` GETs of a route to ``concurrency`` clients that
+are slow to read: after the response headers a client waits ``client_delay``
+seconds before taking the body, like a phone on a poor network. Under WSGI
+one of ``threads`` worker threads (a gthread worker) is tied up for that
+time; under ASGI a single event loop awaits it and serves other requests.
+No server or socket is involved, so the figures compare the handlers and
+views, not a particular server.
+"""
+
+import asyncio
+import io
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.urls import reverse
+
+from .benchmark import ROUTES, percentile
+
+WSGI, ASGI = "wsgi", "asgi"
+DEFAULT_ROUTES = (
+    "home",
+    "recipe_search",
+    "cust-workshop-detail",
+    "customerDashboard",
+    "chefDashboard",
+)
+
+
+class Target:
+    """A GET request of one route, as seen by both handlers."""
+
+    def __init__(self, bench, name, host):
+        route = ROUTES[name]
+        if route.method != "get":
+            raise ValueError(f"{name} is not a GET route")
+        client = bench.client(route.role)
+        self.name = name
+        self.host = host
+        self.path = reverse(
+            name, kwargs=route.kwargs(bench.ctx) if route.kwargs else None
+        )
+        self.query_string = urlencode(route.data(bench.ctx)) if route.data else ""
+        self.cookie = "; ".join(
+            f"{key}={morsel.value}" for key, morsel in client.cookies.items()
+        )
+
+    def environ(self):
+        return {
+            "REQUEST_METHOD": "GET",
+            "SCRIPT_NAME": "",
+            "PATH_INFO": self.path,
+            "QUERY_STRING": self.query_string,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": self.host,
+            "HTTP_COOKIE": self.cookie,
+            "REMOTE_ADDR": "127.0.0.1",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+
+    def scope(self):
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "query_string": self.query_string.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", self.host.encode()),
+                (b"cookie", self.cookie.encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": (self.host, 80),
+        }
+
+
+def summarize(latencies, statuses, elapsed):
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "mean": statistics.fmean(latencies),
+        "errors": sum(1 for status in statuses if status != 200),
+    }
+
+
+def split(requests, concurrency):
+    """How many of ``requests`` each of ``concurrency`` clients sends."""
+    share, extra = divmod(requests, concurrency)
+    return [share + (n < extra) for n in range(concurrency) if share or n < extra]
+
+
+def run_wsgi(target, requests, concurrency, threads, client_delay):
+    app = WSGIHandler()
+    workers = threading.BoundedSemaphore(threads)
+    latencies, statuses = [], []
+    lock = threading.Lock()
+
+    def serve():
+        status = []
+
+        def start_response(line, headers, exc_info=None):
+            status.append(int(line.split(" ", 1)[0]))
+
+        result = app(target.environ(), start_response)
+        try:
+            # The worker blocks writing to the slow client
+            time.sleep(client_delay)
+            for _ in result:
+                pass
+        finally:
+            result.close()
+        return status[0]
+
+    def client(count):
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                with workers:
+                    status = serve()
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    statuses.append(status)
+        finally:
+            connections.close_all()
+
+    clients = [
+        threading.Thread(target=client, args=(count,))
+        for count in split(requests, concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+async def _serve_asgi(app, target, client_delay):
+    status = None
+    request_sent = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Nothing more to send; a disconnect never comes
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            # The event loop serves other requests while this client reads
+            await asyncio.sleep(client_delay)
+        elif not message.get("more_body", False):
+            done.set()
+
+    await app(target.scope(), receive, send)
+    await done.wait()
+    return status
+
+
+async def _run_asgi(target, requests, concurrency, client_delay):
+    app = ASGIHandler()
+    latencies, statuses = [], []
+
+    async def client(count):
+        for _ in range(count):
+            started = time.perf_counter()
+            statuses.append(await _serve_asgi(app, target, client_delay))
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(count) for count in split(requests, concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+def run_asgi(target, requests, concurrency, client_delay):
+    return asyncio.run(_run_asgi(target, requests, concurrency, client_delay))
+
+
+def compare_servers(
+    bench,
+    names=DEFAULT_ROUTES,
+    requests=200,
+    concurrency=50,
+    threads=4,
+    client_delay=0.05,
+    host="localhost",
+):
+    """Return ``{name: {"wsgi": summary, "asgi": summary}}``."""
+    results = {}
+    for name in names:
+        target = Target(bench, name, host)
+        results[name] = {
+            WSGI: run_wsgi(target, requests, concurrency, threads, client_delay),
+            ASGI: run_asgi(target, requests, concurrency, client_delay),
+        }
+    return results
@@ -0,0 +1,132 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase
+
+from efood_main.apps.loadtest.benchmark import (
+    ROUTES,
+    Benchmark,
+    BenchmarkContext,
+    compare,
+    route_names,
+)
+from efood_main.apps.loadtest.servers import ASGI, WSGI, compare_servers, split
+from efood_main.apps.workshop.models import WorkshopRegistration
+
+
+class BenchmarkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "seed",
+            customers=5,
+            chefs=2,
+            categories_per_chef=2,
+            recipes_per_chef=2,
+            workshops_per_chef=3,
+            registrations=4,
+            stdout=StringIO(),
+        )
+
+    def test_every_named_route_has_a_scenario(self):
+        self.assertEqual(set(route_names()) - set(ROUTES), set())
+
+    def test_run_reports_latency_queries_and_allocations(self):
+        ctx = BenchmarkContext()
+        bench = Benchmark(ctx, iterations=3, warmup=0, host="testserver")
+        results = bench.run(["home", "chefDashboard", "book-workshop"])
+        self.assertEqual(results["chefDashboard"]["status"], 200)
+        self.assertGreater(results["chefDashboard"]["queries"], 0)
+        for result in results.values():
+            self.assertLessEqual(result["p50"], result["p99"])
+            self.assertGreater(result["alloc_kib"], 0)
+        # Every booking was undone
+        self.assertFalse(
+            WorkshopRegistration.objects.filter(
+                customer=ctx.customer, workshop=ctx.bookable
+            ).exists()
+        )
+
+    def test_compare_flags_slower_and_chattier_routes(self):
+        baseline = {
+            "a": {"p95": 10.0, "queries": 3},
+            "b": {"p95": 10.0, "queries": 3},
+            "c": {"p95": 0.5, "queries": 3},
+        }
+        results = {
+            "a": {"p95": 11.0, "queries": 3},
+            "b": {"p95": 20.0, "queries": 4},
+            "c": {"p95": 1.5, "queries": 3},
+            "new": {"p95": 99.0, "queries": 9},
+        }
+        self.assertEqual([name for name, _ in compare(results, baseline)], ["b", "b"])
+
+    def test_command_compares_against_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "baseline.json")
+            call_command(
+                "benchmark",
+                "home",
+                iterations=2,
+                host="testserver",
+                output=path,
+                stdout=StringIO(),
+            )
+            with open(path) as f:
+                baseline = json.load(f)
+            baseline["routes"]["home"]["queries"] = -1
+            with open(path, "w") as f:
+                json.dump(baseline, f)
+            with self.assertRaises(CommandError):
+                call_command(
+                    "benchmark",
+                    "home",
+                    iterations=2,
+                    host="testserver",
+                    compare=path,
+                    stdout=StringIO(),
+                    stderr=StringIO(),
+                )
+
+
+class ServerBenchmarkTest(TransactionTestCase):
+    # The handlers run in their own threads, outside a test transaction
+
+    def setUp(self):
+        call_command(
+            "seed",
+            customers=5,
+            chefs=2,
+            categories_per_chef=2,
+            recipes_per_chef=2,
+            workshops_per_chef=3,
+            registrations=4,
+            stdout=StringIO(),
+        )
+
+    def test_split_spreads_requests_over_clients(self):
+        self.assertEqual(split(7, 3), [3, 2, 2])
+        self.assertEqual(split(2, 5), [1, 1])
+
+    def test_both_handlers_serve_the_pages(self):
+        bench = Benchmark(BenchmarkContext(), host="testserver")
+        results = compare_servers(
+            bench,
+            ["home", "cust-workshop-detail", "chefDashboard"],
+            requests=4,
+            concurrency=2,
+            threads=1,
+            client_delay=0,
+            host="testserver",
+        )
+        for modes in results.values():
+            for mode in (WSGI, ASGI):
+                self.assertEqual(modes[mode]["errors"], 0)
+                self.assertGreater(modes[mode]["rps"], 0)
+
+    def test_command_rejects_non_get_routes(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_servers", "book-workshop", stdout=StringIO())
@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from efood_main.apps.accounts.models import User
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.recipe.models import RecipeItem
+from efood_main.apps.workshop.models import Workshop, WorkshopRegistration
+
+
+class QueryIndexTest(TestCase):
+    """The view query shapes are served by the composite and partial indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "seed",
+            customers=20,
+            chefs=4,
+            categories_per_chef=3,
+            recipes_per_chef=10,
+            workshops_per_chef=5,
+            registrations=60,
+            stdout=StringIO(),
+        )
+        cls.chef = Chef.objects.first()
+        cls.customer = User.objects.filter(role=User.CUSTOMER).first()
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+            # The seeded tables are tiny; make the planner show its index choice
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        self.assertIn(index_name, queryset.explain())
+
+    def test_recipes_by_category(self):
+        category = self.chef.categories.first()
+        self.assertUsesIndex(
+            RecipeItem.objects.filter(chef=self.chef, category=category),
+            "recipe_category_chef_idx",
+        )
+
+    def test_chef_recipes_by_date(self):
+        self.assertUsesIndex(
+            RecipeItem.objects.filter(chef=self.chef).order_by("created_at", "id"),
+            "recipe_chef_created_idx",
+        )
+
+    def test_chef_workshops_by_date(self):
+        self.assertUsesIndex(
+            Workshop.objects.filter(chef=self.chef).order_by("-date", "-id"),
+            "workshop_chef_date_idx",
+        )
+
+    def test_workshops_by_date(self):
+        self.assertUsesIndex(
+            Workshop.objects.order_by("-date", "-id")[:10], "workshop_date_idx"
+        )
+
+    def test_active_registrations(self):
+        self.assertUsesIndex(
+            WorkshopRegistration.objects.filter(
+                customer=self.customer, is_canceled=False
+            ),
+            "registration_active_idx",
+        )
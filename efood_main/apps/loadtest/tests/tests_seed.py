@@ -0,0 +1,90 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from efood_main.apps.accounts.models import User, UserProfile
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.loadtest.utils import SEED_PASSWORD, Seeder
+from efood_main.apps.recipe.models import Category, RecipeItem
+from efood_main.apps.workshop.models import Workshop, WorkshopRegistration
+from efood_main.apps.workshop.services import BookingResult, book_workshop
+
+VOLUMES = {
+    "customers": 12,
+    "chefs": 3,
+    "categories_per_chef": 2,
+    "recipes_per_chef": 4,
+    "workshops_per_chef": 2,
+    "registrations": 30,
+    "chunk_size": 5,
+}
+
+
+def seed(**options):
+    call_command("seed", **{**VOLUMES, **options}, stdout=StringIO())
+
+
+class SeedCommandTest(TestCase):
+    def test_creates_requested_volumes(self):
+        seed()
+        self.assertEqual(User.objects.filter(role=User.CUSTOMER).count(), 12)
+        self.assertEqual(UserProfile.objects.count(), 15)
+        self.assertEqual(Chef.objects.count(), 3)
+        self.assertEqual(Category.objects.count(), 6)
+        self.assertEqual(RecipeItem.objects.count(), 12)
+        self.assertEqual(Workshop.objects.exclude(geohash=None).count(), 6)
+        self.assertEqual(WorkshopRegistration.objects.count(), 30)
+        self.assertFalse(RecipeItem.objects.filter(search_vector=None).exists())
+        chef = Chef.objects.first()
+        self.assertEqual((chef.category_count, chef.recipe_count), (2, 4))
+
+    def test_is_deterministic(self):
+        seed(prefix="one", seed=7)
+        seed(prefix="two", seed=7)
+        one, two = (
+            list(
+                RecipeItem.objects.filter(chef__user__username__startswith=prefix)
+                .order_by("id")
+                .values_list("recipe_title", "preparation_time")
+            )
+            for prefix in ("one-", "two-")
+        )
+        self.assertEqual(one, two)
+
+    def test_seeded_users_can_log_in(self):
+        seed()
+        user = User.objects.get(username="seed-customer-0")
+        self.assertTrue(user.check_password(SEED_PASSWORD))
+
+    def test_refuses_to_reseed_without_flush(self):
+        seed()
+        with self.assertRaises(CommandError):
+            seed()
+        seed(flush=True, registrations=0)
+        self.assertEqual(WorkshopRegistration.objects.count(), 0)
+
+    def test_flush_deletes_the_data_set_and_recounts_what_it_booked(self):
+        seed(prefix="keep", registrations=0)
+        seed()
+        workshop = Workshop.objects.filter(chef__user__username="keep-chef-0").first()
+        Workshop.objects.filter(pk=workshop.pk).update(
+            date=date.today(), max_capacity=1
+        )
+        customer = User.objects.get(username="seed-customer-0")
+        self.assertIs(book_workshop(customer, workshop), BookingResult.BOOKED)
+        self.assertEqual(workshop.chef.upcoming_booking_count, 1)
+
+        Seeder(prefix="seed").flush()
+        self.assertFalse(User.objects.filter(username__startswith="seed-").exists())
+        self.assertEqual(Chef.objects.count(), 3)
+        self.assertEqual(Workshop.objects.count(), 6)
+        self.assertEqual(UserProfile.objects.count(), 15)
+        workshop.refresh_from_db()
+        self.assertEqual(workshop.seats_taken, 0)
+        self.assertEqual(workshop.chef.upcoming_booking_count, 0)
+
+    def test_too_many_registrations(self):
+        with self.assertRaises(CommandError):
+            seed(registrations=1000)
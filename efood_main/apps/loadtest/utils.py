@@ -0,0 +1,368 @@
+import io
+import random
+from datetime import date, time, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from efood_main.apps.accounts.models import User, UserProfile
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.recipe.cache import invalidate
+from efood_main.apps.recipe.models import Category, RecipeItem
+from efood_main.apps.workshop import geo
+from efood_main.apps.workshop.models import (
+    SeatHold,
+    WaitlistEntry,
+    Workshop,
+    WorkshopRegistration,
+)
+
+SEED_PASSWORD = "seed-password"
+
+CATEGORY_NAMES = [
+    "Breakfast",
+    "Soups",
+    "Salads",
+    "Pasta",
+    "Seafood",
+    "Vegetarian",
+    "Grill",
+    "Baking",
+    "Desserts",
+    "Drinks",
+]
+DISHES = [
+    "risotto",
+    "curry",
+    "lasagna",
+    "tacos",
+    "pancakes",
+    "paella",
+    "ramen",
+    "gnocchi",
+    "tart",
+    "stew",
+    "dumplings",
+    "burger",
+]
+INGREDIENTS = [
+    "tomato",
+    "garlic",
+    "onion",
+    "basil",
+    "chicken",
+    "salmon",
+    "mushroom",
+    "lemon",
+    "rice",
+    "flour",
+    "butter",
+    "chili",
+    "spinach",
+    "cheese",
+    "potato",
+    "ginger",
+]
+# Workshops are scattered around these (latitude, longitude) points
+CITIES = [
+    (40.7128, -74.0060),
+    (51.5074, -0.1278),
+    (48.8566, 2.3522),
+    (41.9028, 12.4964),
+    (35.6762, 139.6503),
+    (-33.8688, 151.2093),
+]
+
+
+def seed_username(prefix, role, number):
+    return f"{prefix}-{role}-{number}"
+
+
+def seed_email(prefix, role, number):
+    return f"{seed_username(prefix, role, number)}@example.com"
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Seeder:
+    """Bulk-insert a synthetic, reproducible data set.
+
+    Rows are built lazily and written with ``bulk_create`` in chunks of
+    ``chunk_size``, so memory stays flat and no per-row signal fires: user
+    profiles are created explicitly, and the recipe search vectors, chef
+    counters and page cache are refreshed once at the end. Everything is named after
+    ``prefix`` so a data set can be told apart from real accounts.
+    """
+
+    def __init__(self, prefix="seed", seed=0, chunk_size=5000, log=None):
+        self.prefix = prefix
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.today = date.today()
+
+    def exists(self):
+        return User.objects.filter(username__startswith=f"{self.prefix}-").exists()
+
+    def flush(self):
+        """Delete the data set with one DELETE per table, children first.
+
+        ``QuerySet.delete()`` would load every row to cascade and send its
+        signals, which takes hours at the volumes seeded. Other workshops the
+        seeded customers booked get their seats and chef counters recounted.
+        """
+        users = User.objects.filter(username__startswith=f"{self.prefix}-")
+        chefs = Chef.objects.filter(user__in=users)
+        workshops = Workshop.objects.filter(
+            Q(chef__in=chefs) | Q(recipe__chef__in=chefs)
+        )
+        booked = Q(customer__in=users) | Q(workshop__in=workshops)
+        seat_models = (WorkshopRegistration, WaitlistEntry, SeatHold)
+        with transaction.atomic():
+            touched = set()
+            for model in seat_models:
+                touched.update(
+                    model.objects.filter(customer__in=users)
+                    .exclude(workshop__in=workshops)
+                    .values_list("workshop_id", flat=True)
+                    .distinct()
+                )
+            for queryset in (
+                *(model.objects.filter(booked) for model in seat_models),
+                workshops,
+                RecipeItem.objects.filter(chef__in=chefs),
+                Category.objects.filter(chef__in=chefs),
+                chefs,
+                UserProfile.objects.filter(user__in=users),
+                LogEntry.objects.filter(user__in=users),
+                users,
+            ):
+                queryset._raw_delete(queryset.db)
+            Workshop.objects.filter(pk__in=touched).refresh_seats_taken()
+            Chef.objects.filter(workshops__in=touched).distinct().refresh_counters()
+        invalidate()
+
+    def run(
+        self,
+        customers,
+        chefs,
+        categories_per_chef,
+        recipes_per_chef,
+        workshops_per_chef,
+        registrations,
+    ):
+        password = make_password(SEED_PASSWORD)
+        customer_ids = [
+            user_id
+            for user_id, _ in self.create_users(User.CUSTOMER, customers, password)
+        ]
+        chef_ids = self.create_chefs(self.create_users(User.CHEF, chefs, password))
+        categories = self.create_categories(chef_ids, categories_per_chef)
+        self.create_recipes(categories, recipes_per_chef)
+        workshop_ids = self.create_workshops(
+            chef_ids, workshops_per_chef, registrations
+        )
+        self.create_registrations(customer_ids, workshop_ids, registrations)
+
+        # bulk_create sends no signals, so refresh what they would maintain
+        seeded_chefs = Chef.objects.filter(user__username__startswith=f"{self.prefix}-")
+        RecipeItem.objects.filter(chef__in=seeded_chefs).update_search_vector()
+        seeded_chefs.refresh_counters()
+        invalidate()
+
+    def bulk_create(self, model, objs):
+        """Insert ``objs`` chunk by chunk, yielding each saved chunk."""
+        total = 0
+        for chunk in chunked(objs, self.chunk_size):
+            yield model.objects.bulk_create(chunk)
+            total += len(chunk)
+            self.log(f"{model.__name__}: {total}")
+
+    def create_users(self, role, count, password):
+        """Return ``(user_id, profile_id)`` pairs."""
+        name = "chef" if role == User.CHEF else "customer"
+        pairs = []
+        users = self.bulk_create(
+            User,
+            (
+                User(
+                    username=seed_username(self.prefix, name, n),
+                    email=seed_email(self.prefix, name, n),
+                    first_name=name.capitalize(),
+                    last_name=str(n),
+                    password=password,
+                    role=role,
+                    is_active=True,
+                )
+                for n in range(count)
+            ),
+        )
+        for chunk in users:
+            profiles = UserProfile.objects.bulk_create(
+                [UserProfile(user_id=user.id) for user in chunk]
+            )
+            pairs.extend(
+                (user.id, profile.id) for user, profile in zip(chunk, profiles)
+            )
+        return pairs
+
+    def create_chefs(self, users):
+        chefs = self.bulk_create(
+            Chef,
+            (
+                Chef(
+                    user_id=user_id,
+                    user_profile_id=profile_id,
+                    chef_name=f"Chef {n}",
+                    # Only the name is stored; templates need it for .url
+                    chef_license=f"chef/license/{self.prefix}-{n}.png",
+                    is_approved=True,
+                )
+                for n, (user_id, profile_id) in enumerate(users)
+            ),
+        )
+        return [chef.id for chunk in chefs for chef in chunk]
+
+    def create_categories(self, chef_ids, per_chef):
+        """Return ``{chef_id: [category_id, ...]}``."""
+
+        def names():
+            for n in range(per_chef):
+                name = CATEGORY_NAMES[n % len(CATEGORY_NAMES)]
+                yield name if n < len(CATEGORY_NAMES) else f"{name} {n}"
+
+        categories = self.bulk_create(
+            Category,
+            (
+                Category(chef_id=chef_id, category_name=name, slug=slugify(name))
+                for chef_id in chef_ids
+                for name in names()
+            ),
+        )
+        by_chef = {}
+        for category in (c for chunk in categories for c in chunk):
+            by_chef.setdefault(category.chef_id, []).append(category.id)
+        return by_chef
+
+    def create_recipes(self, categories, per_chef):
+        rng = self.rng
+
+        def recipes():
+            for chef_id, category_ids in categories.items():
+                for _ in range(per_chef):
+                    title = (
+                        f"{rng.choice(INGREDIENTS).capitalize()} {rng.choice(DISHES)}"
+                    )
+                    yield RecipeItem(
+                        chef_id=chef_id,
+                        category_id=rng.choice(category_ids),
+                        recipe_title=title,
+                        slug=slugify(title),
+                        recipe_ingredients=", ".join(rng.sample(INGREDIENTS, 5)),
+                        recipe_instructions="Mix everything and cook slowly.",
+                        preparation_time=timedelta(minutes=rng.randrange(5, 180, 5)),
+                        image=f"recipe_images/{self.prefix}.jpg",
+                    )
+
+        return sum(len(chunk) for chunk in self.bulk_create(RecipeItem, recipes()))
+
+    def create_workshops(self, chef_ids, per_chef, registrations=0):
+        """Each workshop counts the seats ``create_registrations`` will book."""
+        rng = self.rng
+        per_workshop, extra = divmod(registrations, len(chef_ids) * per_chef or 1)
+
+        def workshops():
+            for n, chef_id in enumerate(chef_ids):
+                for i in range(per_chef):
+                    taken = per_workshop + (n * per_chef + i < extra)
+                    lat, lng = rng.choice(CITIES)
+                    lat += rng.uniform(-0.2, 0.2)
+                    lng += rng.uniform(-0.2, 0.2)
+                    yield Workshop(
+                        chef_id=chef_id,
+                        title=f"{rng.choice(DISHES).capitalize()} workshop",
+                        description="Learn to cook a classic from scratch.",
+                        date=self.today + timedelta(days=rng.randint(-180, 180)),
+                        time=time(rng.randint(9, 20)),
+                        max_capacity=taken + rng.randint(0, 40),
+                        seats_taken=taken,
+                        price=Decimal(rng.randrange(1000, 15000)) / 100,
+                        latitude=lat,
+                        longitude=lng,
+                        geohash=geo.encode(lat, lng),
+                    )
+
+        return [
+            workshop.id
+            for chunk in self.bulk_create(Workshop, workshops())
+            for workshop in chunk
+        ]
+
+    def create_registrations(self, customer_ids, workshop_ids, count):
+        """Spread ``count`` distinct (customer, workshop) pairs evenly."""
+        if not count:
+            return 0
+        if count > len(customer_ids) * len(workshop_ids):
+            raise ValueError("Not enough customers and workshops for the registrations")
+        # The i-th registration of workshop w goes to customer (i + offset[w]),
+        # which never repeats a pair and needs no lookups
+        offsets = [self.rng.randrange(len(customer_ids)) for _ in workshop_ids]
+        workshops = len(workshop_ids)
+
+        def registrations():
+            for n in range(count):
+                w, i = n % workshops, n // workshops
+                yield {
+                    "customer_id": customer_ids[(i + offsets[w]) % len(customer_ids)],
+                    "workshop_id": workshop_ids[w],
+                }
+
+        return self.copy_rows(WorkshopRegistration, registrations())
+
+    def copy_rows(self, model, rows):
+        """Stream ``rows`` (dicts of attname -> value) into ``model``'s table.
+
+        Building model instances and INSERT statements dominates bulk_create
+        at tens of millions of rows, so the largest table goes through
+        PostgreSQL's COPY instead. Fields missing from a row get their default.
+        """
+        fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+        defaults = {f.attname: f.get_default() for f in fields}
+        columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+        sql = f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN"
+
+        def encode(value):
+            if value is None:
+                return "\\N"
+            if isinstance(value, bool):
+                return "t" if value else "f"
+            return (
+                str(value)
+                .replace("\\", "\\\\")
+                .replace("\t", "\\t")
+                .replace("\n", "\\n")
+            )
+
+        total = 0
+        with connection.cursor() as cursor:
+            for chunk in chunked(rows, self.chunk_size):
+                buffer = io.StringIO()
+                for row in chunk:
+                    values = {**defaults, **row}
+                    buffer.write(
+                        "\t".join(encode(values[f.attname]) for f in fields) + "\n"
+                    )
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+                total += len(chunk)
+                self.log(f"{model.__name__}: {total}")
+        return total
@@ -0,0 +1,44 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from efood_main.apps.mailer.utils import dispatch_batch
+
+
+class Command(BaseCommand):
+    help = "Send the emails waiting in the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of exiting once it is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep between polls when the outbox is empty.",
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection()
+        total = 0
+        try:
+            while True:
+                sent = dispatch_batch(options["batch_size"], connection=connection)
+                total += sent
+                if sent:
+                    continue
+                if not options["loop"]:
+                    break
+                # Do not hold an idle SMTP session open between polls
+                connection.close()
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+        self.stdout.write(f"Processed {total} queued email(s).")
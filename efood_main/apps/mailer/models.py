@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEmail(models.Model):
+    PENDING = 1
+    SENT = 2
+    FAILED = 3
+
+    STATUS_CHOICE = (
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField()
+    content_subtype = models.CharField(max_length=10, default="plain")
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICE, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status=1),
+                name="mailer_outbox_due_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
+
+    def to_message(self, connection=None):
+        message = EmailMessage(
+            self.subject, self.body, self.from_email, self.to, connection=connection
+        )
+        message.content_subtype = self.content_subtype
+        return message
+
+    def mark_sent(self):
+        self.status = self.SENT
+        self.attempts += 1
+        self.sent_at = timezone.now()
+        self.last_error = ""
+
+    def mark_failed(self, error):
+        """Schedule a retry with exponential backoff, or give up."""
+        self.attempts += 1
+        self.last_error = str(error)
+        if self.attempts >= settings.MAILER_MAX_ATTEMPTS:
+            self.status = self.FAILED
+        else:
+            delay = settings.MAILER_RETRY_BACKOFF * 2 ** (self.attempts - 1)
+            self.next_attempt_at = timezone.now() + timedelta(seconds=delay)
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from efood_main.apps.mailer.models import OutboxEmail
+from efood_main.apps.mailer.utils import dispatch_batch, enqueue_email
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise SMTPException("Mail server unavailable")
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class CrashingBackend(EmailBackend):
+    """Delivers the first message, then the worker dies."""
+
+    def send_messages(self, messages):
+        if mail.outbox:
+            raise SystemExit
+        return super().send_messages(messages)
+
+
+class OutboxTest(TestCase):
+    def enqueue(self, subject="Hello"):
+        return enqueue_email(
+            subject, "<p>Hi</p>", "from@example.com", ["to@example.com"]
+        )
+
+    def test_enqueue_does_not_send(self):
+        self.enqueue()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.PENDING)
+
+    def test_dispatch_sends_and_marks_sent(self):
+        self.enqueue()
+        self.assertEqual(dispatch_batch(), 1)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, OutboxEmail.SENT)
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(mail.outbox[0].to, ["to@example.com"])
+        self.assertEqual(dispatch_batch(), 0)
+
+    def test_batch_reuses_a_single_connection(self):
+        for i in range(3):
+            self.enqueue(f"Hello {i}")
+        CountingBackend.opened = 0
+        dispatch_batch(connection=CountingBackend())
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(MAILER_MAX_ATTEMPTS=2, MAILER_RETRY_BACKOFF=60)
+    def test_failure_backs_off_then_gives_up(self):
+        self.enqueue()
+        dispatch_batch(connection=FailingBackend())
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, OutboxEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn("unavailable", email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        # Not due yet, so the next pass leaves it alone
+        self.assertEqual(dispatch_batch(connection=FailingBackend()), 0)
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now() - timedelta(1))
+        dispatch_batch(connection=FailingBackend())
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.FAILED)
+
+    def test_crash_keeps_delivered_emails_sent_and_leases_the_rest(self):
+        for i in range(3):
+            self.enqueue(f"Hello {i}")
+        with self.assertRaises(SystemExit):
+            dispatch_batch(connection=CrashingBackend())
+        self.assertEqual(len(mail.outbox), 1)
+        statuses = OutboxEmail.objects.order_by("id").values_list("status", flat=True)
+        self.assertEqual(
+            list(statuses), [OutboxEmail.SENT, OutboxEmail.PENDING, OutboxEmail.PENDING]
+        )
+        # The other two stay leased to the dead worker until the lease runs out
+        self.assertEqual(dispatch_batch(), 0)
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch_batch(), 2)
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            ["Hello 0", "Hello 1", "Hello 2"],
+        )
+
+    def test_send_queued_mail_command_drains_outbox(self):
+        for i in range(5):
+            self.enqueue(f"Hello {i}")
+        out = StringIO()
+        call_command("send_queued_mail", batch_size=2, stdout=out)
+        self.assertIn("Processed 5", out.getvalue())
+        self.assertEqual(len(mail.outbox), 5)
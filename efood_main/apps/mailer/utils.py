@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def enqueue_email(subject, body, from_email, to, content_subtype="plain"):
+    """Store an email for the dispatcher instead of sending it in the request.
+
+    Call it inside the transaction of the triggering action so the email is
+    only ever queued if that action commits.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        content_subtype=content_subtype,
+    )
+
+
+OUTCOME_FIELDS = ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+
+
+def claim_batch(batch_size):
+    """Lease up to ``batch_size`` due emails to this worker and return them.
+
+    Rows are claimed with ``SKIP LOCKED`` in a short transaction that pushes
+    their ``next_attempt_at`` past the lease, so other workers leave them
+    alone while they are sent, and they come due again if this one dies.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + timedelta(seconds=settings.MAILER_LEASE_SECONDS)
+        )
+    return emails
+
+
+def dispatch_batch(batch_size=100, connection=None):
+    """Send up to ``batch_size`` due emails over a single connection.
+
+    The emails are sent outside any transaction and each outcome is saved
+    as soon as it is known, so a crash halfway resends none of the emails
+    already delivered. Several workers can drain the outbox side by side.
+    Returns the number of emails processed.
+    """
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0
+
+    owns_connection = connection is None
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        for email in emails:
+            email.mark_failed(exc)
+            email.save(update_fields=OUTCOME_FIELDS)
+        return len(emails)
+
+    try:
+        for email in emails:
+            try:
+                email.to_message(connection).send()
+            except Exception as exc:
+                email.mark_failed(exc)
+            else:
+                email.mark_sent()
+            email.save(update_fields=OUTCOME_FIELDS)
+    finally:
+        # A connection handed in by the caller stays open for reuse
+        if owns_connection:
+            connection.close()
+    return len(emails)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RecipeConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "efood_main.apps.recipe"
+
+    def ready(self):
+        import efood_main.apps.recipe.signals  # noqa
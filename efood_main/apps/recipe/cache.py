@@ -0,0 +1,166 @@
+"""Result cache for the public recipe pages.
+
+Every entry key embeds a generation number that is bumped whenever a
+RecipeItem or Category changes, so a single ``incr`` invalidates all cached
+pages at once. Concurrent misses on the same key are collapsed: one caller
+recomputes while the others serve the entry's previous value, kept for
+``STALE_TIMEOUT`` across generations. Without one they wait at most
+``WAIT_TIMEOUT`` for the result and then compute it themselves, so a worker
+is never held for long. ``acached`` is the same for async views, awaiting
+the cache and an async ``compute`` instead of blocking.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+GENERATION_KEY = "recipe-cache:generation"
+LOCK_TIMEOUT = 10
+STALE_TIMEOUT = 60 * 60
+WAIT_TIMEOUT = 0.1
+WAIT_INTERVAL = 0.02
+
+_MISSING = object()
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _record(name, outcome):
+    with _stats_lock:
+        _stats[(name, outcome)] += 1
+
+
+def cache_stats():
+    """Return ``{name: {"hits": n, "misses": n}}`` for this process."""
+    with _stats_lock:
+        stats = {}
+        for (name, outcome), count in _stats.items():
+            stats.setdefault(name, {"hits": 0, "misses": 0})[outcome] = count
+        return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def invalidate():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+
+
+async def aget_generation():
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, 1, timeout=None)
+        generation = await cache.aget(GENERATION_KEY, 1)
+    return generation
+
+
+def _key(name, key, generation):
+    digest = hashlib.md5(str(key).encode(), usedforsecurity=False).hexdigest()
+    return f"recipe-cache:{name}:{generation}:{digest}"
+
+
+def _stale_key(cache_key):
+    """The key of the entry's last value, whatever its generation."""
+    prefix, name, _, digest = cache_key.split(":")
+    return f"{prefix}:{name}:stale:{digest}"
+
+
+def make_key(name, key=""):
+    return _key(name, key, get_generation())
+
+
+async def amake_key(name, key=""):
+    return _key(name, key, await aget_generation())
+
+
+def cached(name, key, compute):
+    """Return ``compute()`` cached under ``name``/``key``.
+
+    ``name`` selects the timeout from ``settings.RECIPE_CACHE_TIMEOUTS``; a
+    missing or zero timeout disables caching for it.
+    """
+    timeout = settings.RECIPE_CACHE_TIMEOUTS.get(name)
+    if not timeout:
+        return compute()
+
+    cache_key = make_key(name, key)
+    value = cache.get(cache_key, _MISSING)
+    if value is not _MISSING:
+        _record(name, "hits")
+        return value
+    _record(name, "misses")
+
+    lock_key = f"{cache_key}:lock"
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(cache_key, value, timeout)
+            cache.set(_stale_key(cache_key), value, STALE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    # Another worker is already recomputing this entry
+    value = cache.get(_stale_key(cache_key), _MISSING)
+    if value is not _MISSING:
+        return value
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        value = cache.get(cache_key, _MISSING)
+        if value is not _MISSING:
+            return value
+    return compute()
+
+
+async def acached(name, key, compute):
+    """Async ``cached``: return ``await compute()`` cached under ``name``/``key``."""
+    timeout = settings.RECIPE_CACHE_TIMEOUTS.get(name)
+    if not timeout:
+        return await compute()
+
+    cache_key = await amake_key(name, key)
+    value = await cache.aget(cache_key, _MISSING)
+    if value is not _MISSING:
+        _record(name, "hits")
+        return value
+    _record(name, "misses")
+
+    lock_key = f"{cache_key}:lock"
+    if await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = await compute()
+            await cache.aset(cache_key, value, timeout)
+            await cache.aset(_stale_key(cache_key), value, STALE_TIMEOUT)
+        finally:
+            await cache.adelete(lock_key)
+        return value
+
+    value = await cache.aget(_stale_key(cache_key), _MISSING)
+    if value is not _MISSING:
+        return value
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(WAIT_INTERVAL)
+        value = await cache.aget(cache_key, _MISSING)
+        if value is not _MISSING:
+            return value
+    return await compute()
@@ -0,0 +1,241 @@
+"""In-process prefix index of recipe titles and category names for autocomplete.
+
+Each worker holds the distinct titles and category names in memory and
+completes a prefix without touching the database. The index is built from
+one streaming query, at worker start (see ``wsgi.py``) or on first use, and
+then kept current by changes: every committed save or delete of a recipe or
+category records ``(kind, text, rows)``, how many rows have that text once it
+committed, under a version number in the shared cache. Before answering, a
+worker compares its version with the cache's and replays the changes it has
+not seen, or rebuilds when they have expired. Replaying a count rather than a
+``+1`` makes a change the index already holds harmless, like one committed
+while the index was being built.
+"""
+
+import bisect
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import Count, Value
+
+from .models import Category, RecipeItem
+
+logger = logging.getLogger(__name__)
+
+TITLES = "titles"
+CATEGORIES = "categories"
+VERSION_KEY = "recipe-completion:version"
+CHANGE_KEY = "recipe-completion:change:{}"
+CHANGE_TIMEOUT = 60 * 60
+# A worker further behind than this rebuilds rather than replaying
+MAX_REPLAY = 1000
+CHUNK_SIZE = 5000
+# The model and field each kind completes
+SOURCES = [
+    (TITLES, RecipeItem, "recipe_title"),
+    (CATEGORIES, Category, "category_name"),
+]
+
+
+def normalize(text):
+    return " ".join(text.split()).casefold()
+
+
+class PrefixIndex:
+    """Distinct strings, completed by prefix with a binary search.
+
+    A sorted list of normalized keys finds the keys under a prefix in
+    O(log n) and takes a fraction of the memory of a trie of per-character
+    nodes. Each key keeps the spelling it was first added with and how many
+    rows have it, so it is dropped with the last of them; ``counts`` holds
+    the rows of each exact text.
+    """
+
+    def __init__(self, counts=None):
+        self.entries = {}
+        self.counts = dict(counts or {})
+        for text, count in self.counts.items():
+            key = normalize(text)
+            spelling, total = self.entries.get(key, (text, 0))
+            self.entries[key] = (spelling, total + count)
+        self.keys = sorted(self.entries)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def set(self, text, count):
+        """Record that ``count`` rows have exactly ``text``."""
+        key = normalize(text)
+        if not key:
+            return
+        delta = count - self.counts.pop(text, 0)
+        if count:
+            self.counts[text] = count
+        spelling, total = self.entries.get(key, (text, 0))
+        if total + delta > 0:
+            if not total:
+                bisect.insort(self.keys, key)
+            self.entries[key] = (spelling, total + delta)
+        elif total:
+            del self.entries[key]
+            del self.keys[bisect.bisect_left(self.keys, key)]
+
+    def complete(self, prefix, limit):
+        """Up to ``limit`` spellings whose key starts with ``prefix``, A to Z."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results = []
+        start = bisect.bisect_left(self.keys, prefix)
+        for position in range(start, min(start + limit, len(self.keys))):
+            key = self.keys[position]
+            if not key.startswith(prefix):
+                break
+            results.append(self.entries[key][0])
+        return results
+
+
+class CompletionIndex:
+    def __init__(self):
+        self.indexes = {TITLES: PrefixIndex(), CATEGORIES: PrefixIndex()}
+        # The change version the indexes reflect; None until built
+        self.version = None
+        # Held only to read or change the indexes, never during a query
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+
+    def build(self):
+        """Load every title and category name with one streaming query."""
+        with self.build_lock:
+            # Changes committed while the rows stream in are replayed later;
+            # those the rows already include set the counts they have
+            version = current_version()
+            if self.version == version:
+                # Built by another thread while this one waited
+                return
+            counts = {TITLES: {}, CATEGORIES: {}}
+            titles = RecipeItem.objects.annotate(kind=Value(TITLES)).values_list(
+                "kind", "recipe_title"
+            )
+            categories = Category.objects.annotate(kind=Value(CATEGORIES)).values_list(
+                "kind", "category_name"
+            )
+            rows = titles.union(categories, all=True).iterator(chunk_size=CHUNK_SIZE)
+            for kind, text in rows:
+                counts[kind][text] = counts[kind].get(text, 0) + 1
+            indexes = {kind: PrefixIndex(counts[kind]) for kind in counts}
+            with self.lock:
+                self.indexes, self.version = indexes, version
+
+    @property
+    def ready(self):
+        return self.version is not None
+
+    @property
+    def building(self):
+        return self.build_lock.locked()
+
+    def warm(self):
+        """Build now, at worker start; if that fails the first query builds."""
+        try:
+            self.build()
+        except DatabaseError:
+            logger.exception("Could not build the completion index")
+        finally:
+            # Before a worker's first request, perhaps in its own thread
+            connection.close()
+
+    def clear(self):
+        with self.lock:
+            self.indexes = {TITLES: PrefixIndex(), CATEGORIES: PrefixIndex()}
+            self.version = None
+
+    def apply(self, changes):
+        for kind, text, count in changes:
+            self.indexes[kind].set(text, count)
+
+    def record(self, version, changes):
+        """Apply this process's own change ``version`` if it is the next one."""
+        with self.lock:
+            if self.version is not None and self.version == version - 1:
+                self.apply(changes)
+                self.version = version
+
+    def sync(self, current=None):
+        """Catch up with the changes other processes have recorded."""
+        if current is None:
+            current = current_version()
+        version = self.version
+        if version == current:
+            return
+        if version is None or not 0 < current - version <= MAX_REPLAY:
+            # Never built, too far behind, or the cache was reset
+            self.build()
+            return
+        versions = range(version + 1, current + 1)
+        found = cache.get_many([CHANGE_KEY.format(v) for v in versions])
+        if len(found) < len(versions):
+            self.build()
+            return
+        with self.lock:
+            if self.version != version:
+                # Moved on meanwhile; the next query checks again
+                return
+            for v in versions:
+                self.apply(found[CHANGE_KEY.format(v)])
+            self.version = current
+
+    async def async_sync(self):
+        current = await cache.aget(VERSION_KEY, 0)
+        if current != self.version:
+            await sync_to_async(self.sync)(current)
+
+    def complete(self, kind, prefix, limit):
+        with self.lock:
+            return self.indexes[kind].complete(prefix, limit)
+
+
+completion_index = CompletionIndex()
+
+
+def current_version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def count_rows(texts):
+    """``[(kind, text, rows)]`` for ``[(kind, text), ...]``, with one query a kind."""
+    counts = {}
+    for kind, model, field in SOURCES:
+        wanted = {text for text_kind, text in texts if text_kind == kind}
+        if wanted:
+            rows = (
+                model.objects.filter(**{f"{field}__in": wanted})
+                .order_by()
+                .values_list(field)
+                .annotate(rows=Count("pk"))
+            )
+            counts.update(((kind, text), number) for text, number in rows)
+    return [
+        (kind, text, counts.get((kind, text), 0)) for kind, text in dict.fromkeys(texts)
+    ]
+
+
+def record_changes(texts):
+    """Publish the row counts of ``[(kind, text), ...]`` to every process.
+
+    Call it once the rows have committed. The counts are read after the
+    version is taken, so each one includes every change of a lower version.
+    """
+    if not texts:
+        return
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        version = cache.incr(VERSION_KEY)
+    changes = count_rows(texts)
+    cache.set(CHANGE_KEY.format(version), changes, CHANGE_TIMEOUT)
+    completion_index.record(version, changes)
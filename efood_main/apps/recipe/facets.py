@@ -0,0 +1,205 @@
+"""Facets of the recipe search: category, chef and preparation time.
+
+The query string selects facet values, ``?q=soup&category=Dessert&chef=3&time=15-30``:
+values of one facet are ORed, facets are ANDed. ``count_facets`` counts every
+facet's values with a single ``GROUPING SETS`` query over the search matches.
+Each value is counted with the filters of the other facets applied but not its
+own, so that picking a category still shows how many matches the other
+categories have. The grouping is on ids; names are joined to the few grouped
+rows afterwards.
+"""
+
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import BooleanField, Case, ExpressionWrapper, Q, Value, When
+
+from efood_main.apps.chef.models import Chef
+
+from .models import Category
+
+CATEGORY = "category"
+CHEF = "chef"
+TIME = "time"
+FACET_LABELS = {CATEGORY: "Category", CHEF: "Chef", TIME: "Preparation time"}
+# (value, label, upper bound) in order; each bucket starts where the last ends
+PREP_TIME_BUCKETS = [
+    ("under-15", "Under 15 min", timedelta(minutes=15)),
+    ("15-30", "15 to 30 min", timedelta(minutes=30)),
+    ("30-60", "30 to 60 min", timedelta(hours=1)),
+    ("over-60", "Over an hour", None),
+]
+# Most frequent values listed per facet, besides the selected ones
+MAX_OPTIONS = 10
+MAX_SELECTED = 20
+
+FACET_SQL = """
+SELECT counts.*, category.category_name, chef.chef_name
+FROM (
+    SELECT
+        category_id,
+        chef_id,
+        prep_time,
+        GROUPING(category_id, chef_id, prep_time) AS grouping_set,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE in_chef AND in_time) AS by_category,
+        COUNT(*) FILTER (WHERE in_category AND in_time) AS by_chef,
+        COUNT(*) FILTER (WHERE in_category AND in_chef) AS by_time,
+        COUNT(*) FILTER (WHERE in_category AND in_chef AND in_time) AS matches
+    FROM ({matches}) AS matches
+    GROUP BY GROUPING SETS ((category_id), (chef_id), (prep_time), ())
+) AS counts
+LEFT JOIN {category} AS category ON category.id = counts.category_id
+LEFT JOIN {chef} AS chef ON chef.id = counts.chef_id
+"""
+# GROUPING() sets a bit for each column a row is not grouped by
+BY_CATEGORY, BY_CHEF, BY_TIME = 0b011, 0b101, 0b110
+
+
+def parse_filters(params):
+    """``{facet: (value, ...)}`` of the valid values selected in ``params``."""
+    buckets = {value for value, _, _ in PREP_TIME_BUCKETS}
+    categories = {value.strip() for value in params.getlist(CATEGORY)}
+    chefs = {value for value in params.getlist(CHEF) if value.isdigit()}
+    times = {value for value in params.getlist(TIME) if value in buckets}
+    return {
+        CATEGORY: tuple(sorted(value for value in categories if value))[:MAX_SELECTED],
+        CHEF: tuple(sorted(int(value) for value in chefs))[:MAX_SELECTED],
+        TIME: tuple(sorted(times)),
+    }
+
+
+def facet_condition(facet, values):
+    """Q matching the recipes with one of ``values`` of ``facet``."""
+    if facet == CATEGORY:
+        # A subquery rather than a join; the same name may be any chef's category
+        return Q(category__in=Category.objects.filter(category_name__in=values))
+    if facet == CHEF:
+        return Q(chef_id__in=values)
+    condition, lower = Q(), None
+    for value, _, upper in PREP_TIME_BUCKETS:
+        if value in values:
+            bucket = Q()
+            if lower is not None:
+                bucket &= Q(preparation_time__gte=lower)
+            if upper is not None:
+                bucket &= Q(preparation_time__lt=upper)
+            condition |= bucket
+        lower = upper
+    return condition
+
+
+def filter_recipes(queryset, filters):
+    for facet, values in filters.items():
+        if values:
+            queryset = queryset.filter(facet_condition(facet, values))
+    return queryset
+
+
+def prep_time_bucket():
+    return Case(
+        *[
+            When(preparation_time__lt=upper, then=Value(value))
+            for value, _, upper in PREP_TIME_BUCKETS[:-1]
+        ],
+        default=Value(PREP_TIME_BUCKETS[-1][0]),
+    )
+
+
+class FacetCounts:
+    def __init__(self, total=0, matches=0, options=None):
+        # Recipes matching the search, and those also matching every filter
+        self.total = total
+        self.matches = matches
+        # {facet: [(value, label, count), ...]}
+        self.options = options or {CATEGORY: [], CHEF: [], TIME: []}
+
+    def __repr__(self):
+        return f"<FacetCounts total={self.total} matches={self.matches}>"
+
+
+def top_options(counts, selected):
+    """The MAX_OPTIONS most frequent ``{value: (label, count)}`` and the selected."""
+    ranked = sorted(counts.items(), key=lambda item: (-item[1][1], item[1][0]))
+    return [
+        (value, label, count)
+        for position, (value, (label, count)) in enumerate(ranked)
+        if value in selected or (count and position < MAX_OPTIONS)
+    ]
+
+
+def count_facets(queryset, filters):
+    """Count the facet values of the recipes in ``queryset`` with one query."""
+    flags = {
+        f"in_{facet}": (
+            ExpressionWrapper(facet_condition(facet, values), BooleanField())
+            if values
+            else Value(True)
+        )
+        for facet, values in filters.items()
+    }
+    matches = queryset.order_by().values(
+        "category_id", "chef_id", prep_time=prep_time_bucket(), **flags
+    )
+    sql, params = matches.query.sql_with_params()
+    quote = connection.ops.quote_name
+    sql = FACET_SQL.format(
+        matches=sql,
+        category=quote(Category._meta.db_table),
+        chef=quote(Chef._meta.db_table),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    facets = FacetCounts()
+    categories, chefs, times = {}, {}, {}
+    for row in rows:
+        category_id, chef_id, prep_time, grouping_set, total = row[:5]
+        by_category, by_chef, by_time, filtered, category_name, chef_name = row[5:]
+        if grouping_set == BY_CATEGORY:
+            # Chefs' categories of the same name are one value
+            count = categories.get(category_name, (category_name, 0))[1]
+            categories[category_name] = (category_name, count + by_category)
+        elif grouping_set == BY_CHEF:
+            chefs[chef_id] = (chef_name, by_chef)
+        elif grouping_set == BY_TIME:
+            times[prep_time] = by_time
+        else:
+            facets.total, facets.matches = total, filtered
+    for name in filters[CATEGORY]:
+        # Listed even when it matches nothing, so it can be unselected
+        categories.setdefault(name, (name, 0))
+    facets.options[CATEGORY] = top_options(categories, filters[CATEGORY])
+    facets.options[CHEF] = top_options(chefs, filters[CHEF])
+    facets.options[TIME] = [
+        (value, label, times.get(value, 0))
+        for value, label, _ in PREP_TIME_BUCKETS
+        if times.get(value) or value in filters[TIME]
+    ]
+    return facets
+
+
+acount_facets = sync_to_async(count_facets)
+
+
+def facet_links(facets, params):
+    """Template rows ``(heading, [(label, count, selected, query string), ...])``.
+
+    Each query string is ``params`` with the option toggled.
+    """
+    links = []
+    for facet, options in facets.options.items():
+        selected = params.getlist(facet)
+        rows = []
+        for value, label, count in options:
+            value = str(value)
+            toggled = params.copy()
+            if value in selected:
+                toggled.setlist(facet, [other for other in selected if other != value])
+            else:
+                toggled.setlist(facet, selected + [value])
+            rows.append((label, count, value in selected, toggled.urlencode()))
+        links.append((FACET_LABELS[facet], rows))
+    return links
@@ -2,6 +2,7 @@ from django import forms
 from .models import Category, RecipeItem
 from efood_main.apps.accounts.validator import custom_validator
 from django.core.exceptions import ValidationError
+from django.core.files import File
 from django.utils.dateparse import parse_duration
 
 
@@ -42,3 +43,33 @@ class RecipeItemForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         if chef:
             self.fields["category"].queryset = Category.objects.filter(chef=chef)
+
+
+class RecipeImportForm(RecipeItemForm):
+    """One row of a bulk import, validated by RecipeItemForm's rules.
+
+    The category is given by name and resolved (or created) per chef, and the
+    image by its path in the uploaded zip; a row may come without an image.
+    """
+
+    category = forms.CharField(
+        max_length=Category._meta.get_field("category_name").max_length
+    )
+    image = forms.CharField(required=False, max_length=255)
+
+    class Meta(RecipeItemForm.Meta):
+        fields = [
+            name
+            for name in RecipeItemForm.Meta.fields
+            if name not in ("category", "image")
+        ]
+
+    def clean_category(self):
+        # As Category.clean() stores it
+        return self.cleaned_data["category"].strip().capitalize()
+
+    def clean_image(self):
+        name = self.cleaned_data["image"].strip()
+        if name:
+            custom_validator(File(None, name=name))
+        return name
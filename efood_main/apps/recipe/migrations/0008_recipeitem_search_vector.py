@@ -0,0 +1,45 @@
+# Generated by Django 4.2.6 on 2026-10-18 13:29
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_search_vector(apps, schema_editor):
+    Category = apps.get_model("recipe", "Category")
+    RecipeItem = apps.get_model("recipe", "RecipeItem")
+    category_name = Subquery(
+        Category.objects.filter(pk=OuterRef("category_id")).values("category_name")[:1]
+    )
+    RecipeItem.objects.update(
+        search_vector=SearchVector("recipe_title", weight="A", config="english")
+        + SearchVector("recipe_ingredients", weight="B", config="english")
+        + SearchVector(category_name, weight="C", config="english")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0007_alter_recipeitem_slug"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipeitem",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        # Backfill before building the index so it is built once
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="recipeitem",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="recipe_search_vector_gin"
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking writes on a live table
+    atomic = False
+
+    dependencies = [
+        ("chef", "0003_chef_counters"),
+        ("recipe", "0008_recipeitem_search_vector"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="recipeitem",
+            index=models.Index(
+                fields=["category", "chef"], name="recipe_category_chef_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="recipeitem",
+            index=models.Index(
+                fields=["chef", "created_at", "id"], name="recipe_chef_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="recipeitem",
+            index=models.Index(fields=["created_at"], name="recipe_created_idx"),
+        ),
+        # The composite indexes above lead with category_id and chef_id
+        migrations.AlterField(
+            model_name="recipeitem",
+            name="category",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="recipeitems",
+                to="recipe.category",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipeitem",
+            name="chef",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="chef.chef",
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking writes on a live table
+    atomic = False
+
+    dependencies = [
+        ("recipe", "0009_recipe_query_indexes"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name="category",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["category_name"],
+                name="category_name_trgm_gin",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="recipeitem",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["recipe_title"],
+                name="recipe_title_trgm_gin",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="recipeitem",
+            index=models.Index(
+                django.db.models.functions.comparison.Collate(
+                    django.db.models.functions.text.Upper("recipe_title"), "C"
+                ),
+                name="recipe_title_prefix_idx",
+            ),
+        ),
+    ]
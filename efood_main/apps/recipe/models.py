@@ -1,6 +1,25 @@
+import re
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+    TrigramWordSimilarity,
+)
 from django.db import models
+from django.db.models import F, Func, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Collate, Greatest, Upper
+
 from efood_main.apps.chef.models import Chef
 
+SEARCH_CONFIG = "english"
+# Byte-ordered upper-cased title, so one btree serves both the prefix match and
+# the ordering of autocomplete whatever the database collation
+TITLE_KEY = Collate(Upper("recipe_title"), "C")
+
 # Create your models here.
 
 
@@ -16,6 +35,23 @@ class Category(models.Model):
         verbose_name = "category"
         verbose_name_plural = "categories"
         unique_together = ["chef", "category_name"]
+        indexes = [
+            GinIndex(
+                fields=["category_name"],
+                opclasses=["gin_trgm_ops"],
+                name="category_name_trgm_gin",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The name as loaded, so a rename needs no query to find the old one
+        if "category_name" in field_names:
+            instance._loaded_completion_text = values[
+                field_names.index("category_name")
+            ]
+        return instance
 
     def clean(self):
         self.category_name = self.category_name.capitalize()
@@ -24,10 +60,86 @@ class Category(models.Model):
         return self.category_name
 
 
+class EqualsAny(Func):
+    """``expression = ANY(array)``."""
+
+    arg_joiner = " = ANY("
+    template = "%(expressions)s)"
+    output_field = models.BooleanField()
+
+
+class RecipeItemQuerySet(models.QuerySet):
+    def update_search_vector(self):
+        """Recompute the weighted title/ingredients/category vector in SQL."""
+        category_name = Subquery(
+            Category.objects.filter(pk=OuterRef("category_id")).values("category_name")[
+                :1
+            ]
+        )
+        return self.update(
+            search_vector=SearchVector("recipe_title", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("recipe_ingredients", weight="B", config=SEARCH_CONFIG)
+            + SearchVector(category_name, weight="C", config=SEARCH_CONFIG)
+        )
+
+    def search(self, text):
+        """Ranked full-text search; the last term is matched as a prefix."""
+        terms = re.findall(r"\w+", text or "")
+        if not terms:
+            return self.none()
+        terms[-1] += ":*"
+        query = SearchQuery(" & ".join(terms), search_type="raw", config=SEARCH_CONFIG)
+        return (
+            self.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-created_at")
+        )
+
+    def similar(self, text):
+        """Typo-tolerant search of titles and category names with pg_trgm.
+
+        A recipe matches when ``text`` is close to a run of words in its title
+        or category name, by pg_trgm.word_similarity_threshold (see settings).
+        """
+        text = " ".join((text or "").split())
+        if not text:
+            return self.none()
+        categories = Category.objects.filter(category_name__trigram_word_similar=text)
+        # "= ANY(ARRAY(...))" rather than "IN (...)" so that PostgreSQL ORs a
+        # bitmap scan of the category index with the title one
+        in_category = EqualsAny(F("category"), ArraySubquery(categories.values("pk")))
+        return (
+            self.filter(Q(recipe_title__trigram_word_similar=text) | Q(in_category))
+            .annotate(
+                similarity=Greatest(
+                    TrigramWordSimilarity(text, "recipe_title"),
+                    TrigramWordSimilarity(text, "category__category_name"),
+                )
+            )
+            .order_by("-similarity", "-created_at")
+        )
+
+    def completions(self, prefix):
+        """Distinct titles starting with ``prefix``, case-insensitively, A to Z."""
+        prefix = " ".join((prefix or "").split()).upper()
+        if not prefix:
+            return self.none().values_list("recipe_title", flat=True)
+        return (
+            self.annotate(title_key=TITLE_KEY)
+            .filter(title_key__startswith=prefix)
+            .values("title_key")
+            .annotate(title=Min("recipe_title"))
+            .order_by("title_key")
+            .values_list("title", flat=True)
+        )
+
+
 class RecipeItem(models.Model):
-    chef = models.ForeignKey(Chef, on_delete=models.CASCADE)
+    # Indexed through recipe_chef_created_idx, which leads with chef
+    chef = models.ForeignKey(Chef, on_delete=models.CASCADE, db_index=False)
+    # Indexed through recipe_category_chef_idx, which leads with category
     category = models.ForeignKey(
-        Category, on_delete=models.CASCADE, related_name="recipeitems"
+        Category, on_delete=models.CASCADE, related_name="recipeitems", db_index=False
     )
     recipe_title = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255)
@@ -38,6 +150,38 @@ class RecipeItem(models.Model):
     external_link = models.URLField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="recipe_search_vector_gin"),
+            # Typo-tolerant search
+            GinIndex(
+                fields=["recipe_title"],
+                opclasses=["gin_trgm_ops"],
+                name="recipe_title_trgm_gin",
+            ),
+            # Title autocomplete while a worker's completion index loads
+            models.Index(TITLE_KEY, name="recipe_title_prefix_idx"),
+            # Recipes of a category in the recipe builder
+            models.Index(fields=["category", "chef"], name="recipe_category_chef_idx"),
+            # Chef dashboard, keyset-paginated on (created_at, id)
+            models.Index(
+                fields=["chef", "created_at", "id"], name="recipe_chef_created_idx"
+            ),
+            # Latest recipes on the home page
+            models.Index(fields=["created_at"], name="recipe_created_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The title as loaded, so a rename needs no query to find the old one
+        if "recipe_title" in field_names:
+            instance._loaded_completion_text = values[field_names.index("recipe_title")]
+        return instance
 
     def __str__(self):
         return self.recipe_title
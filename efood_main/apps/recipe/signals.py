@@ -0,0 +1,79 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate
+from .completion import CATEGORIES, TITLES, record_changes
+from .models import Category, RecipeItem
+
+# The completion index kind and field of each model
+COMPLETED_FIELDS = {
+    RecipeItem: (TITLES, "recipe_title"),
+    Category: (CATEGORIES, "category_name"),
+}
+
+
+@receiver(post_save, sender=RecipeItem)
+def post_save_recipe_item_search_vector(sender, instance, raw, **kwargs):
+    if not raw:
+        RecipeItem.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=Category)
+def post_save_category_search_vector(sender, instance, created, raw, **kwargs):
+    # A renamed category changes the vector of every recipe filed under it
+    if not created and not raw:
+        RecipeItem.objects.filter(category=instance).update_search_vector()
+
+
+@receiver(post_save, sender=RecipeItem)
+@receiver(post_delete, sender=RecipeItem)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_recipe_cache(sender, **kwargs):
+    invalidate()
+
+
+@receiver(pre_save, sender=RecipeItem)
+@receiver(pre_save, sender=Category)
+def pre_save_completion_text(sender, instance, update_fields=None, **kwargs):
+    # Remember the text being replaced so the completion index can drop it
+    kind, field = COMPLETED_FIELDS[sender]
+    instance._completion_text = None
+    if instance._state.adding or (
+        update_fields is not None and field not in update_fields
+    ):
+        return
+    if hasattr(instance, "_loaded_completion_text"):
+        instance._completion_text = instance._loaded_completion_text
+    else:
+        # Built by hand or loaded with the field deferred
+        instance._completion_text = (
+            sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+        )
+
+
+@receiver(post_save, sender=RecipeItem)
+@receiver(post_save, sender=Category)
+def post_save_completion(sender, instance, created, **kwargs):
+    kind, field = COMPLETED_FIELDS[sender]
+    text = getattr(instance, field)
+    previous = getattr(instance, "_completion_text", None)
+    instance._loaded_completion_text = text
+    if created:
+        changes = [(kind, text)]
+    elif previous is not None and previous != text:
+        changes = [(kind, previous), (kind, text)]
+    else:
+        return
+    transaction.on_commit(partial(record_changes, changes))
+
+
+@receiver(post_delete, sender=RecipeItem)
+@receiver(post_delete, sender=Category)
+def post_delete_completion(sender, instance, **kwargs):
+    kind, field = COMPLETED_FIELDS[sender]
+    changes = [(kind, getattr(instance, field))]
+    transaction.on_commit(partial(record_changes, changes))
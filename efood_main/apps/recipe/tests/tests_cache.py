@@ -0,0 +1,91 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from efood_main.apps.recipe import cache as recipe_cache
+from efood_main.apps.recipe.models import RecipeItem
+
+from .tests_models import BaseTest
+
+
+@override_settings(RECIPE_CACHE_TIMEOUTS={"home": 300, "search": 60})
+class RecipeCacheTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        recipe_cache.reset_cache_stats()
+        self.category = self.create_category(self.chef, "Soup", "soup")
+        self.recipe = self.create_recipe_item(
+            chef=self.chef,
+            category=self.category,
+            title="Tomato Soup",
+            slug="tomato-soup",
+            ingredients="Tomatoes, Onion, Basil",
+            instructions="Simmer and blend.",
+            prep_time=timedelta(minutes=40),
+        )
+
+    def test_home_page_is_served_from_cache(self):
+        self.client.get(reverse("home"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("home"))
+        self.assertContains(response, "Tomato Soup")
+        self.assertEqual(recipe_cache.cache_stats()["home"], {"hits": 1, "misses": 1})
+
+    def test_search_results_are_cached_per_query(self):
+        url = reverse("recipe_search")
+        self.client.get(url, {"q": "Tomato"})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {"q": "  tomato "})
+        self.assertContains(response, "Tomato Soup")
+        self.client.get(url, {"q": "basil"})
+        self.assertEqual(recipe_cache.cache_stats()["search"], {"hits": 1, "misses": 2})
+
+    def test_saving_a_recipe_invalidates(self):
+        self.client.get(reverse("home"))
+        self.recipe.recipe_title = "Gazpacho"
+        self.recipe.save()
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "Gazpacho")
+
+    def test_deleting_a_category_invalidates(self):
+        self.client.get(reverse("home"))
+        self.category.delete()
+        response = self.client.get(reverse("home"))
+        self.assertNotContains(response, "Tomato Soup")
+        self.assertFalse(RecipeItem.objects.exists())
+
+    @override_settings(RECIPE_CACHE_TIMEOUTS={"home": 0})
+    def test_zero_timeout_disables_caching(self):
+        calls = []
+        recipe_cache.cached("home", "", lambda: calls.append(1))
+        recipe_cache.cached("home", "", lambda: calls.append(1))
+        self.assertEqual(len(calls), 2)
+
+    def test_concurrent_miss_waits_for_the_recompute(self):
+        cache_key = recipe_cache.make_key("home", "slow")
+        # Simulate another worker holding the recompute lock
+        cache.add(f"{cache_key}:lock", 1)
+        timer = threading.Timer(0.02, cache.set, args=(cache_key, "fresh", 60))
+        timer.start()
+        calls = []
+        value = recipe_cache.cached("home", "slow", lambda: calls.append(1))
+        timer.join()
+        self.assertEqual(value, "fresh")
+        self.assertEqual(calls, [])
+
+    def test_concurrent_miss_serves_the_previous_value(self):
+        recipe_cache.cached("home", "slow", lambda: "old")
+        recipe_cache.invalidate()
+        cache.add(f"{recipe_cache.make_key('home', 'slow')}:lock", 1)
+        self.assertEqual(recipe_cache.cached("home", "slow", lambda: "new"), "old")
+
+    def test_concurrent_miss_computes_once_the_wait_runs_out(self):
+        cache.add(f"{recipe_cache.make_key('home', 'slow')}:lock", 1)
+        started = time.monotonic()
+        self.assertEqual(recipe_cache.cached("home", "slow", lambda: "new"), "new")
+        self.assertLess(time.monotonic() - started, 1)
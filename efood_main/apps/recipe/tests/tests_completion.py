@@ -0,0 +1,183 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+
+from efood_main.apps.recipe.completion import (
+    CATEGORIES,
+    CHANGE_KEY,
+    TITLES,
+    VERSION_KEY,
+    CompletionIndex,
+    PrefixIndex,
+    completion_index,
+    current_version,
+)
+from efood_main.apps.recipe.models import RecipeItem
+
+from .tests_models import BaseTest
+
+
+class PrefixIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex({"Lemon Tart": 2, "lemon  tart": 1, "Leek Soup": 1})
+
+    def test_completes_case_insensitively_in_order(self):
+        self.index.set("Lemon Cake", 1)
+        self.assertEqual(
+            self.index.complete("LE", 10), ["Leek Soup", "Lemon Cake", "Lemon Tart"]
+        )
+        self.assertEqual(self.index.complete("lemon t", 10), ["Lemon Tart"])
+        self.assertEqual(self.index.complete("le", 1), ["Leek Soup"])
+        self.assertEqual(self.index.complete("x", 10), [])
+        self.assertEqual(self.index.complete(" ", 10), [])
+
+    def test_text_is_dropped_with_its_last_row(self):
+        self.index.set("Leek Soup", 0)
+        self.assertEqual(len(self.index), 1)
+        self.index.set("LEMON TART", 0)
+        self.index.set("Lemon Tart", 1)
+        self.assertEqual(self.index.complete("lemon", 10), ["Lemon Tart"])
+        self.index.set("lemon  tart", 0)
+        self.index.set("Lemon Tart", 0)
+        self.assertEqual(len(self.index), 0)
+
+    def test_setting_the_same_count_again_changes_nothing(self):
+        self.index.set("Lemon Tart", 2)
+        self.index.set("Lemon Tart", 1)
+        self.index.set("Lemon Tart", 1)
+        self.index.set("lemon  tart", 0)
+        self.assertEqual(self.index.entries["lemon tart"], ("Lemon Tart", 1))
+
+
+class CompletionIndexTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        completion_index.clear()
+        self.category = self.create_category(self.chef, "Soup", "soup")
+        self.recipe = self.add_recipe("Leek Soup")
+
+    def add_recipe(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.create_recipe_item(
+                chef=self.chef,
+                category=self.category,
+                title=title,
+                slug=title.lower().replace(" ", "-"),
+                ingredients="Leeks",
+                instructions="Simmer.",
+                prep_time=timedelta(minutes=30),
+            )
+
+    def complete(self, prefix, kind=TITLES, index=completion_index):
+        index.sync()
+        return index.complete(kind, prefix, 10)
+
+    def test_built_with_one_query(self):
+        with self.assertNumQueries(1):
+            completion_index.build()
+        self.assertEqual(self.complete("le"), ["Leek Soup"])
+        self.assertEqual(self.complete("so", CATEGORIES), ["Soup"])
+
+    def test_saves_and_deletes_update_the_index(self):
+        completion_index.build()
+        self.add_recipe("Lentil Soup")
+        self.recipe.recipe_title = "Potato Soup"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.save()
+        self.assertEqual(self.complete("l"), ["Lentil Soup"])
+        self.assertEqual(self.complete("p"), ["Potato Soup"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.complete("l"), [])
+            self.assertEqual(self.complete("s", CATEGORIES), [])
+
+    def test_renames_are_recorded_without_reading_the_old_text(self):
+        completion_index.build()
+        recipe = RecipeItem.objects.get(pk=self.recipe.pk)
+        for title in ["Potato Soup", "Pea Soup"]:
+            recipe.recipe_title = title
+            with self.captureOnCommitCallbacks(execute=True):
+                with CaptureQueriesContext(connection) as queries:
+                    recipe.save()
+            selects = [q["sql"] for q in queries if q["sql"].startswith("SELECT")]
+            self.assertEqual(selects, [])
+        self.assertEqual(self.complete("l"), [])
+        self.assertEqual(self.complete("p"), ["Pea Soup"])
+
+    def test_renames_of_deferred_titles_are_recorded(self):
+        completion_index.build()
+        recipe = RecipeItem.objects.defer("recipe_title").get(pk=self.recipe.pk)
+        recipe.recipe_title = "Potato Soup"
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.save()
+        self.assertEqual(self.complete("l"), [])
+        self.assertEqual(self.complete("p"), ["Potato Soup"])
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        completion_index.build()
+        self.create_recipe_item(
+            chef=self.chef,
+            category=self.category,
+            title="Onion Soup",
+            slug="onion-soup",
+            ingredients="Onions",
+            instructions="Simmer.",
+            prep_time=timedelta(minutes=30),
+        )
+        # The on_commit callbacks of this test's transaction never run
+        self.assertEqual(self.complete("o"), [])
+
+    def test_other_workers_replay_recorded_changes(self):
+        other = CompletionIndex()
+        other.build()
+        self.add_recipe("Lentil Soup")
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.complete("le", index=other), ["Leek Soup", "Lentil Soup"]
+            )
+        self.assertEqual(other.version, cache.get(VERSION_KEY))
+
+    def test_worker_rebuilds_when_changes_have_expired(self):
+        other = CompletionIndex()
+        other.build()
+        self.add_recipe("Lentil Soup")
+        cache.delete(CHANGE_KEY.format(cache.get(VERSION_KEY)))
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self.complete("le", index=other), ["Leek Soup", "Lentil Soup"]
+            )
+
+    def test_changes_committed_during_a_build_are_counted_once(self):
+        other = CompletionIndex()
+        version = current_version()
+
+        def save_while_building():
+            # Taken before the rows stream in, which already include the save
+            self.add_recipe("Lentil Soup")
+            return version
+
+        with mock.patch(
+            "efood_main.apps.recipe.completion.current_version",
+            side_effect=save_while_building,
+        ):
+            other.build()
+        self.assertEqual(other.version, version)
+        lentil = RecipeItem.objects.get(recipe_title="Lentil Soup")
+        self.assertEqual(self.complete("le", index=other), ["Leek Soup", "Lentil Soup"])
+        with self.captureOnCommitCallbacks(execute=True):
+            lentil.delete()
+        self.assertEqual(self.complete("le", index=other), ["Leek Soup"])
+
+    def test_worker_rebuilds_after_a_cache_reset(self):
+        completion_index.build()
+        completion_index.indexes[TITLES].set("Phantom Soup", 1)
+        cache.clear()
+        self.assertEqual(self.complete("p"), [])
+        self.assertTrue(RecipeItem.objects.filter(recipe_title="Leek Soup").exists())
+        self.assertEqual(self.complete("le"), ["Leek Soup"])
@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import override_settings
+from django.urls import reverse
+
+from efood_main.apps.accounts.models import User, UserProfile
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.recipe.facets import count_facets, parse_filters
+from efood_main.apps.recipe.models import RecipeItem
+
+from .tests_models import BaseTest
+
+
+class FacetsBase(BaseTest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        user = User.objects.create(
+            first_name="Jane", username="jane", email="jane@example.com"
+        )
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        self.other_chef = Chef.objects.create(
+            user=user, user_profile=profile, chef_name="Jane"
+        )
+        soup = self.create_category(self.chef, "Soup", "soup")
+        other_soup = self.create_category(self.other_chef, "Soup", "soup")
+        dessert = self.create_category(self.other_chef, "Dessert", "dessert")
+        self.tomato = self.add_recipe(self.chef, soup, "Tomato Soup", 10)
+        self.lentil = self.add_recipe(self.chef, soup, "Lentil Soup", 45)
+        self.pumpkin = self.add_recipe(self.other_chef, other_soup, "Pumpkin Soup", 45)
+        self.tart = self.add_recipe(self.other_chef, dessert, "Pumpkin Tart", 90)
+
+    def add_recipe(self, chef, category, title, minutes):
+        recipe = self.create_recipe_item(
+            chef=chef,
+            category=category,
+            title=title,
+            slug=title.lower().replace(" ", "-"),
+            ingredients="Water",
+            instructions="Cook.",
+            prep_time=timedelta(minutes=minutes),
+        )
+        RecipeItem.objects.filter(pk=recipe.pk).update_search_vector()
+        return recipe
+
+
+class CountFacetsTest(FacetsBase):
+    def count(self, query=""):
+        return count_facets(RecipeItem.objects.all(), parse_filters(QueryDict(query)))
+
+    def test_counts_every_facet_with_one_query(self):
+        with self.assertNumQueries(1):
+            facets = self.count()
+        self.assertEqual((facets.total, facets.matches), (4, 4))
+        self.assertEqual(
+            facets.options["category"], [("Soup", "Soup", 3), ("Dessert", "Dessert", 1)]
+        )
+        self.assertEqual(
+            facets.options["chef"],
+            [(self.chef.pk, "Chef Test", 2), (self.other_chef.pk, "Jane", 2)],
+        )
+        self.assertEqual(
+            facets.options["time"],
+            [
+                ("under-15", "Under 15 min", 1),
+                ("30-60", "30 to 60 min", 2),
+                ("over-60", "Over an hour", 1),
+            ],
+        )
+
+    def test_values_are_counted_under_the_other_facets_filters(self):
+        facets = self.count(f"category=Soup&chef={self.other_chef.pk}")
+        self.assertEqual((facets.total, facets.matches), (4, 1))
+        # Jane's recipes of every category, Soup recipes of every chef
+        self.assertEqual(
+            facets.options["category"], [("Dessert", "Dessert", 1), ("Soup", "Soup", 1)]
+        )
+        self.assertEqual(
+            facets.options["chef"],
+            [(self.chef.pk, "Chef Test", 2), (self.other_chef.pk, "Jane", 1)],
+        )
+        self.assertEqual(facets.options["time"], [("30-60", "30 to 60 min", 1)])
+
+    def test_invalid_values_are_ignored(self):
+        self.assertEqual(
+            parse_filters(QueryDict("chef=x&chef=3&time=soon&time=15-30&category=+")),
+            {"category": (), "chef": (3,), "time": ("15-30",)},
+        )
+        facets = self.count("category=Salad")
+        self.assertEqual(facets.matches, 0)
+        self.assertIn(("Salad", "Salad", 0), facets.options["category"])
+
+
+@override_settings(RECIPE_CACHE_TIMEOUTS={"search": 60})
+class FacetedSearchViewTest(FacetsBase):
+    def test_filters_combine(self):
+        url = reverse("recipe_search")
+        response = self.client.get(url, {"q": "soup", "time": ["under-15", "30-60"]})
+        self.assertEqual(
+            set(response.context["search_recipes"]),
+            {self.tomato, self.lentil, self.pumpkin},
+        )
+        response = self.client.get(
+            url, {"q": "soup", "time": "30-60", "chef": self.chef.pk}
+        )
+        self.assertEqual(response.context["search_recipes"], [self.lentil])
+        self.assertContains(response, "Clear filters")
+
+    def test_facets_are_rendered_with_toggling_links(self):
+        response = self.client.get(reverse("recipe_search"), {"q": "pumpkin"})
+        self.assertContains(response, "Dessert (1)")
+        self.assertContains(response, 'href="?q=pumpkin&amp;category=Dessert"')
+        self.assertNotContains(response, "Clear filters")
+        response = self.client.get(
+            reverse("recipe_search"), {"q": "pumpkin", "category": "Dessert"}
+        )
+        self.assertEqual(response.context["search_recipes"], [self.tart])
+        self.assertContains(response, 'href="?q=pumpkin"')
+
+    def test_results_and_facets_are_cached_per_filters(self):
+        url = reverse("recipe_search")
+        self.client.get(url, {"q": "soup", "category": "Soup"})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {"category": "Soup", "q": "Soup "})
+        self.assertEqual(response.context["facets"].matches, 3)
+
+    def test_similar_recipes_are_faceted(self):
+        response = self.client.get(
+            reverse("recipe_search"), {"q": "pumkin", "time": "over-60"}
+        )
+        self.assertTrue(response.context["similar"])
+        self.assertEqual(response.context["search_recipes"], [self.tart])
@@ -1,5 +1,8 @@
+import shutil
+import tempfile
+
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from efood_main.apps.accounts.models import User, UserProfile
 from efood_main.apps.chef.models import Chef
@@ -7,6 +10,13 @@ from efood_main.apps.recipe.forms import CategoryForm, RecipeItemForm
 from efood_main.apps.recipe.models import Category
 
 
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
 class CategoryFormTest(TestCase):
     def test_category_form_valid(self):
         form_data = {"category_name": "Desserts", "description": "Sweets"}
@@ -19,6 +29,7 @@ class CategoryFormTest(TestCase):
         self.assertFalse(form.is_valid())
 
 
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class RecipeItemFormTest(TestCase):
     def setUp(self):
         user, _ = User.objects.get_or_create(
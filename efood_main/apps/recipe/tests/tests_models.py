@@ -83,3 +83,47 @@ class RecipeItemModelTest(BaseTest):
         self.assertEqual(
             self.recipe_item.formatted_preparation_time, "00 hr:30 min:00 sec"
         )
+
+
+class RecipeItemSearchTest(BaseTest):
+    def setUp(self):
+        super().setUp()
+        self.category = self.create_category(self.chef, "Dessert", "dessert")
+        self.tart = self.create_recipe_item(
+            chef=self.chef,
+            category=self.category,
+            title="Lemon Tart",
+            slug="lemon-tart",
+            ingredients="Flour, Butter, Sugar, Eggs",
+            instructions="Bake the crust, fill and chill.",
+            prep_time=timedelta(minutes=90),
+        )
+        self.salad = self.create_recipe_item(
+            chef=self.chef,
+            category=self.category,
+            title="Fruit Salad",
+            slug="fruit-salad",
+            ingredients="Apple, Lemon, Mint",
+            instructions="Chop and mix.",
+            prep_time=timedelta(minutes=10),
+        )
+
+    def test_search_vector_is_maintained_on_save(self):
+        self.tart.refresh_from_db()
+        self.assertIn("'tart':", self.tart.search_vector)
+
+    def test_title_match_ranks_above_ingredient_match(self):
+        results = list(RecipeItem.objects.search("lemon"))
+        self.assertEqual(results, [self.tart, self.salad])
+
+    def test_last_term_matches_as_prefix(self):
+        self.assertEqual(list(RecipeItem.objects.search("fruit sal")), [self.salad])
+
+    def test_category_rename_updates_recipes(self):
+        self.assertFalse(RecipeItem.objects.search("pastry").exists())
+        self.category.category_name = "Pastry"
+        self.category.save()
+        self.assertEqual(RecipeItem.objects.search("pastry").count(), 2)
+
+    def test_empty_query_returns_nothing(self):
+        self.assertFalse(RecipeItem.objects.search("  ?! ").exists())
@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from efood_main.apps.recipe.completion import completion_index
+from efood_main.apps.recipe.models import Category, RecipeItem
+from efood_main.views import AsyncListView
+
+from .tests_models import BaseTest
+
+
+class TrigramSearchBase(BaseTest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        completion_index.clear()
+        self.dessert = self.create_category(self.chef, "Dessert", "dessert")
+        self.soup = self.create_category(self.chef, "Chowder", "chowder")
+        self.cake = self.add_recipe(self.dessert, "Chocolate Cake")
+        self.mousse = self.add_recipe(self.dessert, "Chocolate Mousse")
+        self.chowder = self.add_recipe(self.soup, "Clam Bisque")
+
+    def add_recipe(self, category, title):
+        return self.create_recipe_item(
+            chef=self.chef,
+            category=category,
+            title=title,
+            slug=title.lower().replace(" ", "-"),
+            ingredients="Butter, Sugar",
+            instructions="Mix and cook.",
+            prep_time=timedelta(minutes=20),
+        )
+
+
+class SimilarRecipesTest(TrigramSearchBase):
+    def test_misspelled_title_matches(self):
+        self.assertEqual(
+            set(RecipeItem.objects.similar("choclate")), {self.cake, self.mousse}
+        )
+
+    def test_closest_title_comes_first(self):
+        self.assertEqual(RecipeItem.objects.similar("chocolate muse")[0], self.mousse)
+
+    def test_misspelled_category_matches(self):
+        self.assertEqual(list(RecipeItem.objects.similar("chowdr")), [self.chowder])
+
+    def test_unrelated_text_matches_nothing(self):
+        self.assertFalse(RecipeItem.objects.similar("sushi").exists())
+        self.assertFalse(RecipeItem.objects.similar("   ").exists())
+
+
+class TitleCompletionsTest(TrigramSearchBase):
+    def test_prefix_is_case_insensitive_and_sorted(self):
+        self.assertEqual(
+            list(RecipeItem.objects.completions("  CHOC")),
+            ["Chocolate Cake", "Chocolate Mousse"],
+        )
+
+    def test_titles_are_distinct(self):
+        self.add_recipe(self.soup, "Chocolate cake")
+        self.assertEqual(
+            list(RecipeItem.objects.completions("chocolate c")), ["Chocolate Cake"]
+        )
+
+    def test_like_wildcards_are_literal(self):
+        self.assertFalse(RecipeItem.objects.completions("%").exists())
+
+
+@override_settings(RECIPE_CACHE_TIMEOUTS={"search": 60, "autocomplete": 60})
+class SearchViewsTest(TrigramSearchBase):
+    async def test_async_list_view_lists_its_queryset_by_default(self):
+        view = AsyncListView(model=Category)
+        view.setup(RequestFactory().get("/"))
+        self.assertCountEqual(await view.aget_queryset(), [self.dessert, self.soup])
+
+    def test_search_falls_back_to_similar_titles(self):
+        response = self.client.get(reverse("recipe_search"), {"q": "choclate"})
+        self.assertTrue(response.context["similar"])
+        self.assertEqual(
+            set(response.context["search_recipes"]), {self.cake, self.mousse}
+        )
+        self.assertContains(response, "Showing similar recipes")
+
+    def test_exact_search_is_not_marked_similar(self):
+        response = self.client.get(reverse("recipe_search"), {"q": "chocolate"})
+        self.assertFalse(response.context["similar"])
+        self.assertNotContains(response, "Showing similar recipes")
+
+    def test_autocomplete_completes_prefix(self):
+        response = self.client.get(reverse("recipe_autocomplete"), {"q": "ch"})
+        self.assertEqual(
+            response.json(),
+            {
+                "results": ["Chocolate Cake", "Chocolate Mousse"],
+                "categories": ["Chowder"],
+            },
+        )
+
+    def test_autocomplete_looks_up_similar_titles_for_a_typo(self):
+        url = reverse("recipe_autocomplete")
+        response = self.client.get(url, {"q": "clam bisk"})
+        self.assertEqual(response.json()["results"], ["Clam Bisque"])
+        response = self.client.get(url, {"q": "Chocolate C"})
+        self.assertEqual(response.json()["results"], ["Chocolate Cake"])
+
+    def test_autocomplete_does_not_query_the_database(self):
+        url = reverse("recipe_autocomplete")
+        self.client.get(url, {"q": "choc"})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {"q": "CHOCOLATE "})
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_autocomplete_asks_the_database_while_the_index_loads(self):
+        with completion_index.build_lock:
+            response = self.client.get(reverse("recipe_autocomplete"), {"q": "clam"})
+        self.assertEqual(
+            response.json(), {"results": ["Clam Bisque"], "categories": []}
+        )
+
+    def test_autocomplete_validates_limit(self):
+        url = reverse("recipe_autocomplete")
+        self.assertEqual(
+            self.client.get(url, {"q": "c", "limit": "x"}).status_code, 400
+        )
+        response = self.client.get(url, {"q": "c", "limit": 1})
+        self.assertEqual(response.json()["results"], ["Chocolate Cake"])
+        self.assertEqual(self.client.get(url).json(), {"results": [], "categories": []})
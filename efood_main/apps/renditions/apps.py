@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class RenditionsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "efood_main.apps.renditions"
+
+    def ready(self):
+        import efood_main.apps.renditions.signals  # noqa
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from efood_main.apps.accounts.models import UserProfile
+from efood_main.apps.recipe.models import RecipeItem
+from efood_main.apps.renditions.utils import build_renditions, get_executor
+
+# (model, image field, renditions to build)
+SOURCES = [
+    (RecipeItem, "image", ["thumb"]),
+    (UserProfile, "profile_picture", ["avatar"]),
+    (UserProfile, "cover_photo", ["cover"]),
+]
+
+
+class Command(BaseCommand):
+    help = "Build missing image renditions for existing uploads."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true", help="Rebuild existing renditions too."
+        )
+
+    def handle(self, *args, **options):
+        executor = get_executor()
+        self.built = self.failed = 0
+        pending = []
+        for model, field, specs in SOURCES:
+            storage = model._meta.get_field(field).storage
+            names = (
+                model.objects.exclude(**{f"{field}__isnull": True})
+                .exclude(**{field: ""})
+                .values_list(field, flat=True)
+                .iterator()
+            )
+            for name in names:
+                future = executor.submit(
+                    build_renditions, storage, name, specs, options["force"]
+                )
+                pending.append((name, future))
+                # Bound the backlog so memory stays flat on large catalogs
+                if len(pending) >= 100:
+                    self.collect(pending)
+                    pending = []
+        self.collect(pending)
+        self.stdout.write(
+            f"Built renditions for {self.built} image(s), {self.failed} failed."
+        )
+
+    def collect(self, pending):
+        for name, future in pending:
+            try:
+                self.built += bool(future.result())
+            except Exception as exc:
+                self.failed += 1
+                self.stderr.write(f"{name}: {exc}")
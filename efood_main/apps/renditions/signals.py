@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from efood_main.apps.accounts.models import UserProfile
+from efood_main.apps.recipe.models import RecipeItem
+
+from .utils import forget_renditions, schedule_renditions
+
+
+@receiver(post_save, sender=RecipeItem)
+def post_save_recipe_item_renditions(sender, instance, raw, **kwargs):
+    if not raw:
+        schedule_renditions(instance.image, ["thumb"])
+
+
+@receiver(post_save, sender=UserProfile)
+def post_save_user_profile_renditions(sender, instance, raw, **kwargs):
+    if not raw:
+        schedule_renditions(instance.profile_picture, ["avatar"])
+        schedule_renditions(instance.cover_photo, ["cover"])
+
+
+@receiver(post_delete, sender=RecipeItem)
+def post_delete_recipe_item_renditions(sender, instance, **kwargs):
+    if instance.image:
+        forget_renditions(instance.image.name)
+
+
+@receiver(post_delete, sender=UserProfile)
+def post_delete_user_profile_renditions(sender, instance, **kwargs):
+    for fieldfile in (instance.profile_picture, instance.cover_photo):
+        if fieldfile:
+            forget_renditions(fieldfile.name)
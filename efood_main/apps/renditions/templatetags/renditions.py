@@ -0,0 +1,11 @@
+from django import template
+
+from efood_main.apps.renditions import utils
+
+register = template.Library()
+
+
+@register.simple_tag
+def rendition_url(fieldfile, spec, fmt=None):
+    """``{% rendition_url recipe.image "thumb" "webp" as url %}``, empty until built"""
+    return utils.rendition_url(fieldfile, spec, fmt)
@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.fields.files import FieldFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from efood_main.apps.recipe.models import RecipeItem
+from efood_main.apps.renditions import utils
+from efood_main.apps.renditions.utils import (
+    build_renditions,
+    forget_renditions,
+    rendition_name,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_RENDITIONS={"thumb": (40, 30)})
+class RenditionsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        buffer = BytesIO()
+        Image.new("RGB", (400, 200), "red").save(buffer, "JPEG")
+        self.name = default_storage.save(
+            "recipe_images/soup.jpg", ContentFile(buffer.getvalue())
+        )
+        self.fieldfile = FieldFile(
+            RecipeItem(), RecipeItem._meta.get_field("image"), self.name
+        )
+
+    def render(self, fmt=""):
+        template = Template(
+            "{% load renditions %}{% rendition_url image 'thumb' " + fmt + " %}"
+        )
+        return template.render(Context({"image": self.fieldfile}))
+
+    def test_rendition_name_sits_next_to_original(self):
+        self.assertEqual(
+            rendition_name("recipe_images/soup.JPG", "thumb"),
+            "recipe_images/renditions/soup_thumb.jpg",
+        )
+        self.assertEqual(
+            rendition_name("recipe_images/soup.jpg", "thumb", "webp"),
+            "recipe_images/renditions/soup_thumb.webp",
+        )
+
+    def test_builds_fixed_size_original_format_and_webp(self):
+        written = build_renditions(default_storage, self.name, ["thumb"])
+        self.assertEqual(len(written), 2)
+        for name, fmt in zip(written, ["JPEG", "WEBP"]):
+            with default_storage.open(name) as rendition:
+                image = Image.open(rendition)
+                self.assertEqual(image.format, fmt)
+                self.assertEqual(image.size, (40, 30))
+
+    def test_existing_renditions_are_not_rebuilt(self):
+        build_renditions(default_storage, self.name, ["thumb"])
+        self.assertEqual(build_renditions(default_storage, self.name, ["thumb"]), [])
+
+    def test_template_tag_falls_back_to_original(self):
+        self.assertEqual(self.render(), f"/media/{self.name}")
+        # Not to the original for WebP, which it is not
+        self.assertEqual(self.render("'webp'"), "")
+        build_renditions(default_storage, self.name, ["thumb"])
+        self.assertEqual(
+            self.render("'webp'"),
+            f"/media/{rendition_name(self.name, 'thumb', 'webp')}",
+        )
+
+    def test_deleted_image_renditions_are_forgotten(self):
+        build_renditions(default_storage, self.name, ["thumb"])
+        default_storage.delete(rendition_name(self.name, "thumb"))
+        # Known to exist, so the storage is not asked again
+        self.assertEqual(self.render(), f"/media/{rendition_name(self.name, 'thumb')}")
+        forget_renditions(self.name)
+        self.assertEqual(self.render(), f"/media/{self.name}")
+
+    def test_known_renditions_are_bounded(self):
+        with mock.patch.object(utils, "AVAILABLE_SIZE", 1):
+            build_renditions(default_storage, self.name, ["thumb"])
+            self.assertEqual(
+                self.render(), f"/media/{rendition_name(self.name, 'thumb')}"
+            )
+            self.assertEqual(
+                list(utils._available), [rendition_name(self.name, "thumb")]
+            )
@@ -0,0 +1,147 @@
+"""Fixed-size renditions of uploaded images.
+
+Renditions live next to the original, e.g. ``recipe_images/soup.jpg`` gets
+``recipe_images/renditions/soup_thumb.jpg`` and ``..._thumb.webp``. They are
+built by a small thread pool after the upload is committed, never in the
+request thread; until they exist the template tag falls back to the original.
+"""
+
+import logging
+import posixpath
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+WEBP = "webp"
+SAVE_OPTIONS = {
+    "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+    "PNG": {"optimize": True},
+    "WEBP": {"quality": 80, "method": 4},
+}
+
+# Renditions known to exist, least recently used first, so the template tag
+# need not ask the storage again; at most AVAILABLE_SIZE names are kept
+AVAILABLE_SIZE = 10000
+
+_executor = None
+_available = OrderedDict()
+_available_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_RENDITION_WORKERS,
+            thread_name_prefix="renditions",
+        )
+    return _executor
+
+
+def rendition_name(name, spec, fmt=None):
+    """Storage name of the ``spec`` rendition of ``name`` in ``fmt``."""
+    directory, filename = posixpath.split(name)
+    stem, ext = posixpath.splitext(filename)
+    ext = fmt or ext.lstrip(".").lower()
+    return posixpath.join(directory, "renditions", f"{stem}_{spec}.{ext}")
+
+
+def _mark_available(target):
+    with _available_lock:
+        _available[target] = True
+        _available.move_to_end(target)
+        while len(_available) > AVAILABLE_SIZE:
+            _available.popitem(last=False)
+
+
+def _is_available(target):
+    with _available_lock:
+        if target not in _available:
+            return False
+        _available.move_to_end(target)
+        return True
+
+
+def forget_renditions(name):
+    """Stop vouching for the renditions of ``name``, whose image was deleted."""
+    with _available_lock:
+        for spec in settings.IMAGE_RENDITIONS:
+            for fmt in (None, WEBP):
+                _available.pop(rendition_name(name, spec, fmt), None)
+
+
+def _encode(image, fmt):
+    if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, fmt, **SAVE_OPTIONS.get(fmt, {}))
+    return ContentFile(buffer.getvalue())
+
+
+def build_renditions(storage, name, specs, force=False):
+    """Write every ``specs`` rendition of ``name`` in its format and WebP."""
+    targets = [
+        (spec, fmt, rendition_name(name, spec, fmt))
+        for spec in specs
+        for fmt in (None, WEBP)
+    ]
+    if not force and all(storage.exists(target) for _, _, target in targets):
+        return []
+
+    with storage.open(name) as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image.load()
+    # Uploads are validated to be PNG or JPEG
+    original_format = "PNG" if image.format == "PNG" else "JPEG"
+
+    written = []
+    for spec, fmt, target in targets:
+        size = settings.IMAGE_RENDITIONS[spec]
+        resized = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+        content = _encode(resized, "WEBP" if fmt == WEBP else original_format)
+        if storage.exists(target):
+            storage.delete(target)
+        written.append(storage.save(target, content))
+        _mark_available(target)
+    return written
+
+
+def _build_logged(storage, name, specs):
+    try:
+        build_renditions(storage, name, specs)
+    except Exception:
+        logger.exception("Could not build renditions for %s", name)
+
+
+def schedule_renditions(fieldfile, specs):
+    """Build renditions in the worker pool once the current transaction commits."""
+    if not fieldfile:
+        return
+    storage, name = fieldfile.storage, fieldfile.name
+    transaction.on_commit(
+        lambda: get_executor().submit(_build_logged, storage, name, specs)
+    )
+
+
+def rendition_url(fieldfile, spec, fmt=None):
+    """URL of a rendition if it has been built, else of the original.
+
+    A rendition in another ``fmt`` than the original's has no fallback: its
+    URL is empty until it is built.
+    """
+    if not fieldfile:
+        return ""
+    target = rendition_name(fieldfile.name, spec, fmt)
+    if not _is_available(target):
+        if not fieldfile.storage.exists(target):
+            return "" if fmt else fieldfile.url
+        _mark_available(target)
+    return fieldfile.storage.url(target)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Workshop
+from .models import SeatHold, WaitlistEntry, Workshop
 
 # Register your models here.
 
@@ -9,10 +9,27 @@ class WorkshopAdmin(admin.ModelAdmin):
         "chef",
         "title",
         "date",
-        "capacity",
+        "max_capacity",
+        "seats_taken",
         "price",
         "address",
     )
 
 
 admin.site.register(Workshop, WorkshopAdmin)
+
+
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ("workshop", "customer", "created_at")
+    list_select_related = ("workshop", "customer")
+
+
+admin.site.register(WaitlistEntry, WaitlistEntryAdmin)
+
+
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ("workshop", "customer", "expires_at")
+    list_select_related = ("workshop", "customer")
+
+
+admin.site.register(SeatHold, SeatHoldAdmin)
@@ -2,6 +2,8 @@ from django import forms
 
 from .models import Workshop
 
+SEATS_TAKEN_ERROR = "%(seats)s seats are already booked or held."
+
 
 class WorkshopItemForm(forms.ModelForm):
     class Meta:
@@ -11,7 +13,7 @@ class WorkshopItemForm(forms.ModelForm):
             "description",
             "date",
             "time",
-            "capacity",
+            "max_capacity",
             "address",
             "latitude",
             "longitude",
@@ -28,3 +30,11 @@ class WorkshopItemForm(forms.ModelForm):
     def __init__(self, chef, *args, **kwargs):
         super(WorkshopItemForm, self).__init__(*args, **kwargs)
         self.fields["recipe"].queryset = chef.recipeitem_set.all()
+
+    def clean_max_capacity(self):
+        max_capacity = self.cleaned_data["max_capacity"]
+        if max_capacity < self.instance.seats_taken:
+            raise forms.ValidationError(
+                SEATS_TAKEN_ERROR % {"seats": self.instance.seats_taken}
+            )
+        return max_capacity
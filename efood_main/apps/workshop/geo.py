@@ -0,0 +1,96 @@
+"""Geohash helpers for finding workshops near a point without PostGIS.
+
+Each workshop stores the geohash of its coordinates. Cells sharing a prefix
+are close together, so a radius query becomes a handful of indexed
+``LIKE 'prefix%'`` scans over the cell containing the point and its eight
+neighbours, followed by an exact great-circle distance on those candidates.
+"""
+
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+MAX_PRECISION = 12
+
+
+def encode(latitude, longitude, precision=MAX_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, interval = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = bit_count = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """Return the (height, width) of a cell in degrees."""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180 / 2**lat_bits, 360 / 2**lng_bits
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing the circle."""
+    lat_delta = radius_km / KM_PER_DEGREE
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lng_delta = min(radius_km / (KM_PER_DEGREE * cos_lat), 180)
+    return (
+        max(latitude - lat_delta, -90),
+        min(latitude + lat_delta, 90),
+        longitude - lng_delta,
+        longitude + lng_delta,
+    )
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Geohash prefixes whose cells together cover the circle.
+
+    Picks the finest precision whose cells are at least ``radius_km`` across
+    so that the centre cell and its neighbours are enough.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    lat_span, lng_span = max_lat - latitude, max_lng - longitude
+    precision = MAX_PRECISION
+    while precision > 1:
+        height, width = cell_size(precision)
+        if height >= lat_span and width >= lng_span:
+            break
+        precision -= 1
+    if precision == 1 and lng_span >= 180:
+        return [""]
+
+    height, width = cell_size(precision)
+    cells = set()
+    for lat_step in (-height, 0, height):
+        for lng_step in (-width, 0, width):
+            lat = min(max(latitude + lat_step, -90), 89.999999)
+            lng = (longitude + lng_step + 180) % 360 - 180
+            cells.add(encode(lat, lng, precision))
+    return sorted(cells)
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from efood_main.apps.workshop.services import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Give the seats of expired checkout holds back to their workshops."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Holds released per statement (and transaction).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep sweeping instead of exiting once no hold has expired.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=15.0,
+            help="Seconds to sleep between sweeps when no hold has expired.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                released = release_expired_holds(batch_size=options["batch_size"])
+                total += released
+                if released:
+                    continue
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"Released {total} expired seat hold(s).")
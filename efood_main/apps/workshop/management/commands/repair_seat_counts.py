@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from efood_main.apps.workshop.models import Workshop
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the seats taken of workshops from their registrations and seat "
+        "holds, e.g. after bulk imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "workshop_ids", nargs="*", type=int, help="Only these workshops."
+        )
+
+    def handle(self, *args, **options):
+        workshops = Workshop.objects.all()
+        if options["workshop_ids"]:
+            workshops = workshops.filter(pk__in=options["workshop_ids"])
+        updated = workshops.refresh_seats_taken()
+        self.stdout.write(f"Recounted the seats of {updated} workshop(s).")
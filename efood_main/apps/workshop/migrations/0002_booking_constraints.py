@@ -0,0 +1,41 @@
+# Generated by Django 4.2.6 on 2026-10-18 13:30
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def delete_duplicate_registrations(apps, schema_editor):
+    WorkshopRegistration = apps.get_model("workshop", "WorkshopRegistration")
+    duplicates = (
+        WorkshopRegistration.objects.values("customer_id", "workshop_id")
+        .annotate(keep_id=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+    for row in duplicates:
+        WorkshopRegistration.objects.filter(
+            customer_id=row["customer_id"], workshop_id=row["workshop_id"]
+        ).exclude(id=row["keep_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workshop", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_registrations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="workshop",
+            constraint=models.CheckConstraint(
+                check=models.Q(("capacity__gte", 0)),
+                name="workshop_capacity_non_negative",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="workshopregistration",
+            constraint=models.UniqueConstraint(
+                fields=("customer", "workshop"), name="unique_workshop_registration"
+            ),
+        ),
+    ]
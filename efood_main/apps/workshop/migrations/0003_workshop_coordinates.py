@@ -0,0 +1,136 @@
+# Generated by Django 4.2.6 on 2026-10-18 13:45
+
+import django.core.validators
+from django.db import migrations, models
+
+# Copied from workshop.geo as it was, so the stored geohashes never change
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(latitude, longitude, precision=12):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, interval = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = bit_count = 0
+    return "".join(chars)
+
+
+def parse_coordinate(value, limit):
+    try:
+        number = float(str(value).strip().replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+    if not -limit <= number <= limit:
+        return None
+    return number
+
+
+def convert_coordinates(apps, schema_editor):
+    Workshop = apps.get_model("workshop", "Workshop")
+    workshops = Workshop.objects.exclude(latitude__isnull=True).exclude(
+        longitude__isnull=True
+    )
+    batch = []
+    for workshop in workshops.only("id", "latitude", "longitude").iterator():
+        lat = parse_coordinate(workshop.latitude, 90)
+        lng = parse_coordinate(workshop.longitude, 180)
+        if lat is None or lng is None:
+            continue
+        workshop.latitude_value = lat
+        workshop.longitude_value = lng
+        workshop.geohash = encode_geohash(lat, lng)
+        batch.append(workshop)
+        if len(batch) >= 1000:
+            Workshop.objects.bulk_update(
+                batch, ["latitude_value", "longitude_value", "geohash"]
+            )
+            batch = []
+    Workshop.objects.bulk_update(
+        batch, ["latitude_value", "longitude_value", "geohash"]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workshop", "0002_booking_constraints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="workshop",
+            name="latitude_value",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="workshop",
+            name="longitude_value",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="workshop",
+            name="geohash",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=12, null=True
+            ),
+        ),
+        # Unparseable coordinates are dropped rather than failing the migration
+        migrations.RunPython(convert_coordinates, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="workshop",
+            name="latitude",
+        ),
+        migrations.RemoveField(
+            model_name="workshop",
+            name="longitude",
+        ),
+        migrations.RenameField(
+            model_name="workshop",
+            old_name="latitude_value",
+            new_name="latitude",
+        ),
+        migrations.RenameField(
+            model_name="workshop",
+            old_name="longitude_value",
+            new_name="longitude",
+        ),
+        migrations.AlterField(
+            model_name="workshop",
+            name="latitude",
+            field=models.FloatField(
+                blank=True,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(-90),
+                    django.core.validators.MaxValueValidator(90),
+                ],
+            ),
+        ),
+        migrations.AlterField(
+            model_name="workshop",
+            name="longitude",
+            field=models.FloatField(
+                blank=True,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(-180),
+                    django.core.validators.MaxValueValidator(180),
+                ],
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking writes on a live table
+    atomic = False
+
+    dependencies = [
+        ("chef", "0003_chef_counters"),
+        ("workshop", "0003_workshop_coordinates"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="workshop",
+            index=models.Index(
+                fields=["chef", "-date", "-id"], name="workshop_chef_date_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="workshop",
+            index=models.Index(fields=["-date", "-id"], name="workshop_date_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="workshopregistration",
+            index=models.Index(
+                condition=models.Q(("is_canceled", False)),
+                fields=["customer", "workshop"],
+                name="registration_active_idx",
+            ),
+        ),
+        # workshop_chef_date_idx leads with chef_id
+        migrations.AlterField(
+            model_name="workshop",
+            name="chef",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="workshops",
+                to="chef.chef",
+            ),
+        ),
+    ]
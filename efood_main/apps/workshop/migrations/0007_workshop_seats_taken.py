@@ -0,0 +1,67 @@
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_per_workshop(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(workshop=OuterRef("pk"))
+            .order_by()
+            .values("workshop")
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def split_capacity(apps, schema_editor):
+    """The old capacity counted the free seats: add back the taken ones."""
+    Workshop = apps.get_model("workshop", "Workshop")
+    taken = count_per_workshop(
+        apps.get_model("workshop", "WorkshopRegistration")
+    ) + count_per_workshop(apps.get_model("workshop", "SeatHold"))
+    Workshop.objects.update(seats_taken=taken, max_capacity=F("max_capacity") + taken)
+
+
+def merge_capacity(apps, schema_editor):
+    Workshop = apps.get_model("workshop", "Workshop")
+    Workshop.objects.update(max_capacity=F("max_capacity") - F("seats_taken"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workshop", "0006_seat_holds"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="workshop",
+            name="workshop_capacity_non_negative",
+        ),
+        migrations.RenameField(
+            model_name="workshop",
+            old_name="capacity",
+            new_name="max_capacity",
+        ),
+        migrations.AddField(
+            model_name="workshop",
+            name="seats_taken",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(split_capacity, merge_capacity),
+        migrations.AlterField(
+            model_name="workshop",
+            name="max_capacity",
+            field=models.PositiveIntegerField(verbose_name="capacity"),
+        ),
+        migrations.AddConstraint(
+            model_name="workshop",
+            constraint=models.CheckConstraint(
+                check=models.Q(("seats_taken__lte", models.F("max_capacity"))),
+                name="workshop_seats_within_capacity",
+            ),
+        ),
+    ]
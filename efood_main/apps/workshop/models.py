@@ -1,22 +1,118 @@
+import math
+
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import (
+    ASin,
+    Coalesce,
+    Cos,
+    Greatest,
+    Power,
+    Radians,
+    Sin,
+    Sqrt,
+)
+from django.utils import timezone
 from djmoney.models.fields import MoneyField
 
 from efood_main.apps.accounts.models import User
 from efood_main.apps.chef.models import Chef
 from efood_main.apps.recipe.models import RecipeItem
 
+from . import geo
+
+
+def count_per_workshop(queryset):
+    """Subquery counting the rows of ``queryset`` that belong to each workshop."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(workshop=OuterRef("pk"))
+            .order_by()
+            .values("workshop")
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+class WorkshopQuerySet(models.QuerySet):
+    def bookable(self):
+        return self.filter(seats_taken__lt=F("max_capacity"))
+
+    def sold_out(self):
+        return self.filter(seats_taken__gte=F("max_capacity"))
+
+    def refresh_seats_taken(self):
+        """Recount the seats taken by registrations and holds in SQL.
+
+        A workshop found with more of them than ``max_capacity`` keeps them
+        all, and its capacity is raised to match.
+        """
+        taken = count_per_workshop(WorkshopRegistration.objects.all()) + (
+            count_per_workshop(SeatHold.objects.all())
+        )
+        return self.update(
+            seats_taken=taken, max_capacity=Greatest(F("max_capacity"), taken)
+        )
+
+    def nearby(self, latitude, longitude, radius_km):
+        """Workshops within ``radius_km`` of the point, nearest first.
+
+        The geohash prefixes and bounding box narrow the rows through
+        indexes; the exact distance is only computed for those candidates.
+        """
+        in_cells = Q()
+        for cell in geo.covering_cells(latitude, longitude, radius_km):
+            in_cells |= Q(geohash__startswith=cell)
+        min_lat, max_lat, min_lng, max_lng = geo.bounding_box(
+            latitude, longitude, radius_km
+        )
+        queryset = self.filter(in_cells, latitude__range=(min_lat, max_lat))
+        if min_lng >= -180 and max_lng <= 180:
+            queryset = queryset.filter(longitude__range=(min_lng, max_lng))
+
+        lat, lng = Radians(F("latitude")), Radians(F("longitude"))
+        a = Power(Sin((lat - math.radians(latitude)) / 2), 2) + math.cos(
+            math.radians(latitude)
+        ) * Cos(lat) * Power(Sin((lng - math.radians(longitude)) / 2), 2)
+        return (
+            queryset.annotate(distance=2 * geo.EARTH_RADIUS_KM * ASin(Sqrt(a)))
+            .filter(distance__lte=radius_km)
+            .order_by("distance")
+        )
+
 
 # Create your models here.
 class Workshop(models.Model):
-    chef = models.ForeignKey(Chef, on_delete=models.CASCADE, related_name="workshops")
+    # Indexed through workshop_chef_date_idx, which leads with chef
+    chef = models.ForeignKey(
+        Chef, on_delete=models.CASCADE, related_name="workshops", db_index=False
+    )
     title = models.CharField(max_length=255)
     description = models.TextField()
     date = models.DateField()
     time = models.TimeField()
-    capacity = models.IntegerField()
+    max_capacity = models.PositiveIntegerField("capacity")
+    # Registrations plus seat holds. Only the booking services move it, with
+    # UPDATE ... SET seats_taken = seats_taken +/- 1, and saving a workshop
+    # never writes it back; repair with manage.py repair_seat_counts
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
     address = models.CharField(max_length=255, blank=True, null=True)
-    latitude = models.CharField(max_length=20, blank=True, null=True)
-    longitude = models.CharField(max_length=20, blank=True, null=True)
+    latitude = models.FloatField(
+        blank=True,
+        null=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.FloatField(
+        blank=True,
+        null=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+    geohash = models.CharField(
+        max_length=12, blank=True, null=True, editable=False, db_index=True
+    )
     price = MoneyField(
         max_digits=10, decimal_places=2, default_currency="EUR", null=True
     )
@@ -27,11 +123,131 @@ class Workshop(models.Model):
         RecipeItem, null=True, blank=True, on_delete=models.CASCADE
     )
 
+    objects = WorkshopQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(seats_taken__lte=F("max_capacity")),
+                name="workshop_seats_within_capacity",
+            )
+        ]
+        indexes = [
+            # Workshop builder and customer dashboard, keyset-paginated on
+            # (-date, -id); upcoming-workshop filters use them too
+            models.Index(
+                fields=["chef", "-date", "-id"], name="workshop_chef_date_idx"
+            ),
+            models.Index(fields=["-date", "-id"], name="workshop_date_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
+    @property
+    def available_seats(self):
+        return max(self.max_capacity - self.seats_taken, 0)
+
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geo.encode(self.latitude, self.longitude)
+        else:
+            self.geohash = None
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None and not self._state.adding:
+            # The loaded seats_taken may already be stale
+            update_fields = kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "seats_taken"
+            ]
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
+
 
 class WorkshopRegistration(models.Model):
     customer = models.ForeignKey(User, on_delete=models.CASCADE)
     workshop = models.ForeignKey(Workshop, on_delete=models.CASCADE)
     is_canceled = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["customer", "workshop"], name="unique_workshop_registration"
+            )
+        ]
+        indexes = [
+            # A customer's active bookings, answered from the index alone
+            models.Index(
+                fields=["customer", "workshop"],
+                condition=models.Q(is_canceled=False),
+                name="registration_active_idx",
+            ),
+        ]
+
+
+class WaitlistEntry(models.Model):
+    """A customer waiting for a seat of a sold-out workshop, served FIFO."""
+
+    # Indexed through unique_waitlist_entry, which leads with customer
+    customer = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    # Indexed through waitlist_queue_idx, which leads with workshop
+    workshop = models.ForeignKey(
+        Workshop, on_delete=models.CASCADE, related_name="waitlist", db_index=False
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "waitlist entries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["customer", "workshop"], name="unique_waitlist_entry"
+            )
+        ]
+        indexes = [
+            # Head of a workshop's queue and a customer's place in it
+            models.Index(fields=["workshop", "id"], name="waitlist_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.customer} waiting for {self.workshop}"
+
+
+class SeatHold(models.Model):
+    """A seat of a paid workshop taken for a customer during checkout.
+
+    The seat is the customer's until ``expires_at``; after that the sweeper
+    (``release_seat_holds``) gives it back.
+    """
+
+    # Indexed through unique_seat_hold, which leads with customer
+    customer = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    # Indexed through seathold_workshop_expiry_idx, which leads with workshop
+    workshop = models.ForeignKey(
+        Workshop, on_delete=models.CASCADE, related_name="holds", db_index=False
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["customer", "workshop"], name="unique_seat_hold"
+            )
+        ]
+        indexes = [
+            # The sweeper's scan of expired holds
+            models.Index(fields=["expires_at"], name="seathold_expiry_idx"),
+            # Reclaiming a sold-out workshop's expired holds
+            models.Index(
+                fields=["workshop", "expires_at"], name="seathold_workshop_expiry_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.customer} holding a seat of {self.workshop}"
+
+    @property
+    def is_active(self):
+        return self.expires_at > timezone.now()
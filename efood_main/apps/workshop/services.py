@@ -0,0 +1,335 @@
+import enum
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from efood_main.apps.mailer.utils import enqueue_email
+
+from .models import SeatHold, WaitlistEntry, Workshop, WorkshopRegistration
+
+# Deletes a batch of expired holds and gives their seats back, all in one
+# statement. The workshops are locked in id order so that concurrent sweeps
+# cannot deadlock, and holds being confirmed right now are skipped.
+RELEASE_HOLDS_SQL = """
+WITH expired AS (
+    DELETE FROM {hold} WHERE id IN (
+        SELECT id FROM {hold}
+        WHERE expires_at <= %s {scope}
+        ORDER BY expires_at
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING workshop_id
+), released AS (
+    SELECT workshop_id, COUNT(*) AS seats FROM expired GROUP BY workshop_id
+), locked AS (
+    SELECT id FROM {workshop}
+    WHERE id IN (SELECT workshop_id FROM released)
+    ORDER BY id
+    FOR NO KEY UPDATE
+)
+UPDATE {workshop} AS workshop
+SET seats_taken = GREATEST(workshop.seats_taken - released.seats, 0)
+FROM released, locked
+WHERE workshop.id = released.workshop_id AND locked.id = released.workshop_id
+RETURNING workshop.id, released.seats
+"""
+
+
+class BookingResult(enum.Enum):
+    BOOKED = "booked"
+    HELD = "held"
+    ALREADY_BOOKED = "already_booked"
+    SOLD_OUT = "sold_out"
+
+
+class WaitlistResult(enum.Enum):
+    JOINED = "joined"
+    ALREADY_WAITING = "already_waiting"
+    ALREADY_BOOKED = "already_booked"
+    SEATS_AVAILABLE = "seats_available"
+
+
+def hold_minutes(workshop, purpose="checkout"):
+    """Minutes a seat of ``workshop`` is held for ``purpose``; 0 to book at once.
+
+    Only paid workshops are checked out, and only when checkout holds are on.
+    """
+    minutes = settings.SEAT_HOLD_MINUTES
+    if not minutes["checkout"] or workshop.price is None or not workshop.price.amount:
+        return 0
+    return minutes[purpose]
+
+
+def take_seat(workshop, reclaim=True):
+    """Take one seat with ``UPDATE ... WHERE seats_taken < max_capacity``.
+
+    Returns False if sold out. The update takes the row lock, so concurrent
+    bookers can never take more seats than there are. With ``reclaim``, a
+    sold-out workshop first gets back the seats of its expired holds (the
+    waitlist's first), so the answer never depends on when the sweeper last
+    ran.
+    """
+    seats = Workshop.objects.filter(pk=workshop.pk).bookable()
+    if seats.update(seats_taken=F("seats_taken") + 1):
+        return True
+    return bool(
+        reclaim
+        and release_expired_holds(workshop=workshop)
+        and seats.update(seats_taken=F("seats_taken") + 1)
+    )
+
+
+def free_seat(workshop):
+    Workshop.objects.filter(pk=workshop.pk).update(
+        seats_taken=Greatest(F("seats_taken") - 1, 0)
+    )
+
+
+def give_back_seat(workshop):
+    """Return a seat to ``workshop``, or to the head of its waitlist."""
+    free_seat(workshop)
+    promote_waitlist(workshop)
+
+
+def book_workshop(customer, workshop, reclaim=True):
+    """Register ``customer`` and take one seat in a single transaction.
+
+    The unique (customer, workshop) constraint rejects duplicates.
+    """
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                WorkshopRegistration.objects.create(
+                    customer=customer, workshop=workshop
+                )
+        except IntegrityError:
+            return BookingResult.ALREADY_BOOKED
+
+        if not take_seat(workshop, reclaim):
+            transaction.set_rollback(True)
+            return BookingResult.SOLD_OUT
+    return BookingResult.BOOKED
+
+
+def hold_seat(customer, workshop, minutes=None, reclaim=True):
+    """Take a seat of ``workshop`` for ``customer`` to check out within ``minutes``.
+
+    A customer who still holds a seat keeps that hold, so reloading the
+    checkout never takes a second seat. Returns HELD, ALREADY_BOOKED or
+    SOLD_OUT.
+    """
+    minutes = minutes or hold_minutes(workshop)
+    now = timezone.now()
+    with transaction.atomic():
+        if WorkshopRegistration.objects.filter(
+            customer=customer, workshop=workshop
+        ).exists():
+            return BookingResult.ALREADY_BOOKED
+        expires_at = (
+            SeatHold.objects.filter(customer=customer, workshop=workshop)
+            .values_list("expires_at", flat=True)
+            .first()
+        )
+        if expires_at is not None:
+            if expires_at > now:
+                return BookingResult.HELD
+            if reclaim:
+                # Its seat goes back first, to whoever waits for it
+                release_expired_holds(now, workshop=workshop)
+            else:
+                SeatHold.objects.filter(customer=customer, workshop=workshop).delete()
+                free_seat(workshop)
+        if not take_seat(workshop, reclaim):
+            return BookingResult.SOLD_OUT
+        try:
+            with transaction.atomic():
+                SeatHold.objects.create(
+                    customer=customer,
+                    workshop=workshop,
+                    expires_at=now + timedelta(minutes=minutes),
+                )
+        except IntegrityError:
+            # The same customer's other request took a seat first
+            transaction.set_rollback(True)
+    return BookingResult.HELD
+
+
+def active_hold(customer, workshop):
+    return SeatHold.objects.filter(
+        customer=customer, workshop=workshop, expires_at__gt=timezone.now()
+    ).first()
+
+
+def confirm_hold(customer, workshop):
+    """Book the seat ``customer`` holds; False if the hold has expired."""
+    with transaction.atomic():
+        # An expired hold is left to the sweeper, which gives its seat back
+        confirmed, _ = SeatHold.objects.filter(
+            customer=customer, workshop=workshop, expires_at__gt=timezone.now()
+        ).delete()
+        if not confirmed:
+            return False
+        WorkshopRegistration.objects.create(customer=customer, workshop=workshop)
+    return True
+
+
+def release_hold(customer, workshop):
+    """Give back the seat ``customer`` holds; False if there was none."""
+    with transaction.atomic():
+        deleted, _ = SeatHold.objects.filter(
+            customer=customer, workshop=workshop
+        ).delete()
+        if not deleted:
+            return False
+        give_back_seat(workshop)
+    return True
+
+
+def release_expired_holds(now=None, workshop=None, batch_size=None):
+    """Give back the seats of expired holds; return how many were released.
+
+    One statement deletes up to ``batch_size`` holds (all by default) of every
+    workshop, or only of ``workshop``, and adds their seats back. The freed
+    seats of workshops with a waitlist then go to the customers waiting.
+    """
+    now = now or timezone.now()
+    quote = connection.ops.quote_name
+    sql = RELEASE_HOLDS_SQL.format(
+        hold=quote(SeatHold._meta.db_table),
+        workshop=quote(Workshop._meta.db_table),
+        scope="AND workshop_id = %s" if workshop else "",
+    )
+    params = [now, workshop.pk, batch_size] if workshop else [now, batch_size]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            released = dict(cursor.fetchall())
+        if released:
+            waiting = Workshop.objects.filter(
+                pk__in=WaitlistEntry.objects.filter(workshop__in=list(released)).values(
+                    "workshop_id"
+                )
+            )
+            for waited_for in waiting:
+                promote_waitlist(waited_for)
+    return sum(released.values())
+
+
+def cancel_booking(customer, workshop):
+    """Delete the registration and give the seat back; False if none existed.
+
+    The seat goes to the head of the waitlist, if anyone is waiting, in the
+    same transaction.
+    """
+    with transaction.atomic():
+        deleted, _ = WorkshopRegistration.objects.filter(
+            customer=customer, workshop=workshop
+        ).delete()
+        if not deleted:
+            return False
+        give_back_seat(workshop)
+    return True
+
+
+def join_waitlist(customer, workshop):
+    """Queue ``customer`` for the next free seat of a sold-out workshop.
+
+    The workshop row is locked like a booking locks it, so no seat can be
+    given back between the capacity check and the insert, which would leave
+    the customer waiting for a seat nobody takes.
+    """
+    with transaction.atomic():
+        # Locked whatever its seats: a filter on them would skip sold-out rows
+        seats_taken, max_capacity = (
+            Workshop.objects.select_for_update(no_key=True)
+            .filter(pk=workshop.pk)
+            .values_list("seats_taken", "max_capacity")
+            .get()
+        )
+        if seats_taken < max_capacity:
+            return WaitlistResult.SEATS_AVAILABLE
+        # A held seat is the customer's until it expires, like a booked one
+        if (
+            WorkshopRegistration.objects.filter(
+                customer=customer, workshop=workshop
+            ).exists()
+            or active_hold(customer, workshop) is not None
+        ):
+            return WaitlistResult.ALREADY_BOOKED
+        _, created = WaitlistEntry.objects.get_or_create(
+            customer=customer, workshop=workshop
+        )
+    return WaitlistResult.JOINED if created else WaitlistResult.ALREADY_WAITING
+
+
+def leave_waitlist(customer, workshop):
+    deleted, _ = WaitlistEntry.objects.filter(
+        customer=customer, workshop=workshop
+    ).delete()
+    return bool(deleted)
+
+
+def waitlist_position(customer, workshop):
+    """1 for the head of the queue; 0 if ``customer`` is not waiting."""
+    entry = WaitlistEntry.objects.filter(customer=customer, workshop=workshop)
+    return WaitlistEntry.objects.filter(
+        workshop=workshop, id__lte=entry.values("id")
+    ).count()
+
+
+def promote_waitlist(workshop):
+    """Give the free seats to the longest-waiting customers; return them.
+
+    The seats of paid workshops are held for the customers to check out,
+    those of free ones booked. Each promoted customer gets an email, queued
+    in the same transaction. Call it with the workshop row locked (after
+    updating its seats) so that concurrent promotions are serialized.
+    """
+    promoted = []
+    minutes = hold_minutes(workshop, "waitlist")
+    with transaction.atomic():
+        while True:
+            entry = (
+                WaitlistEntry.objects.select_for_update(of=("self",))
+                .select_related("customer")
+                .filter(workshop=workshop)
+                .order_by("id")
+                .first()
+            )
+            if entry is None:
+                break
+            # Not reclaiming expired holds, which would promote recursively
+            if minutes:
+                result = hold_seat(entry.customer, workshop, minutes, reclaim=False)
+            else:
+                result = book_workshop(entry.customer, workshop, reclaim=False)
+            if result is BookingResult.SOLD_OUT:
+                break
+            entry.delete()
+            if result is BookingResult.ALREADY_BOOKED:
+                continue
+            promoted.append(entry.customer)
+            if result is BookingResult.HELD:
+                deadline = timezone.localtime() + timedelta(minutes=minutes)
+                body = (
+                    f"A seat of {workshop.title} ({workshop.date} at "
+                    f"{workshop.time}) was freed and is held for you until "
+                    f"{deadline:%Y-%m-%d %H:%M}. Book it from the workshop page."
+                )
+            else:
+                body = (
+                    f"A seat of {workshop.title} was freed and it is yours: you "
+                    f"are booked for {workshop.date} at {workshop.time}."
+                )
+            enqueue_email(
+                "A seat opened up for you",
+                body,
+                settings.EMAIL_HOST_USER,
+                [entry.customer.email],
+            )
+    return promoted
@@ -1,7 +1,9 @@
+import shutil
+import tempfile
 from datetime import timedelta
 
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from efood_main.apps.accounts.models import User, UserProfile
 from efood_main.apps.chef.models import Chef
@@ -9,6 +11,14 @@ from efood_main.apps.recipe.models import Category, RecipeItem
 from efood_main.apps.workshop.forms import WorkshopItemForm
 
 
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class WorkshopItemFormTest(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -64,13 +74,44 @@ class WorkshopItemFormTest(TestCase):
             preparation_time=timedelta(minutes=30),
         )
 
+    def form_data(self, **data):
+        return {
+            "title": "Test Workshop",
+            "description": "A test workshop",
+            "date": "2024-03-25",
+            "time": "14:00",
+            "max_capacity": 20,
+            "price_0": 10,
+            "price_1": "EUR",
+            "recipe": RecipeItem.objects.first().id,
+            **data,
+        }
+
+    def test_capacity_cannot_drop_below_the_seats_taken(self):
+        workshop = WorkshopItemForm(data=self.form_data(), chef=self.chef).save(
+            commit=False
+        )
+        workshop.chef = self.chef
+        workshop.seats_taken = 5
+        workshop.save()
+        form = WorkshopItemForm(
+            data=self.form_data(max_capacity=4), instance=workshop, chef=self.chef
+        )
+        self.assertEqual(
+            form.errors["max_capacity"], ["5 seats are already booked or held."]
+        )
+        form = WorkshopItemForm(
+            data=self.form_data(max_capacity=5), instance=workshop, chef=self.chef
+        )
+        self.assertTrue(form.is_valid())
+
     def test_form_with_valid_data(self):
         form_data = {
             "title": "Test Workshop",
             "description": "A test workshop",
             "date": "2024-03-25",
             "time": "14:00",
-            "capacity": 20,
+            "max_capacity": 20,
             "address": "123 Main St",
             "latitude": "40.7128",
             "longitude": "-74.0060",
@@ -0,0 +1,75 @@
+from datetime import date, time, timedelta
+
+from django.test import SimpleTestCase, TestCase
+
+from efood_main.apps.accounts.models import User, UserProfile
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.workshop import geo
+from efood_main.apps.workshop.models import Workshop
+
+
+class GeohashTest(SimpleTestCase):
+    def test_encode_matches_reference(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_haversine(self):
+        # Paris -> London is roughly 344 km
+        distance = geo.haversine(48.8566, 2.3522, 51.5074, -0.1278)
+        self.assertAlmostEqual(distance, 343.5, delta=1)
+
+    def test_covering_cells_contain_points_on_the_circle(self):
+        lat, lng, radius = 40.7128, -74.0060, 5
+        cells = geo.covering_cells(lat, lng, radius)
+        delta = radius / geo.KM_PER_DEGREE
+        for point in [(lat + delta, lng), (lat - delta, lng), (lat, lng + delta)]:
+            geohash = geo.encode(*point)
+            self.assertTrue(any(geohash.startswith(cell) for cell in cells))
+
+
+class NearbyWorkshopsTest(TestCase):
+    def setUp(self):
+        chef_user = User.objects.create(
+            first_name="Chef",
+            last_name="Test",
+            username="cheftest",
+            email="cheftest@example.com",
+        )
+        self.chef = Chef.objects.create(
+            user=chef_user,
+            user_profile=UserProfile.objects.get(user=chef_user),
+            chef_name="TestChef",
+        )
+        self.manhattan = self.create_workshop("Manhattan", 40.7128, -74.0060)
+        self.brooklyn = self.create_workshop("Brooklyn", 40.6782, -73.9442)
+        self.boston = self.create_workshop("Boston", 42.3601, -71.0589)
+        self.create_workshop("Nowhere", None, None)
+
+    def create_workshop(self, title, latitude, longitude):
+        return Workshop.objects.create(
+            chef=self.chef,
+            title=title,
+            description="A workshop.",
+            date=date.today() + timedelta(days=1),
+            time=time(10, 0),
+            max_capacity=5,
+            price=50.00,
+            latitude=latitude,
+            longitude=longitude,
+        )
+
+    def test_geohash_is_stored_on_save(self):
+        self.assertEqual(self.manhattan.geohash, geo.encode(40.7128, -74.0060))
+        self.manhattan.latitude = 42.3601
+        self.manhattan.longitude = -71.0589
+        self.manhattan.save(update_fields=["latitude", "longitude"])
+        self.manhattan.refresh_from_db()
+        self.assertEqual(self.manhattan.geohash, self.boston.geohash)
+
+    def test_nearby_is_ordered_by_distance(self):
+        workshops = list(Workshop.objects.nearby(40.7306, -73.9866, 10))
+        self.assertEqual(workshops, [self.manhattan, self.brooklyn])
+        self.assertLess(workshops[0].distance, workshops[1].distance)
+
+    def test_nearby_with_large_radius(self):
+        workshops = Workshop.objects.nearby(40.7306, -73.9866, 400)
+        self.assertEqual(list(workshops), [self.manhattan, self.brooklyn, self.boston])
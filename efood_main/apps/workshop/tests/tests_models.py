@@ -43,7 +43,7 @@ class BaseTest(TestCase):
             description="Learn the basics of cooking.",
             date=date.today(),
             time=time(10, 0),
-            capacity=20,
+            max_capacity=20,
             price=50.00,
         )
 
@@ -65,5 +65,5 @@ class WorkshopRegistrationModelTest(BaseTest):
         registration = WorkshopRegistration.objects.get(customer__username="testuser")
         self.assertTrue(isinstance(registration, WorkshopRegistration))
         self.assertEqual(registration.workshop.title, "Cooking Basics")
-        self.assertEqual(registration.workshop.capacity, 20)
+        self.assertEqual(registration.workshop.max_capacity, 20)
         self.assertFalse(registration.is_canceled)
@@ -0,0 +1,494 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from efood_main.apps.accounts.models import User, UserProfile
+from efood_main.apps.chef.models import Chef
+from efood_main.apps.mailer.models import OutboxEmail
+from efood_main.apps.workshop.models import (
+    SeatHold,
+    WaitlistEntry,
+    Workshop,
+    WorkshopRegistration,
+)
+from efood_main.apps.workshop.services import (
+    BookingResult,
+    WaitlistResult,
+    book_workshop,
+    cancel_booking,
+    confirm_hold,
+    hold_minutes,
+    hold_seat,
+    join_waitlist,
+    leave_waitlist,
+    promote_waitlist,
+    release_expired_holds,
+    release_hold,
+    waitlist_position,
+)
+
+
+def create_workshop(capacity, price=50.00):
+    chef_user = User.objects.create(
+        first_name="Chef",
+        last_name="Test",
+        username="cheftest",
+        email="cheftest@example.com",
+    )
+    chef = Chef.objects.create(
+        user=chef_user,
+        user_profile=UserProfile.objects.get(user=chef_user),
+        chef_name="TestChef",
+    )
+    return Workshop.objects.create(
+        chef=chef,
+        title="Flash sale",
+        description="A very popular workshop.",
+        date=date.today(),
+        time=time(10, 0),
+        max_capacity=capacity,
+        price=price,
+    )
+
+
+class BookingServiceTest(TestCase):
+    def setUp(self):
+        self.workshop = create_workshop(capacity=1)
+        self.customer = User.objects.create(
+            first_name="Test",
+            last_name="User",
+            username="testuser",
+            email="testuser@example.com",
+            role=User.CUSTOMER,
+        )
+
+    def test_book_takes_a_seat(self):
+        result = book_workshop(self.customer, self.workshop)
+        self.assertIs(result, BookingResult.BOOKED)
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 0)
+
+    def test_second_booking_is_rejected_without_taking_a_seat(self):
+        self.workshop.max_capacity = 2
+        self.workshop.save()
+        book_workshop(self.customer, self.workshop)
+        result = book_workshop(self.customer, self.workshop)
+        self.assertIs(result, BookingResult.ALREADY_BOOKED)
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 1)
+
+    def test_sold_out_leaves_no_registration(self):
+        self.workshop.max_capacity = 0
+        self.workshop.save()
+        result = book_workshop(self.customer, self.workshop)
+        self.assertIs(result, BookingResult.SOLD_OUT)
+        self.assertFalse(WorkshopRegistration.objects.exists())
+
+    def test_cancel_releases_the_seat(self):
+        book_workshop(self.customer, self.workshop)
+        self.assertTrue(cancel_booking(self.customer, self.workshop))
+        self.assertFalse(cancel_booking(self.customer, self.workshop))
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 1)
+
+    def test_saving_a_workshop_keeps_the_seats_taken_since_it_was_loaded(self):
+        stale = Workshop.objects.get(pk=self.workshop.pk)
+        book_workshop(self.customer, self.workshop)
+        stale.max_capacity = 3
+        stale.save()
+        self.workshop.refresh_from_db()
+        self.assertEqual(
+            (self.workshop.max_capacity, self.workshop.seats_taken), (3, 1)
+        )
+
+    def test_capacity_cannot_drop_below_the_seats_taken(self):
+        book_workshop(self.customer, self.workshop)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Workshop.objects.filter(pk=self.workshop.pk).update(max_capacity=0)
+
+    def test_repair_recounts_registrations_and_holds(self):
+        Workshop.objects.update(max_capacity=2)
+        book_workshop(self.customer, self.workshop)
+        hold_seat(create_customers(1)[-1], self.workshop, minutes=10)
+        Workshop.objects.update(max_capacity=1, seats_taken=0)
+        out = StringIO()
+        call_command("repair_seat_counts", stdout=out)
+        self.assertIn("Recounted the seats of 1 workshop(s).", out.getvalue())
+        self.workshop.refresh_from_db()
+        # Overbooked, so the capacity grew to keep every seat
+        self.assertEqual(
+            (self.workshop.max_capacity, self.workshop.seats_taken), (2, 2)
+        )
+
+
+def create_customers(count):
+    User.objects.bulk_create(
+        User(
+            first_name="Customer",
+            last_name=str(i),
+            username=f"customer{i}",
+            email=f"customer{i}@example.com",
+            role=User.CUSTOMER,
+        )
+        for i in range(count)
+    )
+    return list(User.objects.filter(role=User.CUSTOMER).order_by("id"))
+
+
+class WaitlistServiceTest(TestCase):
+    def setUp(self):
+        # Free, so that promoted customers are booked rather than held
+        self.workshop = create_workshop(capacity=1, price=None)
+        self.booked, self.first, self.second = create_customers(3)
+        book_workshop(self.booked, self.workshop)
+
+    def test_join_only_when_sold_out_and_not_booked(self):
+        self.assertIs(
+            join_waitlist(self.booked, self.workshop), WaitlistResult.ALREADY_BOOKED
+        )
+        self.assertIs(join_waitlist(self.first, self.workshop), WaitlistResult.JOINED)
+        self.assertIs(
+            join_waitlist(self.first, self.workshop), WaitlistResult.ALREADY_WAITING
+        )
+        self.assertIs(join_waitlist(self.second, self.workshop), WaitlistResult.JOINED)
+        self.assertEqual(waitlist_position(self.second, self.workshop), 2)
+        self.assertEqual(waitlist_position(self.booked, self.workshop), 0)
+        Workshop.objects.filter(pk=self.workshop.pk).update(max_capacity=2)
+        self.assertIs(
+            join_waitlist(self.booked, self.workshop), WaitlistResult.SEATS_AVAILABLE
+        )
+
+    def test_cancel_books_the_seat_for_the_head_of_the_queue(self):
+        join_waitlist(self.first, self.workshop)
+        join_waitlist(self.second, self.workshop)
+        self.assertTrue(cancel_booking(self.booked, self.workshop))
+        self.assertTrue(
+            WorkshopRegistration.objects.filter(
+                customer=self.first, workshop=self.workshop
+            ).exists()
+        )
+        self.assertEqual(waitlist_position(self.second, self.workshop), 1)
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, [self.first.email])
+        self.assertIn("Flash sale", email.body)
+
+    def test_customers_who_left_are_skipped(self):
+        join_waitlist(self.first, self.workshop)
+        join_waitlist(self.second, self.workshop)
+        self.assertTrue(leave_waitlist(self.first, self.workshop))
+        self.assertFalse(leave_waitlist(self.first, self.workshop))
+        cancel_booking(self.booked, self.workshop)
+        self.assertEqual(
+            list(WorkshopRegistration.objects.values_list("customer", flat=True)),
+            [self.second.pk],
+        )
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_added_seats_are_filled_from_the_queue(self):
+        join_waitlist(self.first, self.workshop)
+        join_waitlist(self.second, self.workshop)
+        Workshop.objects.filter(pk=self.workshop.pk).update(max_capacity=4)
+        self.assertEqual(promote_waitlist(self.workshop), [self.first, self.second])
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 1)
+
+    def test_seat_is_released_when_nobody_waits(self):
+        cancel_booking(self.booked, self.workshop)
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 1)
+
+    def test_seats_of_paid_workshops_are_held_for_the_promoted(self):
+        Workshop.objects.filter(pk=self.workshop.pk).update(price=20)
+        self.workshop.refresh_from_db()
+        join_waitlist(self.first, self.workshop)
+        cancel_booking(self.booked, self.workshop)
+        hold = SeatHold.objects.get()
+        self.assertEqual(hold.customer, self.first)
+        self.assertGreater(hold.expires_at, timezone.now() + timedelta(hours=23))
+        self.assertIn("held for you until", OutboxEmail.objects.get().body)
+        # Holding a seat, they cannot queue for another one
+        self.assertIs(
+            join_waitlist(self.first, self.workshop), WaitlistResult.ALREADY_BOOKED
+        )
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+
+class SeatHoldServiceTest(TestCase):
+    def setUp(self):
+        self.workshop = create_workshop(capacity=2)
+        self.first, self.second, self.third = create_customers(3)
+
+    def expire(self, *customers):
+        SeatHold.objects.filter(customer__in=customers).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+    def available_seats(self):
+        self.workshop.refresh_from_db()
+        return self.workshop.available_seats
+
+    def test_only_paid_workshops_are_held(self):
+        self.assertEqual(hold_minutes(self.workshop), 10)
+        self.assertEqual(hold_minutes(self.workshop, "waitlist"), 24 * 60)
+        with override_settings(SEAT_HOLD_MINUTES={"checkout": 0, "waitlist": 60}):
+            self.assertEqual(hold_minutes(self.workshop, "waitlist"), 0)
+        self.workshop.price = None
+        self.assertEqual(hold_minutes(self.workshop), 0)
+
+    def test_hold_takes_a_seat_once_until_confirmed(self):
+        self.assertIs(hold_seat(self.first, self.workshop), BookingResult.HELD)
+        self.assertIs(hold_seat(self.first, self.workshop), BookingResult.HELD)
+        self.assertEqual(self.available_seats(), 1)
+        self.assertTrue(confirm_hold(self.first, self.workshop))
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(self.available_seats(), 1)
+        self.assertIs(
+            hold_seat(self.first, self.workshop), BookingResult.ALREADY_BOOKED
+        )
+
+    def test_expired_hold_cannot_be_confirmed(self):
+        hold_seat(self.first, self.workshop)
+        self.expire(self.first)
+        self.assertFalse(confirm_hold(self.first, self.workshop))
+        self.assertFalse(WorkshopRegistration.objects.exists())
+
+    def test_released_hold_gives_the_seat_back(self):
+        hold_seat(self.first, self.workshop)
+        self.assertTrue(release_hold(self.first, self.workshop))
+        self.assertFalse(release_hold(self.first, self.workshop))
+        self.assertEqual(self.available_seats(), 2)
+
+    def test_sweeper_releases_expired_holds_in_one_statement(self):
+        other = Workshop.objects.create(
+            chef=self.workshop.chef,
+            title="Other",
+            description="Another workshop.",
+            date=date.today(),
+            time=time(12, 0),
+            max_capacity=1,
+            price=10,
+        )
+        hold_seat(self.first, self.workshop)
+        hold_seat(self.second, self.workshop)
+        hold_seat(self.first, other)
+        self.expire(self.first)
+        # The statement and the lookup of waitlists to serve, in a savepoint
+        with self.assertNumQueries(4):
+            self.assertEqual(release_expired_holds(), 2)
+        self.assertEqual(self.available_seats(), 1)
+        other.refresh_from_db()
+        self.assertEqual(other.available_seats, 1)
+        self.assertEqual(SeatHold.objects.get().customer, self.second)
+        self.assertEqual(release_expired_holds(), 0)
+
+    def test_sweeper_gives_released_seats_to_the_waitlist(self):
+        hold_seat(self.first, self.workshop)
+        hold_seat(self.second, self.workshop)
+        join_waitlist(self.third, self.workshop)
+        self.expire(self.first)
+        out = StringIO()
+        call_command("release_seat_holds", stdout=out)
+        self.assertIn("Released 1 expired seat hold(s).", out.getvalue())
+        self.assertEqual(
+            set(SeatHold.objects.values_list("customer", flat=True)),
+            {self.second.pk, self.third.pk},
+        )
+        self.assertEqual(self.available_seats(), 0)
+
+    def test_sold_out_workshop_reclaims_expired_holds(self):
+        hold_seat(self.first, self.workshop)
+        hold_seat(self.second, self.workshop)
+        self.assertIs(hold_seat(self.third, self.workshop), BookingResult.SOLD_OUT)
+        self.expire(self.first)
+        self.assertIs(hold_seat(self.third, self.workshop), BookingResult.HELD)
+        self.assertEqual(self.available_seats(), 0)
+        self.assertFalse(SeatHold.objects.filter(customer=self.first).exists())
+
+    def test_expired_hold_is_renewed_with_its_seat(self):
+        hold_seat(self.first, self.workshop)
+        self.expire(self.first)
+        self.assertIs(hold_seat(self.first, self.workshop), BookingResult.HELD)
+        self.assertTrue(SeatHold.objects.get().is_active)
+        self.assertEqual(self.available_seats(), 1)
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+    """Hundreds of parallel bookers must never oversell a workshop."""
+
+    bookers = 300
+    capacity = 50
+    workers = 40
+
+    def setUp(self):
+        self.workshop = create_workshop(capacity=self.capacity)
+        self.customers = create_customers(self.bookers)
+
+    def book(self, customer):
+        try:
+            return book_workshop(customer, self.workshop)
+        finally:
+            connection.close()
+
+    def test_no_oversell_under_contention(self):
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(self.book, self.customers))
+
+        self.assertEqual(results.count(BookingResult.BOOKED), self.capacity)
+        self.assertEqual(
+            results.count(BookingResult.SOLD_OUT), self.bookers - self.capacity
+        )
+        self.assertEqual(WorkshopRegistration.objects.count(), self.capacity)
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 0)
+
+    def test_repeated_clicks_book_once(self):
+        customer = self.customers[0]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(self.book, [customer] * self.workers))
+
+        self.assertEqual(results.count(BookingResult.BOOKED), 1)
+        self.assertEqual(WorkshopRegistration.objects.count(), 1)
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, self.capacity - 1)
+
+
+class ConcurrentWaitlistTest(TransactionTestCase):
+    """Concurrent cancellations hand each seat to a different waiting customer."""
+
+    capacity = 20
+    waiting = 30
+    workers = 20
+
+    def setUp(self):
+        self.workshop = create_workshop(capacity=self.capacity, price=None)
+        customers = create_customers(self.capacity + self.waiting)
+        seats = self.capacity
+        self.booked, self.queue = customers[:seats], customers[seats:]
+        for customer in self.booked:
+            book_workshop(customer, self.workshop)
+        for customer in self.queue:
+            join_waitlist(customer, self.workshop)
+
+    def cancel(self, customer):
+        try:
+            return cancel_booking(customer, self.workshop)
+        finally:
+            connection.close()
+
+    def test_seats_go_to_the_queue_in_order(self):
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            self.assertTrue(all(pool.map(self.cancel, self.booked)))
+
+        seats = self.capacity
+        promoted, waiting = self.queue[:seats], self.queue[seats:]
+        self.assertEqual(
+            set(WorkshopRegistration.objects.values_list("customer", flat=True)),
+            {customer.pk for customer in promoted},
+        )
+        self.assertEqual(
+            list(
+                WaitlistEntry.objects.order_by("id").values_list("customer", flat=True)
+            ),
+            [customer.pk for customer in waiting],
+        )
+        self.assertEqual(OutboxEmail.objects.count(), self.capacity)
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 0)
+
+
+class ConcurrentJoinAndCancelTest(TransactionTestCase):
+    """A seat freed while a customer joins the waitlist goes to that customer."""
+
+    def setUp(self):
+        self.workshop = create_workshop(capacity=1, price=None)
+        self.booked, self.joining = create_customers(2)
+        book_workshop(self.booked, self.workshop)
+
+    def test_cancellation_waits_for_the_join(self):
+        locked, proceed = threading.Event(), threading.Event()
+        get_or_create = WaitlistEntry.objects.get_or_create
+
+        def paused_get_or_create(**kwargs):
+            # The workshop row is locked by now; let the cancellation run
+            locked.set()
+            proceed.wait(5)
+            return get_or_create(**kwargs)
+
+        def join():
+            try:
+                return join_waitlist(self.joining, self.workshop)
+            finally:
+                connection.close()
+
+        def cancel():
+            locked.wait(5)
+            try:
+                return cancel_booking(self.booked, self.workshop)
+            finally:
+                connection.close()
+
+        with mock.patch.object(
+            WaitlistEntry.objects, "get_or_create", paused_get_or_create
+        ), ThreadPoolExecutor(max_workers=2) as pool:
+            joined = pool.submit(join)
+            cancelled = pool.submit(cancel)
+            # Blocked on the workshop row until the join commits
+            wait([cancelled], timeout=0.5)
+            self.assertFalse(cancelled.done())
+            proceed.set()
+            self.assertIs(joined.result(), WaitlistResult.JOINED)
+            self.assertTrue(cancelled.result())
+
+        self.assertEqual(
+            WorkshopRegistration.objects.get().customer_id, self.joining.pk
+        )
+        self.assertFalse(WaitlistEntry.objects.exists())
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, 0)
+
+
+class ConcurrentSeatHoldTest(TransactionTestCase):
+    """Holds, confirmations and sweeps racing never oversell a workshop."""
+
+    holders = 200
+    capacity = 50
+    workers = 40
+
+    def setUp(self):
+        self.workshop = create_workshop(capacity=self.capacity)
+        self.customers = create_customers(self.holders)
+
+    def checkout(self, customer):
+        try:
+            if hold_seat(customer, self.workshop) is not BookingResult.HELD:
+                return False
+            if customer.pk % 2:
+                # Half of them walk away and let the hold expire
+                SeatHold.objects.filter(customer=customer).update(
+                    expires_at=timezone.now() - timedelta(seconds=1)
+                )
+                release_expired_holds(batch_size=10)
+                return False
+            return confirm_hold(customer, self.workshop)
+        finally:
+            connection.close()
+
+    def test_no_oversell_with_expiring_holds(self):
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            booked = sum(pool.map(self.checkout, self.customers))
+        release_expired_holds()
+
+        self.assertEqual(WorkshopRegistration.objects.count(), booked)
+        self.assertFalse(SeatHold.objects.exists())
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.available_seats, self.capacity - booked)
+        self.assertGreaterEqual(self.workshop.available_seats, 0)
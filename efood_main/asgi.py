@@ -8,9 +8,16 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 
 import os
+import threading
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "efood_main.settings")
 
 application = get_asgi_application()
+
+# Load the autocomplete index before the first request rather than during it;
+# in a thread, as servers may import this module inside their event loop
+from efood_main.apps.recipe.completion import completion_index  # noqa: E402
+
+threading.Thread(target=completion_index.warm, daemon=True).start()
@@ -0,0 +1,178 @@
+"""Per-request query count and latency instrumentation.
+
+RequestMetricsMiddleware times the SQL run through every database
+connection, the rendering of TemplateResponses and the request as a whole.
+The figures are sent back in a ``Server-Timing`` header (visible in the
+browser's network panel), requests over REQUEST_METRICS_SLOW_MS or
+REQUEST_METRICS_MAX_QUERIES are logged together with their SQL, and latency
+histograms are kept per URL name for the lifetime of the process.
+
+The middleware is async-capable so that under ASGI a chain of async views
+is not forced through a thread on its account.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+MAX_LOGGED_QUERIES = 50
+
+_lock = threading.Lock()
+_histograms = {}
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.query_count += 1
+            self.db_time += duration
+            if len(self.queries) < MAX_LOGGED_QUERIES:
+                self.queries.append((duration, sql))
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def _record(name, total_ms, query_count):
+    with _lock:
+        entry = _histograms.get(name)
+        if entry is None:
+            entry = _histograms[name] = {
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "queries": 0,
+                "buckets": [0] * len(BUCKETS_MS),
+            }
+        entry["count"] += 1
+        entry["total_ms"] += total_ms
+        entry["max_ms"] = max(entry["max_ms"], total_ms)
+        entry["queries"] += query_count
+        entry["buckets"][bisect.bisect_left(BUCKETS_MS, total_ms)] += 1
+
+
+def request_metrics():
+    """Return a copy of the per-URL-name histograms collected so far."""
+    with _lock:
+        return {
+            name: {**entry, "buckets": dict(zip(BUCKETS_MS, entry["buckets"]))}
+            for name, entry in _histograms.items()
+        }
+
+
+def reset_request_metrics():
+    with _lock:
+        _histograms.clear()
+
+
+def instrument(metrics):
+    """Wrap the current thread's connections with ``metrics``; close to undo."""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(metrics))
+    return stack
+
+
+class RequestMetricsMiddleware:
+    """Should come first in MIDDLEWARE so that it times everything else."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "REQUEST_METRICS_SLOW_MS", 500)
+        self.max_queries = getattr(settings, "REQUEST_METRICS_MAX_QUERIES", 50)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = request._metrics = RequestMetrics()
+        with instrument(metrics):
+            response = self.get_response(request)
+        self.finish(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = request._metrics = RequestMetrics()
+        # Connections are per thread and the async ORM runs queries in the
+        # request's sync thread, so the wrappers must be installed there
+        stack = await sync_to_async(instrument)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.finish(request, response, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        # Being first in MIDDLEWARE this runs last, right before rendering
+        metrics = request._metrics
+        render_started = time.perf_counter()
+
+        def stop_clock(response):
+            metrics.template_time += time.perf_counter() - render_started
+
+        response.add_post_render_callback(stop_clock)
+        return response
+
+    def finish(self, request, response, metrics):
+        total_ms = metrics.total_time * 1000
+        db_ms = metrics.db_time * 1000
+        template_ms = metrics.template_time * 1000
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={db_ms:.1f};desc="{metrics.query_count} queries"',
+                f"tpl;dur={template_ms:.1f}",
+                f"total;dur={total_ms:.1f}",
+            ]
+        )
+
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            name = "<unresolved>"
+        else:
+            # An unnamed URL's view_name is its view's dotted path; use its pattern
+            name = match.view_name if match.url_name else match.route
+        _record(name, total_ms, metrics.query_count)
+
+        if total_ms >= self.slow_ms or metrics.query_count >= self.max_queries:
+            logger.warning(
+                "Slow request %s %s (%s): %.1f ms total, %.1f ms in %d queries, "
+                "%.1f ms rendering\n%s",
+                request.method,
+                request.path,
+                name,
+                total_ms,
+                db_ms,
+                metrics.query_count,
+                template_ms,
+                "\n".join(
+                    f"  {duration * 1000:.1f} ms  {sql}"
+                    for duration, sql in metrics.queries
+                ),
+            )
@@ -0,0 +1,197 @@
+"""Keyset (cursor) pagination.
+
+Instead of ``OFFSET n`` every page is fetched with a ``WHERE`` on the
+ordering key of the last row already shown, so page 1000 costs the same as
+page 1, and the total ``COUNT(*)`` is only run when asked for. The ordering
+must end on a unique, non-null field (normally ``id``) to break ties.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return ``(direction, values)``; raise ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if direction not in (NEXT, PREVIOUS):
+        raise ValueError("Invalid cursor")
+    return direction, values
+
+
+LAST_PAGE_CURSOR = encode_cursor(PREVIOUS, None)
+
+
+class CursorPage:
+    last_cursor = LAST_PAGE_CURSOR
+
+    def __init__(self, object_list, next_cursor, previous_cursor, total_count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total_count = total_count
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def _split(ordering):
+    return [(o.lstrip("-"), o.startswith("-")) for o in ordering]
+
+
+def _keyset_filter(fields, values, backwards):
+    """Rows strictly after ``values`` in the (possibly reversed) ordering."""
+    condition = Q()
+    equal = Q()
+    for (name, descending), value in zip(fields, values):
+        lookup = "lt" if descending != backwards else "gt"
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _prepare(queryset, ordering, cursor):
+    """Return the ordered and filtered queryset for a cursor and how to page it."""
+    fields = _split(ordering)
+    opts = queryset.model._meta
+    direction, values = NEXT, None
+    if cursor:
+        try:
+            direction, values = decode_cursor(cursor)
+            if values is not None:
+                values = [
+                    opts.get_field(name).to_python(value)
+                    for (name, _), value in zip(fields, values, strict=True)
+                ]
+        except (ValueError, TypeError, ValidationError, FieldDoesNotExist):
+            direction, values = NEXT, None
+    backwards = direction == PREVIOUS
+
+    if backwards:
+        queryset = queryset.order_by(
+            *(name if descending else f"-{name}" for name, descending in fields)
+        )
+    else:
+        queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(_keyset_filter(fields, values, backwards))
+    return queryset, fields, values, backwards
+
+
+def _page(rows, per_page, fields, values, backwards, opts, total_count):
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+        has_previous, has_next = has_more, values is not None
+    else:
+        has_previous, has_next = values is not None, has_more
+
+    def cursor_for(direction, row):
+        # value_to_string keeps full (microsecond) precision for datetimes
+        return encode_cursor(
+            direction, [opts.get_field(name).value_to_string(row) for name, _ in fields]
+        )
+
+    return CursorPage(
+        rows,
+        next_cursor=cursor_for(NEXT, rows[-1]) if has_next and rows else None,
+        previous_cursor=(
+            cursor_for(PREVIOUS, rows[0]) if has_previous and rows else None
+        ),
+        total_count=total_count,
+    )
+
+
+def paginate_by_cursor(queryset, ordering, per_page, cursor=None, count=False):
+    """Return a CursorPage of ``queryset`` ordered by ``ordering``.
+
+    An invalid cursor is treated as a request for the first page. Pass
+    ``count=True`` to also run a ``COUNT(*)`` for ``total_count``.
+    """
+    total_count = queryset.count() if count else None
+    page_queryset, fields, values, backwards = _prepare(queryset, ordering, cursor)
+    rows = list(page_queryset[: per_page + 1])
+    return _page(
+        rows, per_page, fields, values, backwards, queryset.model._meta, total_count
+    )
+
+
+async def apaginate_by_cursor(queryset, ordering, per_page, cursor=None, count=False):
+    """Async ``paginate_by_cursor``, for async views."""
+    total_count = await queryset.acount() if count else None
+    page_queryset, fields, values, backwards = _prepare(queryset, ordering, cursor)
+    rows = [row async for row in page_queryset[: per_page + 1]]
+    return _page(
+        rows, per_page, fields, values, backwards, queryset.model._meta, total_count
+    )
+
+
+class CursorPaginationMixin:
+    """Keyset pagination for ListView; ``page_obj`` is a CursorPage."""
+
+    cursor_ordering = ("-id",)
+    cursor_query_param = "cursor"
+    count_total = False
+
+    def paginate_queryset(self, queryset, page_size):
+        page = paginate_by_cursor(
+            queryset,
+            self.cursor_ordering,
+            page_size,
+            cursor=self.request.GET.get(self.cursor_query_param),
+            count=self.count_total,
+        )
+        return (None, page, page.object_list, page.has_other_pages())
+
+
+class AsyncCursorPaginationMixin(CursorPaginationMixin):
+    """CursorPaginationMixin for a ListView served by an async ``get``."""
+
+    async def get(self, request, *args, **kwargs):
+        self.cursor_page = await apaginate_by_cursor(
+            self.get_queryset(),
+            self.cursor_ordering,
+            self.get_paginate_by(None),
+            cursor=request.GET.get(self.cursor_query_param),
+            count=self.count_total,
+        )
+        self.object_list = self.cursor_page.object_list
+        return self.render_to_response(self.get_context_data())
+
+    def paginate_queryset(self, queryset, page_size):
+        # Already fetched by get(), which get_context_data() cannot await
+        page = self.cursor_page
+        return (None, page, page.object_list, page.has_other_pages())
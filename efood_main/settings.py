@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,13 +24,22 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
+# DJANGO_ENV=production selects the production profile: no DEBUG, cached
+# template loaders, persistent database connections, cached sessions and
+# hashed static file names (run collectstatic first).
+DJANGO_ENV = os.getenv("DJANGO_ENV", "development")
+PRODUCTION = DJANGO_ENV == "production"
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv("SECRET_KEY", "default_secret_key_for_development")
+if PRODUCTION and "SECRET_KEY" not in os.environ:
+    raise ImproperlyConfigured("SECRET_KEY must be set when DJANGO_ENV=production")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = not PRODUCTION
 
-ALLOWED_HOSTS = []
+# Comma-separated host names, e.g. "example.com,www.example.com"
+ALLOWED_HOSTS = [host for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host]
 
 
 # Application definition
@@ -41,15 +51,20 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "djmoney",
     "efood_main.apps.accounts",
     "efood_main.apps.chef",
     "efood_main.apps.recipe",
     "efood_main.apps.workshop",
     "efood_main.apps.customers",
+    "efood_main.apps.mailer",
+    "efood_main.apps.renditions",
+    "efood_main.apps.loadtest",
 ]
 
 MIDDLEWARE = [
+    "efood_main.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -65,7 +80,7 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": ["templates"],
-        "APP_DIRS": True,
+        "APP_DIRS": not PRODUCTION,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
@@ -78,6 +93,17 @@ TEMPLATES = [
         },
     },
 ]
+if PRODUCTION:
+    # Compile each template once per process and never check it for changes
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
+        )
+    ]
 
 WSGI_APPLICATION = "efood_main.wsgi.application"
 
@@ -94,9 +120,60 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        # Keep connections open between requests in production; health checks
+        # replace a connection the server has dropped before it is reused
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 600 if PRODUCTION else 0)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # How close a misspelling must be for RecipeItem.objects.similar
+            # (pg_trgm's default, 0.6, misses many single-letter slips)
+            "options": "-c pg_trgm.word_similarity_threshold="
+            + os.getenv("RECIPE_SIMILARITY_THRESHOLD", "0.5"),
+        },
     }
 }
 
+# Cache
+# Point CACHE_BACKEND/CACHE_LOCATION at a shared cache (Redis, Memcached)
+# when running several workers so invalidation reaches all of them.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Seconds to cache the public recipe pages for; 0 disables a page's cache
+RECIPE_CACHE_TIMEOUTS = {
+    "home": int(os.getenv("RECIPE_CACHE_HOME_TIMEOUT", 300)),
+    "search": int(os.getenv("RECIPE_CACHE_SEARCH_TIMEOUT", 60)),
+    "autocomplete": int(os.getenv("RECIPE_CACHE_AUTOCOMPLETE_TIMEOUT", 300)),
+}
+
+# Minutes the seat of a paid workshop is held: while its customer checks out,
+# and for the head of the waitlist to check out once a seat frees up. A
+# checkout of 0 books seats at once; run release_seat_holds to expire holds.
+SEAT_HOLD_MINUTES = {
+    "checkout": int(os.getenv("SEAT_HOLD_CHECKOUT_MINUTES", 10)),
+    "waitlist": int(os.getenv("SEAT_HOLD_WAITLIST_MINUTES", 24 * 60)),
+}
+
+# Seconds the response to an idempotency key is kept to answer retries of a
+# booking or cancellation with; 0 ignores the keys
+IDEMPOTENCY_KEY_TIMEOUT = int(os.getenv("IDEMPOTENCY_KEY_TIMEOUT", 600))
+
+# Requests slower than this many milliseconds, or running at least this many
+# queries, are logged with their SQL by RequestMetricsMiddleware
+REQUEST_METRICS_SLOW_MS = int(os.getenv("REQUEST_METRICS_SLOW_MS", 500))
+REQUEST_METRICS_MAX_QUERIES = int(os.getenv("REQUEST_METRICS_MAX_QUERIES", 50))
+
+if PRODUCTION:
+    # Sessions are read from the cache and written through to the database
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
 AUTH_USER_MODEL = "accounts.User"
 
 # Password validation
@@ -136,11 +213,28 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "static"
 STATICFILES_DIRS = ["efood_main/static"]
+if PRODUCTION:
+    # Content-hashed file names so static files can be cached forever
+    STORAGES = {
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {
+            "BACKEND": "efood_main.storage.LenientManifestStaticFilesStorage"
+        },
+    }
 
 # Media files configuration
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Fixed-size (width, height) renditions built for uploaded images, each in
+# the original format and WebP, by a pool of IMAGE_RENDITION_WORKERS threads
+IMAGE_RENDITIONS = {
+    "thumb": (400, 300),
+    "avatar": (150, 150),
+    "cover": (1200, 400),
+}
+IMAGE_RENDITION_WORKERS = 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -149,10 +243,23 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 LOGIN_URL = "login"
 
 # Email configuration
+# Use "django.core.mail.backends.filebased.EmailBackend" (with EMAIL_FILE_PATH)
+# or "django.core.mail.backends.locmem.EmailBackend" for local testing
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", BASE_DIR / "sent_emails")
 EMAIL_HOST = os.getenv("EMAIL_HOST")
 EMAIL_PORT = os.getenv("EMAIL_PORT")
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 EMAIL_USE_TLS = True
 DEFAULT_FROM_EMAIL = f"Chef's recipe  <{EMAIL_HOST_USER}>"
+
+# Outbox dispatcher (manage.py send_queued_mail): retries back off
+# exponentially from MAILER_RETRY_BACKOFF seconds. A worker leases the emails
+# it sends for MAILER_LEASE_SECONDS; if it dies, they are retried after that
+MAILER_MAX_ATTEMPTS = 5
+MAILER_RETRY_BACKOFF = 60
+MAILER_LEASE_SECONDS = 300
 GOOGLE_MAP_API = os.getenv("GOOGLE_MAP_API")
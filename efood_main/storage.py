@@ -0,0 +1,17 @@
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+
+class LenientManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that leaves references to missing files as they are.
+
+    The vendored theme CSS points at fonts and sprites that were never
+    shipped; the stock storage refuses to run collectstatic because of them.
+    """
+
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            return name
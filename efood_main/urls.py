@@ -26,5 +26,10 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("", views.HomePageView.as_view(), name="home"),
     path("search/", views.RecipeSearchListView.as_view(), name="recipe_search"),
+    path(
+        "search/autocomplete/",
+        views.RecipeAutocompleteView.as_view(),
+        name="recipe_autocomplete",
+    ),
     path("accounts/", include("efood_main.apps.accounts.urls")),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,28 +1,147 @@
-from django.db.models import Q
-from django.views.generic import ListView
+from urllib.parse import urlencode
 
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Max
+from django.http import JsonResponse
+from django.views.generic import ListView, View
+
+from efood_main.apps.recipe.cache import acached
+from efood_main.apps.recipe.completion import CATEGORIES, TITLES, completion_index
+from efood_main.apps.recipe.facets import (
+    FacetCounts,
+    acount_facets,
+    facet_links,
+    filter_recipes,
+    parse_filters,
+)
 from efood_main.apps.recipe.models import RecipeItem
 
 
-class HomePageView(ListView):
+class AsyncListView(ListView):
+    """ListView with an async ``get`` for a list fetched by ``aget_queryset``.
+
+    By default that is every row of ``get_queryset()``. Only the query runs
+    on the event loop; the response is a TemplateResponse that Django renders
+    in a worker thread, where context processors may still hit the database.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = await self.aget_queryset()
+        return self.render_to_response(self.get_context_data())
+
+    async def aget_queryset(self):
+        return [obj async for obj in self.get_queryset()]
+
+
+class HomePageView(AsyncListView):
     model = RecipeItem
     template_name = "home.html"
     context_object_name = "recipe_items"
-    queryset = RecipeItem.objects.all().order_by("created_at")[:4]
 
+    async def aget_queryset(self):
+        async def latest():
+            queryset = RecipeItem.objects.select_related("category")
+            return [item async for item in queryset.order_by("created_at")[:4]]
+
+        return await acached("home", "recipe_items", latest)
+
+
+class RecipeSearchListView(AsyncListView):
+    """Search results with their category, chef and preparation time facets.
+
+    The facet counts also tell whether the search matches anything, and when
+    it does not, recipes with similar titles are faceted and shown instead.
+    """
 
-class RecipeSearchListView(ListView):
     model = RecipeItem
     template_name = "recipe_search_results.html"
     context_object_name = "search_recipes"
 
-    def get_queryset(self):
-        query = self.request.GET.get("q")
-        if query:
-            return RecipeItem.objects.filter(
-                Q(recipe_title__icontains=query)
-                | Q(recipe_ingredients__icontains=query)
-                | Q(category__category_name__icontains=query)
-            ).distinct()
+    max_results = 100
+    max_similar_results = 50
+
+    async def aget_queryset(self):
+        self.similar = False
+        self.facets = FacetCounts()
+        query = " ".join(self.request.GET.get("q", "").lower().split())
+        if not query:
+            return []
+        filters = parse_filters(self.request.GET)
+
+        async def search():
+            queryset = RecipeItem.objects.search(query)
+            limit, similar = self.max_results, False
+            facets = await acount_facets(queryset, filters)
+            if not facets.total:
+                queryset = RecipeItem.objects.similar(query)
+                limit, similar = self.max_similar_results, True
+                facets = await acount_facets(queryset, filters)
+            results = []
+            if facets.matches:
+                queryset = filter_recipes(queryset, filters).select_related("category")
+                results = [item async for item in queryset[:limit]]
+            return {"results": results, "facets": facets, "similar": similar}
+
+        key = urlencode({"q": query, **filters}, doseq=True)
+        found = await acached("search", key, search)
+        self.similar, self.facets = found["similar"], found["facets"]
+        return found["results"]
+
+    def get_context_data(self, **kwargs):
+        params = self.request.GET
+        return super().get_context_data(
+            similar=self.similar,
+            facets=self.facets,
+            facet_links=facet_links(self.facets, params),
+            filtered=any(parse_filters(params).values()),
+            **kwargs,
+        )
+
+
+class RecipeAutocompleteView(View):
+    """JSON ``{"results": [title, ...], "categories": [name, ...]}`` for ``q``.
+
+    Titles and category names starting with ``q`` come from the in-process
+    completion index (from the database while it first loads). Only when no
+    title does are titles close to ``q`` looked up, in case of a typo.
+    ``limit``: max 20.
+    """
+
+    default_limit = 8
+    max_limit = 20
+    min_similar_length = 3
+
+    async def get(self, request, *args, **kwargs):
+        prefix = " ".join(request.GET.get("q", "").split())
+        try:
+            limit = min(
+                int(request.GET.get("limit", self.default_limit)), self.max_limit
+            )
+        except ValueError:
+            return JsonResponse({"error": "limit must be a number."}, status=400)
+        if not prefix or limit < 1:
+            return JsonResponse({"results": [], "categories": []})
+
+        if completion_index.ready or not completion_index.building:
+            await completion_index.async_sync()
+            titles = completion_index.complete(TITLES, prefix, limit)
+            categories = completion_index.complete(CATEGORIES, prefix, limit)
         else:
-            return RecipeItem.objects.none()
+            # Still loading as the worker starts; ask the database meanwhile
+            completions = RecipeItem.objects.completions(prefix)[:limit]
+            titles = [title async for title in completions]
+            categories = []
+        if not titles and len(prefix) >= self.min_similar_length:
+
+            async def similar():
+                queryset = (
+                    RecipeItem.objects.filter(recipe_title__trigram_word_similar=prefix)
+                    .values("recipe_title")
+                    .annotate(score=Max(TrigramWordSimilarity(prefix, "recipe_title")))
+                    .order_by("-score", "recipe_title")
+                    .values_list("recipe_title", flat=True)
+                )
+                return [title async for title in queryset[:limit]]
+
+            titles = await acached("autocomplete", f"{limit}:{prefix.lower()}", similar)
+        return JsonResponse({"results": titles, "categories": categories})
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "efood_main.settings")
 
 application = get_wsgi_application()
+
+# Load the autocomplete index before the first request rather than during it
+from efood_main.apps.recipe.completion import completion_index  # noqa: E402
+
+completion_index.warm()